@@ -0,0 +1,318 @@
+"""
+Module containing vectorized analytics over a budget's transactions
+"""
+
+
+import datetime
+import numpy as np
+from budget import Budget
+from date_utils import to_ordinal
+from rollups import period_label
+from string_table import StringTable
+
+
+# day ordinal of 01/01/1970, the epoch of numpy datetime64
+EPOCH_ORDINAL: int = datetime.date(1970, 1, 1).toordinal()
+
+
+class LedgerArrays:
+    """
+    A budget's transactions as NumPy columns, one element per transaction. String attributes are integer codes into
+    a list of their distinct values
+    """
+
+    def __init__(self, cents: np.ndarray, ordinals: np.ndarray, types: np.ndarray, type_values: list,
+                 categories: np.ndarray, category_values: list, vendors: np.ndarray, vendor_values: list):
+        """
+        Init
+
+        :param cents: amount of each transaction in cents
+        :type cents: np.ndarray
+        :param ordinals: day ordinal of each transaction's date, 0 if the date could not be parsed
+        :type ordinals: np.ndarray
+        :param types: transaction type codes
+        :type types: np.ndarray
+        :param type_values: transaction types the codes stand for
+        :type type_values: list
+        :param categories: category codes
+        :type categories: np.ndarray
+        :param category_values: categories the codes stand for
+        :type category_values: list
+        :param vendors: vendor codes
+        :type vendors: np.ndarray
+        :param vendor_values: vendors the codes stand for
+        :type vendor_values: list
+        """
+        self.cents = cents.astype(np.int64, copy=False)
+        self.ordinals = ordinals.astype(np.int64, copy=False)
+        self.valid_dates = self.ordinals > 0
+        lowered = np.array([str(value).lower() for value in type_values])
+        self.is_expense = (lowered == 'expense')[types]
+        self.is_income = (lowered == 'income')[types]
+        self.categories = categories.astype(np.int64, copy=False)
+        self.category_values = category_values
+        self.vendors = vendors.astype(np.int64, copy=False)
+        self.vendor_values = vendor_values
+        # month number (year * 12 + month - 1, as date_utils.parse_month) of each transaction, -1 without a date
+        months = (self.ordinals - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        self.months = np.where(self.valid_dates, months + 1970 * 12, -1)
+
+    def __len__(self):
+        return len(self.cents)
+
+    def signed_cents(self, measure: str):
+        """
+        Method to get each transaction's contribution to a measure
+
+        :param measure: 'expense', 'income' or 'net' (income less expenses)
+        :type measure: str
+        :return: np.ndarray - cents per transaction, 0 for transactions the measure does not count
+        :rtype: np.ndarray
+        """
+        if measure == 'expense':
+            return np.where(self.is_expense, self.cents, 0)
+        if measure == 'income':
+            return np.where(self.is_income, self.cents, 0)
+        if measure == 'net':
+            return np.where(self.is_income, self.cents, 0) - np.where(self.is_expense, self.cents, 0)
+        raise ValueError(f"Invalid measure ({measure}). Valid measures are ['expense', 'income', 'net'].")
+
+
+class Analytics:
+    """
+    Summary statistics over a budget's transactions, computed with grouped NumPy reductions. The transactions are
+    copied into NumPy arrays the first time they are needed and the arrays are kept until the budget changes, so
+    repeated reports over a large ledger cost one copy.
+    """
+
+    def __init__(self, budget: Budget):
+        """
+        Init
+
+        :param budget: budget to analyse
+        :type budget: Budget
+        """
+        self.budget = budget
+        self.cached: LedgerArrays | None = None
+        budget.add_listener(self.invalidate)
+
+    def close(self):
+        """
+        Method to stop following the budget's changes and drop the cached arrays
+
+        :return: None
+        """
+        self.budget.remove_listener(self.invalidate)
+        self.cached = None
+
+    def invalidate(self, event: str, subject):
+        """
+        Method called by the budget for every change (see Budget.add_listener), dropping the cached arrays when a
+        transaction changes
+
+        :param event: name of the change
+        :type event: str
+        :param subject: what changed
+        :return: None
+        """
+        if 'transaction' in event:
+            self.cached = None
+
+    def arrays(self):
+        """
+        Method to get the budget's transactions as NumPy arrays, building them if the budget changed
+
+        :return: LedgerArrays - the budget's transactions
+        :rtype: LedgerArrays
+        """
+        if self.cached is None:
+            self.cached = self.arrays_from_transactions()
+        return self.cached
+
+    def arrays_from_transactions(self):
+        """
+        Method to build the arrays with one pass over the budget's transactions
+
+        :return: LedgerArrays - the budget's transactions
+        :rtype: LedgerArrays
+        """
+        count = len(self.budget.expense_transactions) + len(self.budget.income_transactions)
+        tables = {column: StringTable() for column in ('transaction_type', 'category', 'vendor')}
+        cents = np.empty(count, dtype=np.int64)
+        ordinals = np.empty(count, dtype=np.int64)
+        codes = {column: np.empty(count, dtype=np.int64) for column in tables}
+        for row, trans in enumerate(self.budget.all_transactions()):
+            cents[row] = trans.amount_cents
+            ordinals[row] = trans.date_ordinal or 0
+            codes['transaction_type'][row] = tables['transaction_type'].encode(trans.transaction_type)
+            codes['category'][row] = tables['category'].encode(trans.category)
+            codes['vendor'][row] = tables['vendor'].encode(trans.vendor)
+        return LedgerArrays(cents, ordinals, codes['transaction_type'], tables['transaction_type'].values,
+                            codes['category'], tables['category'].values, codes['vendor'], tables['vendor'].values)
+
+    def monthly_series(self, measure: str = 'expense'):
+        """
+        Method to total a measure per month, over every month from the first transaction to the last
+
+        :param measure: 'expense', 'income' or 'net' (income less expenses)
+        :type measure: str
+        :return: (int, np.ndarray) - month number of the first month, and cents per month (0 for quiet months)
+        :rtype: tuple[int, np.ndarray]
+        """
+        ledger = self.arrays()
+        weights = ledger.signed_cents(measure)[ledger.valid_dates]
+        months = ledger.months[ledger.valid_dates]
+        if not len(months):
+            return 0, np.zeros(0, dtype=np.int64)
+        first = int(months.min())
+        return first, np.bincount(months - first, weights=weights).round().astype(np.int64)
+
+    def monthly_totals(self, measure: str = 'expense'):
+        """
+        Method to total a measure per month
+
+        :param measure: 'expense', 'income' or 'net' (income less expenses)
+        :type measure: str
+        :return: dict - dollars keyed by month label ('2023-10'), for every month from the first transaction to the
+         last
+        :rtype: dict[str, float]
+        """
+        first, series = self.monthly_series(measure)
+        return {period_label(first + offset, 'month'): cents / 100 for offset, cents in enumerate(series.tolist())}
+
+    def moving_average(self, window: int = 3, measure: str = 'expense'):
+        """
+        Method to get the moving average of a monthly measure
+
+        :param window: number of months averaged
+        :type window: int
+        :param measure: 'expense', 'income' or 'net' (income less expenses)
+        :type measure: str
+        :return: dict - average dollars over the window ending at each month, keyed by month label, from the first
+         month with a full window
+        :rtype: dict[str, float]
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        first, series = self.monthly_series(measure)
+        if len(series) < window:
+            return {}
+        sums = np.cumsum(np.concatenate(([0], series)))
+        averages = (sums[window:] - sums[:-window]) / window / 100
+        return {period_label(first + window - 1 + offset, 'month'): float(average)
+                for offset, average in enumerate(averages)}
+
+    def year_over_year(self, measure: str = 'expense'):
+        """
+        Method to compare each month's measure with the same month a year earlier
+
+        :param measure: 'expense', 'income' or 'net' (income less expenses)
+        :type measure: str
+        :return: dict - (dollars, dollars a year earlier, change in dollars, change as a fraction or None when the
+         year earlier was 0) keyed by month label, from the 13th month on
+        :rtype: dict[str, tuple]
+        """
+        first, series = self.monthly_series(measure)
+        current, previous = series[12:], series[:-12]
+        deltas = current - previous
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fractions = np.where(previous != 0, deltas / np.where(previous != 0, previous, 1), np.nan)
+        return {period_label(first + 12 + offset, 'month'): (now / 100, before / 100, delta / 100,
+                                                             None if np.isnan(fraction) else float(fraction))
+                for offset, (now, before, delta, fraction)
+                in enumerate(zip(current.tolist(), previous.tolist(), deltas.tolist(), fractions.tolist()))}
+
+    def shares(self, by: str = 'category', measure: str = 'expense', start=None, end=None):
+        """
+        Method to get each category's (or vendor's) share of a measure
+
+        :param by: 'category' or 'vendor'
+        :type by: str
+        :param measure: 'expense' or 'income'
+        :type measure: str
+        :param start: first date to include (DD/MM/YY, datetime.date or ordinal), None for no lower bound
+        :param end: last date to include, None for no upper bound
+        :return: dict - fraction of the measure keyed by category or vendor, largest first
+        :rtype: dict[str, float]
+        """
+        ledger = self.arrays()
+        codes, values = self.grouping(ledger, by)
+        weights = ledger.signed_cents(measure)
+        mask = self.date_mask(ledger, start, end)
+        totals = np.bincount(codes[mask], weights=weights[mask], minlength=len(values))
+        grand_total = totals.sum()
+        if not grand_total:
+            return {}
+        order = np.argsort(-totals, kind='stable')
+        return {values[code]: float(totals[code] / grand_total) for code in order.tolist() if totals[code]}
+
+    def percentiles(self, q=(50, 90, 99), by: str | None = None, measure: str = 'expense'):
+        """
+        Method to get percentiles of transaction amounts, overall or per category or vendor
+
+        :param q: percentiles to compute, between 0 and 100
+        :param by: 'category' or 'vendor' to compute percentiles per group, None for all transactions
+        :type by: str | None
+        :param measure: 'expense' or 'income', the transactions whose amounts are used
+        :type measure: str
+        :return: dict - dollars at each percentile, as {percentile: dollars} or {group: {percentile: dollars}}
+        :rtype: dict
+        """
+        if measure not in ('expense', 'income'):
+            raise ValueError(f"Invalid measure ({measure}). Valid measures are ['expense', 'income'].")
+        q = np.asarray(q, dtype=float)
+        ledger = self.arrays()
+        mask = ledger.is_expense if measure == 'expense' else ledger.is_income
+        cents = ledger.cents[mask]
+        if by is None:
+            if not len(cents):
+                return {}
+            return dict(zip(q.tolist(), (np.percentile(cents, q) / 100).tolist()))
+
+        codes, values = self.grouping(ledger, by)
+        codes = codes[mask]
+        # sort by group then amount, then interpolate within each group's slice, like np.percentile does
+        order = np.lexsort((cents, codes))
+        cents, codes = cents[order], codes[order]
+        groups, starts, counts = np.unique(codes, return_index=True, return_counts=True)
+        positions = starts[:, None] + (counts[:, None] - 1) * (q[None, :] / 100)
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.minimum(lower + 1, (starts + counts - 1)[:, None])
+        fraction = positions - lower
+        results = (cents[lower] * (1 - fraction) + cents[upper] * fraction) / 100
+        return {values[group]: dict(zip(q.tolist(), row)) for group, row in zip(groups.tolist(), results.tolist())}
+
+    def grouping(self, ledger: LedgerArrays, by: str):
+        """
+        Method to get the codes and values of a grouping column
+
+        :param ledger: arrays to group
+        :type ledger: LedgerArrays
+        :param by: 'category' or 'vendor'
+        :type by: str
+        :return: (np.ndarray, list) - code of each transaction and the values the codes stand for
+        :rtype: tuple[np.ndarray, list]
+        """
+        if by == 'category':
+            return ledger.categories, ledger.category_values
+        if by == 'vendor':
+            return ledger.vendors, ledger.vendor_values
+        raise ValueError(f"Invalid grouping ({by}). Valid groupings are ['category', 'vendor'].")
+
+    def date_mask(self, ledger: LedgerArrays, start, end):
+        """
+        Method to select the transactions dated between start and end
+
+        :param ledger: arrays to select from
+        :type ledger: LedgerArrays
+        :param start: first date to include, None for no lower bound
+        :param end: last date to include, None for no upper bound
+        :return: np.ndarray - True for each selected transaction
+        :rtype: np.ndarray
+        """
+        mask = np.ones(len(ledger), dtype=bool)
+        if start is not None:
+            mask &= ledger.valid_dates & (ledger.ordinals >= to_ordinal(start))
+        if end is not None:
+            mask &= ledger.valid_dates & (ledger.ordinals <= to_ordinal(end))
+        return mask
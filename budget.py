@@ -3,13 +3,49 @@ Module containing budget class
 """
 
 
+import datetime
+import gc
+import itertools
 import json
 import os
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable
+from categorizer import Categorizer, UNCATEGORIZED
+from date_utils import ordinal_to_month, to_ordinal
+from export import EXPORT_HEADERS, write_columnar, write_csv
 from goal import Goal
-from transaction import Transaction
+from json_stream import JsonStreamReader
+from money import from_cents, to_cents
+from transaction import Transaction, intern_string, transaction_ids
+from query_engine import TransactionIndex
+from rollups import Rollups
 import openpyxl
 
 
+# number of items saved or exported between progress reports
+PROGRESS_INTERVAL: int = 10000
+
+
+def guarded(method: Callable):
+    """
+    Decorator for Budget methods that change the budget or take a snapshot of it. The method runs holding the
+    budget's lock, so a save or export working on another thread never sees a change half made
+
+    :param method: method to guard
+    :type method: Callable
+    :return: Callable - guarded method
+    :rtype: Callable
+    """
+    @wraps(method)
+    def guarded_method(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return guarded_method
+
+
 #
 # add transaction (requirement 1.1.8)
 #
@@ -18,22 +54,102 @@ class Budget:
     Object representing a budget. Holds transactions and other budget related data.
     """
 
+    # transaction attributes that can be used to look up transactions
+    query_keys: list[str] = ['transaction_type', 'date', 'amount', 'vendor', 'category', 'note', 'expense_goal']
+    # columns of exported transactions
+    export_headers: tuple[str, ...] = EXPORT_HEADERS
+
     def __init__(self):
         """
         Init
         """
-        self.expense_transactions: list[Transaction] = []
-        self.income_transactions: list[Transaction] = []
+        # transactions are keyed by transaction id, in the order they were added
+        self.expense_transactions: dict[int, Transaction] = {}
+        self.income_transactions: dict[int, Transaction] = {}
         self.categories: list[str] = ["Utilities", "Gas", "Entertainment", "Rent/Housing",
                                       "Groceries", "Other"]
         self.expense_goals: dict[str, Goal] = {}  # name of goal is key and Goal object is value
-        self.total_expenses: float = 0  # total expenses under table (Requirement 1.1.10)
-        self.total_income: float = 0  # total income under table (Requirement 1.2.3)
-        self.balance: float = 0
+        # totals are kept in integer cents so they stay exact. total_expenses, total_income and balance give dollars
+        self.expense_cents: int = 0  # total expenses under table (Requirement 1.1.10)
+        self.income_cents: int = 0  # total income under table (Requirement 1.2.3)
+        self.transaction_index: TransactionIndex = TransactionIndex()  # lookups for get_transactions
+        self.rollups: Rollups = Rollups()  # per-period totals for aggregate
+        self.listeners: list[Callable[[str, object], None]] = []  # called with (event, subject) on every change
+        self.category_rules: Categorizer = Categorizer()  # vendor to category rules for categorize_transactions
+        # held while the budget changes and while a snapshot is taken (see guarded). Re-entrant, as changes call
+        # other changes
+        self.lock: threading.RLock = threading.RLock()
+
+    #
+    # total expenses under table (Requirement 1.1.10)
+    #
+    @property
+    def total_expenses(self):
+        """
+        total of expense transactions in dollars
+        """
+        return from_cents(self.expense_cents)
+
+    #
+    # total income under table (Requirement 1.2.3)
+    #
+    @property
+    def total_income(self):
+        """
+        total of income transactions in dollars
+        """
+        return from_cents(self.income_cents)
+
+    @property
+    def balance(self):
+        """
+        total income less total expenses in dollars
+        """
+        return from_cents(self.income_cents - self.expense_cents)
+
+    def add_listener(self, listener: Callable[[str, object], None]):
+        """
+        Method to register a function to be called after every change to the budget. It is called with the event name
+        and its subject:
+         'add_transaction', 'update_transaction', 'delete_transaction' - the Transaction
+         'add_transactions' - list of the Transactions added by add_transactions
+         'add_goal', 'update_goal', 'delete_goal' - the Goal
+         'rename_goal' - (old name, the renamed Goal), followed by 'update_transaction' for each linked transaction
+         'categories' - the budget's list of categories
+
+        :param listener: function to call
+        :type listener: Callable[[str, object], None]
+        :return: None
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, object], None]):
+        """
+        Method to stop calling a function registered with add_listener
+
+        :param listener: function to stop calling
+        :type listener: Callable[[str, object], None]
+        :return: None
+        """
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def notify(self, event: str, subject):
+        """
+        Method to call every listener with a change to the budget
+
+        :param event: name of the change (see add_listener)
+        :type event: str
+        :param subject: what changed
+        :return: None
+        """
+        for listener in self.listeners:
+            listener(event, subject)
 
     #
     # add transaction (requirement 1.1.8)
     #
+    @guarded
     def add_transaction(self, transaction: Transaction):
         """
         Method to add transaction to budget
@@ -46,25 +162,120 @@ class Budget:
         # validate transaction
         if not transaction or not isinstance(transaction, Transaction):
             raise ValueError("Transaction must not be empty and must be of type Transaction")
+        if transaction in self.transaction_index:
+            raise ValueError(f"Transaction with id {transaction.transaction_id} already exists in budget")
 
-        #
-        # add income transaction (requirement 1.2.1)
-        #
-        if transaction.transaction_type.lower() == 'income':
-            self.income_transactions.append(transaction)
-            self.total_income += transaction.amount
-
-        if transaction.transaction_type.lower() == 'expense':
-            self.expense_transactions.append(transaction)
-            self.total_expenses += transaction.amount
-        self.balance = self.total_income - self.total_expenses  # update balance
+        self.add_to_totals(transaction)
+        self.transaction_index.add(transaction)
+        self.rollups.add(transaction)
         if transaction.expense_goal != "N/A":
             self.link_transaction_to_expense_goal(transaction, transaction.expense_goal)
+        self.notify('add_transaction', transaction)
         return True
 
+    #
+    # add income transaction (requirement 1.2.1)
+    #
+    def add_to_totals(self, transaction: Transaction):
+        """
+        Method to file a transaction under its type and add its amount to that type's total
+
+        :param transaction: transaction to file
+        :type transaction: Transaction
+        :return: None
+        """
+        if transaction.transaction_type.lower() == 'income':
+            self.income_transactions[transaction.transaction_id] = transaction
+            self.income_cents += transaction.amount_cents
+
+        if transaction.transaction_type.lower() == 'expense':
+            self.expense_transactions[transaction.transaction_id] = transaction
+            self.expense_cents += transaction.amount_cents
+
     #
     # remove transaction (requirement 1.1.9)
     #
+    def remove_from_totals(self, transaction: Transaction):
+        """
+        Method to undo add_to_totals. Must be called before the transaction's type or amount changes
+
+        :param transaction: transaction to remove
+        :type transaction: Transaction
+        :return: None
+        """
+        if transaction.transaction_type.lower() == 'income':
+            del self.income_transactions[transaction.transaction_id]
+            self.income_cents -= transaction.amount_cents
+
+        if transaction.transaction_type.lower() == 'expense':
+            del self.expense_transactions[transaction.transaction_id]
+            self.expense_cents -= transaction.amount_cents
+
+    #
+    # load budget (Requirement 1.3.7)
+    #
+    @guarded
+    def add_transactions(self, transactions: Iterable[Transaction]):
+        """
+        Method to add a batch of transactions to budget. The whole batch is validated before anything is added,
+        then totals, goal amounts and indexes are each updated once for the batch rather than once per transaction
+
+        :param transactions: transactions to add to budget
+        :type transactions: Iterable[Transaction]
+        :return: int - number of transactions added
+        :rtype: int
+        """
+        with paused_gc():
+            return self.add_transaction_batch(list(transactions))
+
+    def add_transaction_batch(self, transactions: list[Transaction]):
+        """
+        Method doing the work of add_transactions
+
+        :param transactions: transactions to add to budget
+        :type transactions: list[Transaction]
+        :return: int - number of transactions added
+        :rtype: int
+        """
+        batch_ids = set()
+        for transaction in transactions:
+            if not transaction or not isinstance(transaction, Transaction):
+                raise ValueError("Transaction must not be empty and must be of type Transaction")
+            if transaction in self.transaction_index or transaction.transaction_id in batch_ids:
+                raise ValueError(f"Transaction with id {transaction.transaction_id} already exists in budget")
+            batch_ids.add(transaction.transaction_id)
+
+        # one pass to file each transaction by type and group the ones linked to goals
+        income = {}
+        expenses = {}
+        by_goal: dict[str, list[Transaction]] = {}
+        for transaction in transactions:
+            transaction_type = transaction.transaction_type.lower()
+            if transaction_type == 'income':
+                income[transaction.transaction_id] = transaction
+            elif transaction_type == 'expense':
+                expenses[transaction.transaction_id] = transaction
+            if transaction.expense_goal != "N/A":
+                by_goal.setdefault(transaction.expense_goal.lower(), []).append(transaction)
+
+        self.income_transactions.update(income)
+        self.expense_transactions.update(expenses)
+        self.income_cents += sum(transaction.amount_cents for transaction in income.values())
+        self.expense_cents += sum(transaction.amount_cents for transaction in expenses.values())
+        self.transaction_index.add_many(transactions)
+        self.rollups.add_many(transactions)
+        for goal_name, goal_transactions in by_goal.items():
+            if goal_name in self.expense_goals:
+                self.expense_goals[goal_name].apply_transactions(goal_transactions)
+            else:
+                print(f'goal {goal_name} does not exist, {len(goal_transactions)} transactions not linked')
+        self.notify('add_transactions', transactions)
+        return len(transactions)
+
+    #
+    # remove transaction (requirement 1.1.9)
+    #
+    @guarded
     def delete_transaction(self, transaction: Transaction):
         """
         Method to delete transaction from budget
@@ -77,29 +288,30 @@ class Budget:
         if not transaction or not isinstance(transaction, Transaction):
             raise ValueError("Transaction must not be empty and must be of type Transaction")
 
-        #
-        # add income transaction (requirement 1.2.1)
-        #
-        if transaction.transaction_type.lower() == 'income':
-            try:
-                self.income_transactions.remove(transaction)
-            except ValueError:
-                return False
-            else:
-                self.total_income -= transaction.amount
+        # find the transaction by id. The stored transaction holds the values the totals and indexes were built from
+        transaction = self.get_transaction(transaction.transaction_id)
+        if transaction is None:
+            return False
 
-        if transaction.transaction_type.lower() == 'expense':
-            try:
-                self.expense_transactions.remove(transaction)
-            except ValueError:
-                return False
-            else:
-                self.total_expenses -= transaction.amount
-        self.balance = self.total_income - self.total_expenses  # update balance
+        self.remove_from_totals(transaction)
+        self.transaction_index.remove(transaction)
+        self.rollups.remove(transaction)
         if transaction.expense_goal != "N/A":
             self.unlink_transaction_from_expense_goal(transaction, transaction.expense_goal)
+        self.notify('delete_transaction', transaction)
         return True
 
+    def get_transaction(self, transaction_id: int):
+        """
+        Method to get transaction from Budget by its id
+
+        :param transaction_id: id of transaction to retrieve from budget
+        :type transaction_id: int
+        :return: Transaction - transaction with the id, None if it is not in the budget
+        :rtype: Transaction | None
+        """
+        return self.transaction_index.transactions.get(transaction_id)
+
     #
     # save transaction updates (requirement 1.3.3)
     #
@@ -145,29 +357,142 @@ class Budget:
     def get_transactions(self, **kwargs):
         """
         Method to get list of transactions based on specified attribute values
-        Example: budget.get_transactions(transaction_type="income", "amount"=58.25) would return
+        Example: budget.get_transactions(transaction_type="income", amount=58.25) would return
          list of transactions that are income transactions and have amount of 58.25.
+        A transaction is returned once, and only if it matches every keyword argument.
 
         :param kwargs: keyword arguments (key=value) to get transactions based on
         :return: [Transaction] - list of Transactions, empty if no matching transactions found
         :rtype: list[Transaction]
         """
-        trans_to_return = []  # empty list to hold transactions to return
-        valid_keys = ['transaction_type', 'date', 'amount', 'vendor', 'category', 'note']
         # validate passed in keyword arguments
         for key in kwargs.keys():
-            if key not in valid_keys:
-                raise ValueError(f"Invalid key ({key}) provided. Valid keys are {valid_keys}.")
-        for trans in self.expense_transactions:  # search through expense transactions
-            for attribute, value in kwargs.items():
-                if trans.get(attribute) == value:
-                    trans_to_return.append(trans)
-        for trans in self.income_transactions:  # search through income transactions
-            for attribute, value in kwargs.items():
-                if trans.get(attribute) == value:
-                    trans_to_return.append(trans)
-        return trans_to_return
+            if key not in self.query_keys:
+                raise ValueError(f"Invalid key ({key}) provided. Valid keys are {self.query_keys}.")
+        if 'amount' in kwargs:
+            kwargs['amount_cents'] = to_cents(kwargs.pop('amount'))  # compare amounts exactly, in cents
+        return self.transaction_index.query(**kwargs)
 
+    def query_range(self, field: str, lo: str | float | datetime.date = None, hi: str | float | datetime.date = None,
+                    **kwargs):
+        """
+        Method to get transactions whose date or amount falls between lo and hi (inclusive), sorted by that field
+        Example: budget.query_range("date", "01/10/23", "31/10/23", transaction_type="expense") would return
+         October's expense transactions in date order.
+
+        :param field: field to query on, either 'date' or 'amount'
+        :type field: str
+        :param lo: lowest value to include, None for no lower bound. Dates may be DD/MM/YY strings or datetime.date
+        :type lo: str | float | datetime.date
+        :param hi: highest value to include, None for no upper bound. Dates may be DD/MM/YY strings or datetime.date
+        :type hi: str | float | datetime.date
+        :param kwargs: keyword arguments (key=value) that returned transactions must also match, as in get_transactions
+        :return: [Transaction] - list of Transactions sorted by field, empty if no matching transactions found
+        :rtype: list[Transaction]
+        """
+        if field not in ('date', 'amount'):
+            raise ValueError(f"Invalid field ({field}) provided. Valid fields are ['date', 'amount'].")
+        if field == 'date':
+            lo = None if lo is None else to_ordinal(lo)
+            hi = None if hi is None else to_ordinal(hi)
+        else:
+            lo = to_cents(lo)
+            hi = to_cents(hi)
+        for key in kwargs.keys():
+            if key not in self.query_keys:
+                raise ValueError(f"Invalid key ({key}) provided. Valid keys are {self.query_keys}.")
+        if 'amount' in kwargs:
+            kwargs['amount_cents'] = to_cents(kwargs.pop('amount'))
+        return self.transaction_index.query_range(field, lo, hi, **kwargs)
+
+    def find_duplicates(self, transaction: Transaction, window_days: int = 0):
+        """
+        Method to get transactions in the budget that look like duplicates of a transaction, such as the same
+        transaction imported from two overlapping statements. Each check is a few hash lookups
+
+        :param transaction: transaction to check, which need not be in the budget
+        :type transaction: Transaction
+        :param window_days: 0 to match date, amount, vendor and type exactly. Otherwise transactions of the same
+         amount and type dated up to window_days either side also match, whatever their vendor
+        :type window_days: int
+        :return: [Transaction] - matching transactions, exact matches first, not including transaction itself
+        :rtype: list[Transaction]
+        """
+        if window_days < 0:
+            raise ValueError("window_days must not be negative")
+        return self.transaction_index.duplicates.find(transaction, window_days)
+
+    def aggregate(self, by: str | None = 'category', period: str | None = 'month', measure: str = 'expense',
+                  start: str | int | datetime.date = None, end: str | int | datetime.date = None):
+        """
+        Method to get totals per period and/or per category, vendor or goal, from rollups kept up to date as
+        transactions change, so no transactions are scanned
+        Example: budget.aggregate("category", "month", start="01/01/23", end="31/12/23") would return 2023's
+         expenses keyed by (month, category), e.g. {('2023-10', 'Groceries'): 412.5, ...}
+
+        :param by: 'category', 'vendor' or 'expense_goal' to group by, None for no grouping. Goals are lowercase
+        :type by: str | None
+        :param period: 'month', 'quarter' or 'year' to group by, None for no grouping
+        :type period: str | None
+        :param measure: 'expense', 'income' or 'net' (income less expenses) for dollars, 'count' for transactions
+        :type measure: str
+        :param start: date in the first month to include, None for no lower bound
+        :type start: str | int | datetime.date
+        :param end: date in the last month to include, None for no upper bound
+        :type end: str | int | datetime.date
+        :return: dict - totals keyed by (period, value), period or value depending on the grouping
+        :rtype: dict
+        """
+        start_month = None if start is None else ordinal_to_month(to_ordinal(start))
+        end_month = None if end is None else ordinal_to_month(to_ordinal(end))
+        return self.rollups.aggregate(by, period, measure, start_month, end_month)
+
+    #
+    # save transaction updates (requirement 1.3.3)
+    #
+    @guarded
+    def update_transaction(self, transaction: Transaction, attribute: str, value: str | float):
+        """
+        Method to update an attribute of a transaction, keeping budget totals, goals and indexes up to date.
+        Transactions in the budget should be changed through this method rather than Transaction.update_attribute
+
+        :param transaction: transaction to update
+        :type transaction: Transaction
+        :param attribute: name of attribute to update
+        :type attribute: str
+        :param value: Value to set for attribute
+        :type value: str | float
+        :return: bool - True if transaction was in the budget, False if only the transaction itself was updated
+        :rtype: bool
+        """
+        stored = self.get_transaction(transaction.transaction_id)
+        if stored is None:
+            transaction.update_attribute(attribute, value)
+            return False
+        transaction = stored
+
+        # take the transaction out of everything built from the old value, then put it back with the new one.
+        # Type and amount feed the totals and the linked goal's amount as well as the indexes, and the date decides
+        # whether the transaction counts in the goal's window
+        financial = attribute in ('transaction_type', 'amount')
+        relink = financial or attribute in ('expense_goal', 'date')
+        if financial:
+            self.remove_from_totals(transaction)
+        self.transaction_index.remove(transaction)
+        self.rollups.remove(transaction)
+        if relink and transaction.expense_goal.lower() in self.expense_goals:
+            self.unlink_transaction_from_expense_goal(transaction, transaction.expense_goal)
+        transaction.update_attribute(attribute, value)
+        if financial:
+            self.add_to_totals(transaction)
+        self.transaction_index.add(transaction)
+        self.rollups.add(transaction)
+        if relink and transaction.expense_goal != "N/A":
+            self.link_transaction_to_expense_goal(transaction, transaction.expense_goal)
+        self.notify('update_transaction', transaction)
+        return True
+
+    @guarded
     def add_category(self, category: str):
         """
         method to add a category to the budget
@@ -179,7 +504,9 @@ class Budget:
         if not category or not isinstance(category, str):
             raise ValueError("Category must be non-empty string")
         self.categories.append(category)
+        self.notify('categories', self.categories)
 
+    @guarded
     def remove_category(self, category: str):
         """
         method to remove a category from the budget
@@ -194,10 +521,82 @@ class Budget:
             self.categories.remove(category)
         except ValueError:
             print(f"Could not delete Category {category}. It was not found in the budget")
+            return
+        self.notify('categories', self.categories)
+
+    @guarded
+    def set_categories(self, categories: list[str]):
+        """
+        method to replace the categories of the budget, as a load does
+
+        :param categories: names of the categories
+        :type categories: list[str]
+        :return: None
+        """
+        self.categories = list(categories)
+        self.notify('categories', self.categories)
+
+    def add_category_rule(self, kind: str, pattern: str, category: str):
+        """
+        Method to add a vendor to category rule (see Categorizer.add_rule), adding the category to the budget if it
+        is new
+
+        :param kind: kind of rule, 'exact', 'prefix', 'keyword' or 'regex'
+        :type kind: str
+        :param pattern: vendor, prefix, keyword or regular expression the rule matches
+        :type pattern: str
+        :param category: category of transactions the rule matches
+        :type category: str
+        :return: None
+        """
+        self.category_rules.add_rule(kind, pattern, category)
+        if category not in self.categories:
+            self.add_category(category)
+
+    def load_category_rules(self, filename: str):
+        """
+        Method to add the vendor to category rules in a CSV file (see Categorizer.load_rules), adding any new
+        categories to the budget
+
+        :param filename: filename, including path, of CSV file
+        :type filename: str
+        :return: int - number of rules added
+        :rtype: int
+        """
+        count = self.category_rules.load_rules(filename)
+        for category in sorted(self.category_rules.categories() - set(self.categories)):
+            self.add_category(category)
+        return count
+
+    @guarded
+    def categorize_transactions(self, transactions: Iterable[Transaction] = None, overwrite: bool = False):
+        """
+        Method to set the category of transactions in the budget from the category rules, in one pass
+
+        :param transactions: transactions to categorize, None for every transaction in the budget
+        :type transactions: Iterable[Transaction]
+        :param overwrite: True to replace every category a rule matches, False to only fill in transactions with no
+         category or "Other"
+        :type overwrite: bool
+        :return: int - number of transactions whose category changed
+        :rtype: int
+        """
+        if transactions is None:
+            transactions = self.all_transactions()
+        changed = 0
+        for transaction in transactions:
+            if overwrite or transaction.category in UNCATEGORIZED:
+                category = self.category_rules.categorize(transaction.vendor)
+                if category is not None and category != transaction.category:
+                    # through update_transaction so the category index and listeners hear about it
+                    self.update_transaction(transaction, 'category', category)
+                    changed += 1
+        return changed
 
     #
     # add expense goal (Requirement 1.2.11)
     #
+    @guarded
     def add_expense_goal(self, goal: Goal):
         """
         method to add an expanse goal to the budget
@@ -213,6 +612,7 @@ class Budget:
         if goal.name.lower() in self.expense_goals:
             raise ValueError(f"Goal with name {goal.name} already exists in budget")
         self.expense_goals[goal.name.lower()] = goal
+        self.notify('add_goal', goal)
 
     #
     # save transaction updates (requirement 1.3.3)
@@ -234,41 +634,133 @@ class Budget:
     #
     # remove transaction (requirement 1.1.9)
     #
+    @guarded
     def delete_expense_goal(self, goal_name: str):
         """
-        Method to delete goal with specified name from Budget
+        Method to delete goal with specified name from Budget. The goal's linked transactions (Goal.transactions, the
+        goal's reverse index) are set to "N/A" first, touching only those transactions
 
         :param goal_name: name of goal to delete from budget
         :type goal_name: str
-        :return: None
+        :return: list[Transaction] - transactions that were linked to the goal
+        :rtype: list[Transaction]
         """
-        try:
-            del self.expense_goals[goal_name.lower()]
-        except KeyError:
+        goal = self.expense_goals.get(goal_name.lower())
+        if goal is None:
             raise ValueError(f"Could not delete goal {goal_name}. It was not found in the budget")
+        linked = list(goal.transactions.values())
+        for transaction in linked:
+            self.update_transaction(transaction, 'expense_goal', "N/A")
+        del self.expense_goals[goal_name.lower()]
+        self.notify('delete_goal', goal)
+        return linked
+
+    #
+    # save goal changes (Requirement 1.2.14)
+    #
+    @guarded
+    def rename_expense_goal(self, goal_name: str, new_name: str):
+        """
+        Method to rename a goal. The goal keeps its amounts and linked transactions, and only the linked transactions
+        (Goal.transactions, the goal's reverse index) have their expense_goal changed to the new name
+
+        :param goal_name: name of goal to rename
+        :type goal_name: str
+        :param new_name: new name of goal
+        :type new_name: str
+        :return: Goal - goal renamed
+        :rtype: Goal
+        """
+        if not new_name or not isinstance(new_name, str):
+            raise ValueError("Goal name must be non-empty string")
+        goal = self.get_expense_goal(goal_name)
+        if new_name.lower() != goal.name.lower() and new_name.lower() in self.expense_goals:
+            raise ValueError(f"Goal with name {new_name} already exists in budget")
+        old_name = goal.name
+        del self.expense_goals[old_name.lower()]
+        goal.name = new_name
+        self.expense_goals[new_name.lower()] = goal
+        self.notify('rename_goal', (old_name, goal))
+
+        # the goal is the same object, so the transactions stay linked and its amounts stand. Only the indexes and
+        # rollups built from the old name change
+        new_name = intern_string(new_name)
+        for transaction in goal.transactions.values():
+            self.transaction_index.remove(transaction)
+            self.rollups.remove(transaction)
+            transaction.expense_goal = new_name
+            self.transaction_index.add(transaction)
+            self.rollups.add(transaction)
+            self.notify('update_transaction', transaction)
+        return goal
+
+    #
+    # save goal changes (Requirement 1.2.14)
+    #
+    @guarded
+    def update_expense_goal(self, goal_name: str, attribute: str, value: str | float):
+        """
+        Method to update an attribute of a goal in the budget. Goals in the budget should be changed through this
+        method rather than Goal.update_attribute, so listeners hear about the change
+
+        :param goal_name: name of goal to update
+        :type goal_name: str
+        :param attribute: name of attribute to update. 'name' renames the goal (see rename_expense_goal)
+        :type attribute: str
+        :param value: Value to set for attribute
+        :type value: str | float
+        :return: Goal - goal updated
+        :rtype: Goal
+        """
+        if attribute == 'name':
+            return self.rename_expense_goal(goal_name, value)
+        goal = self.get_expense_goal(goal_name)
+        goal.update_attribute(attribute, value)
+        self.notify('update_goal', goal)
+        return goal
 
     #
     # save budget (Requirement 1.3.6)
     #
-    def save_budget(self, filename: str):
+    def save_budget(self, filename: str, progress: Callable[[int, int], None] = None):
         """
-        Method to save all budget data to specified file
+        Method to save all budget data to specified file. A full save replaces any journal kept for the file.
+        The budget is only locked while its snapshot (see to_dict) is taken, writing the file runs unlocked
 
         :param filename: filename, including path, for save file
         :type filename: str
+        :param progress: function called with (items written, total items) as the file is written. An exception
+            raised by it stops the save and leaves any previous file in place
+        :type progress: Callable[[int, int], None]
         :return: None
         """
+        write_json_to_file(self.to_dict(), filename, progress)
+        if os.path.exists(journal_filename(filename)):
+            os.remove(journal_filename(filename))
+
+    #
+    # save budget (Requirement 1.3.6)
+    #
+    @guarded
+    def to_dict(self):
+        """
+        Method to encode budget as python dictionary
+
+        :return: dictionary with all budget data
+        :rtype: dict
+        """
+        # categories and goals are written ahead of the transactions, so a streaming load has every goal before the
+        # transactions linked to it
         budget_dict = {'total_expenses': self.total_expenses, 'total_income': self.total_income,
-                       'balance': self.balance, 'expense_transactions': [], 'income_transactions': [],
-                       'goals': []}
-        for trans in self.expense_transactions:
-            budget_dict['expense_transactions'].append(trans.to_dict())
-        for trans in self.income_transactions:
-            budget_dict['income_transactions'].append(trans.to_dict())
-        budget_dict['categories'] = self.categories
+                       'balance': self.balance, 'categories': list(self.categories), 'goals': [],
+                       'expense_transactions': [], 'income_transactions': []}
         for goal in self.expense_goals.values():
             budget_dict['goals'].append(goal.to_dict())
-        write_json_to_file(budget_dict, filename)
+        for trans in self.expense_transactions.values():
+            budget_dict['expense_transactions'].append(trans.to_dict())
+        for trans in self.income_transactions.values():
+            budget_dict['income_transactions'].append(trans.to_dict())
+        return budget_dict
 
     #
     # load budget (Requirement 1.3.7)
@@ -281,27 +773,131 @@ class Budget:
         :type filename: str
         :return: None
         """
-        budget_dict = read_json_file(filename)
-        self.categories = budget_dict['categories']
+        self.update_from_dict(read_json_file(filename))
+
+    #
+    # load budget (Requirement 1.3.7)
+    #
+    def update_from_dict(self, budget_dict: dict):
+        """
+        Method to add the categories, goals and transactions of a budget dictionary (see to_dict) to the budget
+
+        :param budget_dict: dictionary with budget data
+        :type budget_dict: dict
+        :return: None
+        """
+        self.set_categories(budget_dict['categories'])
         for goal_dict in budget_dict['goals']:
-            g = Goal()
-            # g.update_from_dict(goal_dict)
-            g.name = goal_dict['name']
-            g.start_date = goal_dict['start_date']
-            g.end_date = goal_dict['end_date']
-            g.note = goal_dict['note']
-            g.target_amount = goal_dict['target_amount']
-            g.date_spent = goal_dict['date_spent']
-            g.category = goal_dict['category']
-            self.add_expense_goal(g)
-        for trans_dict in budget_dict['expense_transactions']:
-            t = Transaction()
-            t.update_from_dict(trans_dict)
-            self.add_transaction(t)
-        for trans_dict in budget_dict['income_transactions']:
-            t = Transaction()
-            t.update_from_dict(trans_dict)
-            self.add_transaction(t)
+            self.add_expense_goal(load_goal(goal_dict))
+        with paused_gc():
+            transactions = [self.load_transaction(trans_dict) for trans_dict in
+                            budget_dict['expense_transactions'] + budget_dict['income_transactions']]
+        self.add_transactions(transactions)
+
+    #
+    # load budget (Requirement 1.3.7)
+    #
+    def load_transaction(self, trans_dict: dict[str, str | float]):
+        """
+        Method to create a transaction from its saved dictionary. The transaction keeps its saved id unless a
+        different transaction in the budget already has it, which happens when a save is loaded into a budget
+        that is not empty
+
+        :param trans_dict: saved transaction
+        :type trans_dict: dict[str, str | float]
+        :return: Transaction - transaction, not yet added to the budget
+        :rtype: Transaction
+        """
+        t = Transaction()
+        t.update_from_dict(trans_dict)
+        if t in self.transaction_index:
+            t.transaction_id = next(transaction_ids)
+        return t
+
+    #
+    # load budget (Requirement 1.3.7)
+    #
+    def read_budget_file(self, filename: str, progress: Callable[[int, int], None] = None):
+        """
+        Method to read a save file into goals and transactions without adding them to the budget, so the file can
+        be read on another thread while the budget is in use. add_budget_data adds what was read
+
+        :param filename: filename, including path, for save file
+        :type filename: str
+        :param progress: function called with (bytes read, total bytes) as the file is read. An exception raised by
+            it stops the read
+        :type progress: Callable[[int, int], None]
+        :return: dict - 'categories', 'goals' and 'transactions' read from the file
+        :rtype: dict[str, list]
+        """
+        categories = []
+        goals = []
+        transactions = []
+        with paused_gc():
+            for key, value in JsonStreamReader(filename, progress=progress):
+                if key in ('expense_transactions', 'income_transactions'):
+                    transactions.append(self.load_transaction(value))
+                elif key == 'goals':
+                    goals.append(load_goal(value))
+                elif key == 'categories':
+                    categories.append(value)
+        return {'categories': categories, 'goals': goals, 'transactions': transactions}
+
+    @guarded
+    def add_budget_data(self, budget_data: dict[str, list]):
+        """
+        Method to add the categories, goals and transactions read by read_budget_file to the budget
+
+        :param budget_data: data returned by read_budget_file
+        :type budget_data: dict[str, list]
+        :return: None
+        """
+        self.set_categories(budget_data['categories'])
+        for goal in budget_data['goals']:
+            self.add_expense_goal(goal)
+        transactions = budget_data['transactions']
+        # transactions added to the budget since the file was read may have taken a saved id
+        for t in transactions:
+            if t in self.transaction_index:
+                t.transaction_id = next(transaction_ids)
+        self.add_transactions(transactions)
+
+    #
+    # load budget (Requirement 1.3.7)
+    #
+    def load_budget_stream(self, filename: str, batch_size: int = 10000,
+                           progress: Callable[[int, int], None] = None):
+        """
+        Method to load all budget data from specified file without reading the whole file into memory.
+        Goals and transactions are added to the budget as they are parsed, in batches of batch_size transactions
+
+        :param filename: filename, including path, for save file
+        :type filename: str
+        :param batch_size: number of transactions to parse before adding them to the budget
+        :type batch_size: int
+        :param progress: function called with (bytes read, total bytes) as the file is read
+        :type progress: Callable[[int, int], None]
+        :return: None
+        """
+        categories = []
+        batch = []
+        waiting_for_goal = []  # older saves list goals after transactions, these wait until every goal is loaded
+        for key, value in JsonStreamReader(filename, progress=progress):
+            if key in ('expense_transactions', 'income_transactions'):
+                t = self.load_transaction(value)
+                if t.expense_goal != "N/A" and t.expense_goal.lower() not in self.expense_goals:
+                    waiting_for_goal.append(t)
+                    continue
+                batch.append(t)
+                if len(batch) >= batch_size:
+                    self.add_transactions(batch)
+                    batch = []
+            elif key == 'goals':
+                self.add_expense_goal(load_goal(value))
+            elif key == 'categories':
+                categories.append(value)
+        self.add_transactions(batch + waiting_for_goal)
+        self.set_categories(categories)
 
     #
     # delete budget (Requirement 1.3.8)
@@ -316,6 +912,8 @@ class Budget:
         """
         if os.path.exists(filename):
             os.remove(filename)
+        if os.path.exists(journal_filename(filename)):
+            os.remove(journal_filename(filename))
 
     #
     # create transaction with goal (requirement 1.3.9)
@@ -356,44 +954,254 @@ class Budget:
     #
     # export transactions (Requirement 1.3.5)
     #
-    def export_transactions(self, filename: str):
+    def export_transactions(self, filename: str, progress: Callable[[int, int], None] = None):
         """
-        Method to write income and expense transactions to Excel file
+        Method to write income and expense transactions to Excel file. Rows are streamed into a write-only workbook,
+        so memory use does not grow with the number of transactions
 
         :param filename: filename, including path, for save file
         :type filename: str
+        :param progress: function called with (transactions written, total transactions). An exception raised by it
+            stops the export
+        :type progress: Callable[[int, int], None]
         :return: None
         """
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        transaction_objs = self.expense_transactions + self.income_transactions
-        transaction_dicts = []
-        for trans in transaction_objs:
-            transaction_dicts.append(trans.to_dict())
-        headers = list(transaction_dicts[0].keys())
-        for col_num, header in enumerate(headers, 1):
-            sheet.cell(row=1, column=col_num, value=header)
-        for row_num, row_data in enumerate(transaction_dicts, 2):
-            for col_num, key in enumerate(headers, 1):
-                sheet.cell(row=row_num, column=col_num, value=row_data[key])
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(self.export_headers)
+        for row in self.export_rows(report_progress(self.transaction_snapshot(), progress)):
+            sheet.append(row)
         workbook.save(filename)
 
+    #
+    # export transactions (Requirement 1.3.5)
+    #
+    def export_rows(self, transactions: Iterable[Transaction] = None):
+        """
+        Generator of the exported transactions, expenses then income, as rows of values in export_headers order
+
+        :param transactions: transactions to export, all of the budget's transactions if None
+        :type transactions: Iterable[Transaction]
+        :return: iterator of rows
+        :rtype: Iterator[tuple]
+        """
+        if transactions is None:
+            transactions = self.all_transactions()
+        for trans in transactions:
+            yield (trans.transaction_type, trans.date, trans.amount, trans.vendor, trans.category, trans.note,
+                   trans.expense_goal)
+
+    #
+    # export transactions (Requirement 1.3.5)
+    #
+    def export_csv(self, filename: str, progress: Callable[[int, int], None] = None):
+        """
+        Method to write income and expense transactions to CSV file
+
+        :param filename: filename, including path, for CSV file
+        :type filename: str
+        :param progress: function called with (transactions written, total transactions). An exception raised by it
+            stops the export
+        :type progress: Callable[[int, int], None]
+        :return: int - number of transactions written
+        :rtype: int
+        """
+        return write_csv(report_progress(self.transaction_snapshot(), progress), filename)
+
+    #
+    # export transactions (Requirement 1.3.5)
+    #
+    def export_columnar(self, filename: str, progress: Callable[[int, int], None] = None):
+        """
+        Method to write income and expense transactions to a columnar binary file (see export.write_columnar), which
+        analysis tools can read with export.read_columnar
+
+        :param filename: filename, including path, for columnar file
+        :type filename: str
+        :param progress: function called with (transactions written, total transactions). An exception raised by it
+            stops the export
+        :type progress: Callable[[int, int], None]
+        :return: int - number of transactions written
+        :rtype: int
+        """
+        return write_columnar(report_progress(self.transaction_snapshot(), progress), filename)
+
+    @guarded
+    def transaction_snapshot(self):
+        """
+        Method to get the budget's transactions as they are now, expenses then income. Exports work from the
+        snapshot, so transactions added or deleted while an export runs on another thread don't disturb it
+
+        :return: list of transactions
+        :rtype: list[Transaction]
+        """
+        return list(self.all_transactions())
+
+    def all_transactions(self) -> Iterator[Transaction]:
+        """
+        Method to iterate over every transaction in the budget, expenses then income
+
+        :return: iterator of transactions
+        :rtype: Iterator[Transaction]
+        """
+        return itertools.chain(self.expense_transactions.values(), self.income_transactions.values())
+
+
+#
+# load budget (Requirement 1.3.7)
+#
+def load_goal(goal_dict: dict[str, float | str]):
+    """
+    Function to create a goal from its saved dictionary. Amounts towards the goal are not read, they are rebuilt
+    as the goal's transactions are added to the budget
+
+    :param goal_dict: saved goal
+    :type goal_dict: dict[str, float | str]
+    :return: Goal - goal with no transactions applied
+    :rtype: Goal
+    """
+    g = Goal()
+    g.name = goal_dict['name']
+    g.start_date = goal_dict['start_date']
+    g.end_date = goal_dict['end_date']
+    g.note = goal_dict['note']
+    g.target_amount = goal_dict['target_amount']
+    g.date_spent = goal_dict['date_spent']
+    g.category = goal_dict['category']
+    g.set_startBalance()
+    return g
+
+
+@contextmanager
+def paused_gc():
+    """
+    Context manager to pause the cyclic garbage collector. Bulk loads allocate millions of small objects, none of
+    them garbage, and collection passes over them can cost more than the load itself
+
+    :return: None
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
 
 #
 # save budget (Requirement 1.3.6)
 #
-def write_json_to_file(json_data: dict | list | str | int, filename: str):
+def write_json_to_file(json_data: dict | list | str | int, filename: str,
+                       progress: Callable[[int, int], None] = None):
     """
-    Function to write json encode-able data to specified file
+    Function to write json encode-able data to specified file. The data is written to a temporary file which then
+    replaces the file, so a crash or an exception part way through leaves the previous file intact
 
     :param json_data: data to write to file
     :type json_data: str|dict|list|int
     :param filename: filename, including path, for save file
     :type filename: str
+    :param progress: function called with (items written, total items), counting the elements of the lists that
+        are members of json_data. Needs json_data to be a dict
+    :type progress: Callable[[int, int], None]
+    :return: None
+    """
+    temp_filename = filename + '.tmp'
+    try:
+        with open(temp_filename, 'w') as json_file:
+            if progress is None:
+                json.dump(json_data, json_file)
+            else:
+                write_json_members(json_data, json_file, progress)
+            json_file.flush()
+            os.fsync(json_file.fileno())
+        os.replace(temp_filename, filename)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+
+
+#
+# save budget (Requirement 1.3.6)
+#
+def write_json_members(json_data: dict, json_file, progress: Callable[[int, int], None]):
+    """
+    Function to write a dict as JSON a list element at a time, reporting progress as it goes. The text written is
+    the same as json.dump writes
+
+    :param json_data: data to write
+    :type json_data: dict
+    :param json_file: open text file to write to
+    :param progress: function called with (items written, total items)
+    :type progress: Callable[[int, int], None]
     :return: None
     """
-    with open(filename, 'w') as json_file:
-        json.dump(json_data, json_file)
+    total = sum(len(value) for value in json_data.values() if isinstance(value, list))
+    written = 0
+    progress(written, total)
+    json_file.write('{')
+    for member, (key, value) in enumerate(json_data.items()):
+        if member:
+            json_file.write(', ')
+        json_file.write(json.dumps(str(key)) + ': ')
+        if not isinstance(value, list):
+            json_file.write(json.dumps(value))
+            continue
+        json_file.write('[')
+        for index, element in enumerate(value):
+            if index:
+                json_file.write(', ')
+            json_file.write(json.dumps(element))
+            written += 1
+            if written % PROGRESS_INTERVAL == 0:
+                progress(written, total)
+        json_file.write(']')
+    json_file.write('}')
+    progress(written, total)
+
+
+#
+# export transactions (Requirement 1.3.5)
+#
+def report_progress(items: list, progress: Callable[[int, int], None] = None):
+    """
+    Generator passing on the items of a list, calling progress with (items passed on, total items) every
+    PROGRESS_INTERVAL items and at the end
+
+    :param items: items to pass on
+    :type items: list
+    :param progress: function to call, None to pass the items on without reporting
+    :type progress: Callable[[int, int], None]
+    :return: iterator of the items
+    :rtype: Iterator
+    """
+    if progress is None:
+        yield from items
+        return
+    total = len(items)
+    progress(0, total)
+    for index, item in enumerate(items, 1):
+        yield item
+        if index % PROGRESS_INTERVAL == 0:
+            progress(index, total)
+    progress(total, total)
+
+
+#
+# save budget (Requirement 1.3.6)
+#
+def journal_filename(filename: str):
+    """
+    Function to get the filename of the journal kept next to a budget save file (see journal.BudgetJournal)
+
+    :param filename: filename, including path, of save file
+    :type filename: str
+    :return: str - filename of journal
+    :rtype: str
+    """
+    return filename + '.journal'
 
 
 #
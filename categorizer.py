@@ -0,0 +1,255 @@
+"""
+Module containing the rules engine that picks a category for a transaction from its vendor
+"""
+
+
+import csv
+import re
+from collections.abc import Iterable
+from transaction import Transaction, intern_string
+
+
+# categories a transaction counts as not yet categorized under. Imports default to "Other"
+UNCATEGORIZED: tuple = (None, '', 'Other')
+
+
+class Categorizer:
+    """
+    Vendor to category rules. Vendors are compared case-insensitively, and when several rules match a vendor:
+     exact rules ('exact', the whole vendor) win over
+     prefix rules ('prefix', longest prefix wins) which win over
+     keyword and regex rules ('keyword' a plain substring, 'regex' a regular expression), where the match starting
+     earliest in the vendor wins, ties going to the rule added first.
+
+    Exact rules are a dict and prefix rules a trie. Keywords are compiled into one combined pattern and regex rules
+    into another (the re module only skips ahead quickly through an alternation whose branches look alike, so
+    mixing the two is far slower), so a vendor is checked against every rule in two searches. The keyword behind a
+    match is found with a dict lookup, and the regex rule by checking the regex rules at the match position.
+    Results are memoized per vendor, so a ledger of millions of rows costs one rule check per distinct vendor.
+
+    Regex rules with capturing groups (which a combined pattern would renumber, breaking backreferences, and which
+    make it much slower) or global inline flags such as (?x) are not combined, and are each searched on their own.
+    """
+
+    rule_kinds: tuple[str, ...] = ('exact', 'prefix', 'keyword', 'regex')
+
+    def __init__(self):
+        """
+        Init
+        """
+        self.exact: dict[str, str] = {}  # lowercase vendor -> category
+        self.prefixes: dict = {}  # trie of lowercase prefixes, a node's None key holds the category ending there
+        self.prefix_count: int = 0
+        self.rule_count: int = 0  # keyword and regex rules added, giving each its position in rule order
+        # lowercase keyword -> (position in rule order, category), the first rule for a keyword wins
+        self.keywords: dict[str, tuple[int, str]] = {}
+        self.regexes: list[tuple[int, re.Pattern, str]] = []  # (position in rule order, compiled rule, category)
+        self.combined_regexes: list[tuple[int, re.Pattern, str]] = []  # regex rules in regex_pattern
+        self.standalone_regexes: list[tuple[int, re.Pattern, str]] = []  # regex rules searched one at a time
+        self.keyword_pattern: re.Pattern | None = None  # every keyword, compiled when first needed
+        self.regex_pattern: re.Pattern | None = None  # every combined regex rule, compiled when first needed
+        self.cache: dict[str | None, str | None] = {}  # vendor -> category found for it
+
+    def __len__(self):
+        return len(self.exact) + self.prefix_count + len(self.keywords) + len(self.regexes)
+
+    def add_rule(self, kind: str, pattern: str, category: str):
+        """
+        Method to add a rule
+
+        :param kind: kind of rule, one of rule_kinds
+        :type kind: str
+        :param pattern: vendor, prefix, keyword or regular expression the rule matches
+        :type pattern: str
+        :param category: category of transactions the rule matches
+        :type category: str
+        :return: None
+        """
+        if kind not in self.rule_kinds:
+            raise ValueError(f"Invalid rule kind ({kind}). Valid kinds are {list(self.rule_kinds)}.")
+        if not pattern or not isinstance(pattern, str):
+            raise ValueError("Rule pattern must be non-empty string")
+        if not category or not isinstance(category, str):
+            raise ValueError("Category must be non-empty string")
+        category = intern_string(category)
+        key = pattern.strip().lower()
+        if kind == 'exact':
+            self.exact.setdefault(key, category)
+        elif kind == 'prefix':
+            node = self.prefixes
+            for char in key:
+                node = node.setdefault(char, {})
+            if None not in node:
+                node[None] = category
+                self.prefix_count += 1
+        elif kind == 'keyword':
+            self.keywords.setdefault(key, (self.rule_count, category))
+            self.rule_count += 1
+            self.keyword_pattern = None
+        else:
+            try:
+                rule = (self.rule_count, re.compile(pattern, re.IGNORECASE), category)
+            except re.error as error:
+                raise ValueError(f"Invalid regex rule ({pattern}): {error}")
+            self.regexes.append(rule)
+            if self.combinable(pattern, rule[1]):
+                self.combined_regexes.append(rule)
+            else:
+                self.standalone_regexes.append(rule)
+            self.rule_count += 1
+            self.regex_pattern = None
+        self.cache.clear()
+
+    @staticmethod
+    def combinable(pattern: str, regex: re.Pattern):
+        """
+        Function to check if a regex rule can go in the combined pattern. Rules with capturing groups, whose numbers
+        and names would clash with other rules', or with global inline flags, which must start a pattern, can't
+
+        :param pattern: regular expression of the rule
+        :type pattern: str
+        :param regex: the rule compiled on its own
+        :type regex: re.Pattern
+        :return: bool - True if the rule can be combined
+        :rtype: bool
+        """
+        if regex.groups:
+            return False
+        try:
+            re.compile(f'(?:{pattern})', re.IGNORECASE)
+        except re.error:
+            return False
+        return True
+
+    def add_rules(self, rules: Iterable[tuple[str, str, str]]):
+        """
+        Method to add many rules
+
+        :param rules: (kind, pattern, category) of each rule
+        :type rules: Iterable[tuple[str, str, str]]
+        :return: None
+        """
+        for kind, pattern, category in rules:
+            self.add_rule(kind, pattern, category)
+
+    def load_rules(self, filename: str):
+        """
+        Method to add the rules in a CSV file with kind, pattern and category columns and a header row
+
+        :param filename: filename, including path, of CSV file
+        :type filename: str
+        :return: int - number of rules added
+        :rtype: int
+        """
+        with open(filename, newline='', encoding='utf-8-sig') as csv_file:
+            rules = [(row['kind'].strip().lower(), row['pattern'], row['category'].strip())
+                     for row in csv.DictReader(csv_file)]
+        self.add_rules(rules)
+        return len(rules)
+
+    def categories(self):
+        """
+        Method to get every category the rules can give
+
+        :return: set[str] - categories
+        :rtype: set[str]
+        """
+        categories = set(self.exact.values())
+        categories.update(category for _, category in self.keywords.values())
+        categories.update(category for _, _, category in self.regexes)
+        nodes = [self.prefixes]
+        while nodes:
+            node = nodes.pop()
+            for char, child in node.items():
+                if char is None:
+                    categories.add(child)
+                else:
+                    nodes.append(child)
+        return categories
+
+    def categorize(self, vendor: str | None):
+        """
+        Method to get the category the rules give a vendor
+
+        :param vendor: vendor of a transaction
+        :type vendor: str | None
+        :return: str - category, None if no rule matches
+        :rtype: str | None
+        """
+        try:
+            return self.cache[vendor]
+        except KeyError:
+            pass
+        category = self.find_category((vendor or '').strip().lower())
+        self.cache[vendor] = category
+        return category
+
+    def find_category(self, vendor: str):
+        """
+        Method to check the rules against a vendor, without the cache
+
+        :param vendor: lowercase vendor
+        :type vendor: str
+        :return: str - category, None if no rule matches
+        :rtype: str | None
+        """
+        if vendor in self.exact:
+            return self.exact[vendor]
+
+        category = None
+        node = self.prefixes
+        for char in vendor:
+            node = node.get(char)
+            if node is None:
+                break
+            category = node.get(None, category)
+        if category is not None:
+            return category
+
+        # each combined pattern finds its earliest match, ties going to the first rule. The earlier of the two wins
+        candidates = []
+        if self.keywords:
+            if self.keyword_pattern is None:
+                self.keyword_pattern = re.compile('|'.join(map(re.escape, self.keywords)))
+            match = self.keyword_pattern.search(vendor)
+            if match is not None:
+                position, category = self.keywords[match.group()]
+                candidates.append((match.start(), position, category))
+        if self.combined_regexes:
+            if self.regex_pattern is None:
+                self.regex_pattern = re.compile(
+                    '|'.join(f'(?:{regex.pattern})' for _, regex, _ in self.combined_regexes), re.IGNORECASE)
+            match = self.regex_pattern.search(vendor)
+            if match is not None:
+                for position, regex, category in self.combined_regexes:
+                    if regex.match(vendor, match.start()) is not None:
+                        candidates.append((match.start(), position, category))
+                        break
+        for position, regex, category in self.standalone_regexes:
+            match = regex.search(vendor)
+            if match is not None:
+                candidates.append((match.start(), position, category))
+        return min(candidates)[2] if candidates else None
+
+    def categorize_transactions(self, transactions: Iterable[Transaction], overwrite: bool = False):
+        """
+        Method to set the category of transactions that are not yet in a budget from the rules, in one pass.
+        Transactions already in a budget should go through Budget.categorize_transactions instead
+
+        :param transactions: transactions to categorize
+        :type transactions: Iterable[Transaction]
+        :param overwrite: True to replace every category a rule matches, False to only fill in transactions with no
+         category or "Other"
+        :type overwrite: bool
+        :return: int - number of transactions whose category changed
+        :rtype: int
+        """
+        changed = 0
+        categorize = self.categorize
+        for transaction in transactions:
+            if overwrite or transaction.category in UNCATEGORIZED:
+                category = categorize(transaction.vendor)
+                if category is not None and category != transaction.category:
+                    transaction.category = category
+                    changed += 1
+        return changed
@@ -0,0 +1,83 @@
+"""
+Module containing helpers for the DD/MM/YY dates used throughout the budget
+"""
+
+
+import datetime
+from functools import lru_cache
+
+
+# formats accepted for dates. The GUI enforces DD/MM/YY, older saves may hold four digit years
+DATE_FORMATS: tuple[str, ...] = ('%d/%m/%y', '%d/%m/%Y')
+
+
+@lru_cache(maxsize=None)
+def parse_date(date: str):
+    """
+    Function to convert a DD/MM/YY date string into a day ordinal (days since 01/01/0001).
+    Results are memoized since ledgers repeat the same few dates many times over. The cache is unbounded, a century
+    of dates is under 40,000 entries, so loading a long ledger never re-parses a date.
+
+    :param date: date string to parse
+    :type date: str
+    :return: int - day ordinal of the date, None if the string is not a valid date
+    :rtype: int | None
+    """
+    if not isinstance(date, str):
+        return None
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(date.strip(), date_format).toordinal()
+        except ValueError:
+            continue
+    return None
+
+
+def to_ordinal(value: str | int | datetime.date):
+    """
+    Function to convert a date given as a DD/MM/YY string, datetime.date or day ordinal into a day ordinal
+
+    :param value: date to convert
+    :type value: str | int | datetime.date
+    :return: int - day ordinal of the date
+    :rtype: int
+    """
+    if isinstance(value, datetime.date):
+        return value.toordinal()
+    if isinstance(value, int):
+        return value
+    ordinal = parse_date(value)
+    if ordinal is None:
+        raise ValueError(f"Invalid date ({value}). Dates must be in the format DD/MM/YY")
+    return ordinal
+
+
+@lru_cache(maxsize=4096)
+def parse_month(date: str):
+    """
+    Function to get the month of a DD/MM/YY date string as a month number (year * 12 + month - 1), which orders
+    and subtracts like the months themselves. Memoized like parse_date
+
+    :param date: date string to parse
+    :type date: str
+    :return: int - month number of the date, None if the string is not a valid date
+    :rtype: int | None
+    """
+    ordinal = parse_date(date)
+    if ordinal is None:
+        return None
+    return ordinal_to_month(ordinal)
+
+
+@lru_cache(maxsize=None)
+def ordinal_to_month(ordinal: int):
+    """
+    Function to get the month number (year * 12 + month - 1) of a day ordinal. Memoized like parse_date
+
+    :param ordinal: day ordinal
+    :type ordinal: int
+    :return: int - month number
+    :rtype: int
+    """
+    day = datetime.date.fromordinal(ordinal)
+    return day.year * 12 + day.month - 1
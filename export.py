@@ -0,0 +1,200 @@
+"""
+Module containing the CSV and columnar binary transaction exports
+"""
+
+
+import csv
+import datetime
+import json
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from money import format_cents
+from string_table import StringTable
+from transaction import Transaction
+
+
+# columns of exported transactions, shared by the Excel and CSV exports
+EXPORT_HEADERS: tuple[str, ...] = ('transaction_type', 'date', 'amount', 'vendor', 'category', 'note', 'expense_goal')
+
+# columnar file layout, all integers little endian:
+#   magic
+#   row groups, each:  uint32 row count
+#                      numeric columns in NUMERIC_COLUMNS order, row count values each
+#                      string columns in STRING_COLUMNS order, each a uint32 byte length and a JSON list of the
+#                        distinct strings in the group, then a uint32 code per row indexing that list
+#   uint32 0 marking the end of the file
+COLUMNAR_MAGIC: bytes = b'BUDGCOL1'
+NUMERIC_COLUMNS: tuple[tuple[str, str], ...] = (('transaction_id', 'q'), ('amount_cents', 'q'), ('date_ordinal', 'i'))
+STRING_COLUMNS: tuple[str, ...] = ('transaction_type', 'vendor', 'category', 'note', 'expense_goal')
+
+
+#
+# export transactions (Requirement 1.3.5)
+#
+def write_csv(transactions: Iterable[Transaction], filename: str):
+    """
+    Function to write transactions to a CSV file, one row at a time. Amounts are written with two decimal places
+
+    :param transactions: transactions to write
+    :type transactions: Iterable[Transaction]
+    :param filename: filename, including path, for CSV file
+    :type filename: str
+    :return: int - number of transactions written
+    :rtype: int
+    """
+    rows = 0
+    with open(filename, 'w', newline='', encoding='utf-8') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(EXPORT_HEADERS)
+        for trans in transactions:
+            writer.writerow((trans.transaction_type, trans.date, format_cents(trans.amount_cents), trans.vendor,
+                             trans.category, trans.note, trans.expense_goal))
+            rows += 1
+    return rows
+
+
+#
+# export transactions (Requirement 1.3.5)
+#
+def write_columnar(transactions: Iterable[Transaction], filename: str, row_group_size: int = 65536):
+    """
+    Function to write transactions to a columnar binary file. Amounts (cents), dates (day ordinals, 0 for dates that
+    could not be parsed) and ids are typed columns and the string attributes are dictionary encoded. Transactions
+    are written in row groups of row_group_size, so memory use does not grow with the number of transactions
+
+    :param transactions: transactions to write
+    :type transactions: Iterable[Transaction]
+    :param filename: filename, including path, for columnar file
+    :type filename: str
+    :param row_group_size: number of transactions per row group
+    :type row_group_size: int
+    :return: int - number of transactions written
+    :rtype: int
+    """
+    rows = 0
+    with open(filename, 'wb') as columnar_file:
+        columnar_file.write(COLUMNAR_MAGIC)
+        group = []
+        for trans in transactions:
+            group.append(trans)
+            if len(group) == row_group_size:
+                write_row_group(columnar_file, group)
+                rows += len(group)
+                group = []
+        if group:
+            write_row_group(columnar_file, group)
+            rows += len(group)
+        columnar_file.write(struct.pack('<I', 0))
+    return rows
+
+
+def write_row_group(columnar_file, transactions: list[Transaction]):
+    """
+    Function to write one row group of a columnar file
+
+    :param columnar_file: file open for binary writing
+    :param transactions: transactions in the group
+    :type transactions: list[Transaction]
+    :return: None
+    """
+    columnar_file.write(struct.pack('<I', len(transactions)))
+    numeric = {
+        'transaction_id': (trans.transaction_id for trans in transactions),
+        'amount_cents': (trans.amount_cents for trans in transactions),
+        'date_ordinal': (trans.date_ordinal or 0 for trans in transactions),
+    }
+    for column, typecode in NUMERIC_COLUMNS:
+        write_array(columnar_file, array(typecode, numeric[column]))
+    for column in STRING_COLUMNS:
+        table = StringTable()
+        codes = array('I', (table.encode(trans.get(column)) for trans in transactions))
+        values = json.dumps(table.values).encode('utf-8')
+        columnar_file.write(struct.pack('<I', len(values)))
+        columnar_file.write(values)
+        write_array(columnar_file, codes)
+
+
+def write_array(columnar_file, values: array):
+    """
+    Function to write a typed array in little endian byte order
+
+    :param columnar_file: file open for binary writing
+    :param values: array to write
+    :type values: array
+    :return: None
+    """
+    if sys.byteorder == 'big':
+        values.byteswap()
+    values.tofile(columnar_file)
+
+
+def read_array(columnar_file, typecode: str, length: int):
+    """
+    Function to read a little endian typed array
+
+    :param columnar_file: file open for binary reading
+    :param typecode: array typecode of the values
+    :type typecode: str
+    :param length: number of values
+    :type length: int
+    :return: array - values read
+    :rtype: array
+    """
+    values = array(typecode)
+    values.fromfile(columnar_file, length)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def iter_row_groups(filename: str) -> Iterator[dict[str, array | tuple[list[str], array]]]:
+    """
+    Function to read a columnar file one row group at a time. Numeric columns are arrays, string columns are
+    (distinct strings, codes) pairs, where codes is an array indexing the list of strings
+
+    :param filename: filename, including path, of columnar file
+    :type filename: str
+    :return: iterator of row groups, each a dict of column name to column
+    """
+    with open(filename, 'rb') as columnar_file:
+        if columnar_file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{filename} is not a columnar transaction file")
+        while True:
+            (rows,) = struct.unpack('<I', columnar_file.read(4))
+            if not rows:
+                return
+            group = {}
+            for column, typecode in NUMERIC_COLUMNS:
+                group[column] = read_array(columnar_file, typecode, rows)
+            for column in STRING_COLUMNS:
+                (length,) = struct.unpack('<I', columnar_file.read(4))
+                values = json.loads(columnar_file.read(length).decode('utf-8'))
+                group[column] = (values, read_array(columnar_file, 'I', rows))
+            yield group
+
+
+def read_columnar(filename: str):
+    """
+    Function to read a whole columnar file into columns. Numeric columns are arrays, string columns are lists of
+    strings, and a 'date' column of DD/MM/YY strings is rebuilt from the date ordinals
+
+    :param filename: filename, including path, of columnar file
+    :type filename: str
+    :return: dict - column name to column
+    :rtype: dict[str, array | list[str | None]]
+    """
+    columns = {column: array(typecode) for column, typecode in NUMERIC_COLUMNS}
+    columns.update({column: [] for column in STRING_COLUMNS})
+    for group in iter_row_groups(filename):
+        for column, _ in NUMERIC_COLUMNS:
+            columns[column].extend(group[column])
+        for column in STRING_COLUMNS:
+            values, codes = group[column]
+            columns[column].extend(map(values.__getitem__, codes))
+    dates = {}
+    for ordinal in set(columns['date_ordinal']):
+        dates[ordinal] = datetime.date.fromordinal(ordinal).strftime('%d/%m/%y') if ordinal else None
+    columns['date'] = [dates[ordinal] for ordinal in columns['date_ordinal']]
+    return columns
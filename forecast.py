@@ -0,0 +1,242 @@
+"""
+Module containing the goal forecasting engine, projecting when each goal's target will be reached
+"""
+
+
+import datetime
+import numpy as np
+from budget import Budget, paused_gc
+from date_utils import to_ordinal
+from goal import Goal
+from money import from_cents
+
+
+class Projection:
+    """
+    Forecast for one goal, from a least squares fit of its cumulative in-window spend per day
+    """
+
+    def __init__(self, goal_name: str, as_of: int, daily_cents: float | None, spent_cents: int, target_cents: int,
+                 projected_ordinal: int | None, end_cents: int | None):
+        """
+        Init
+
+        :param goal_name: name of goal
+        :type goal_name: str
+        :param as_of: day ordinal the forecast was made on
+        :type as_of: int
+        :param daily_cents: fitted spend per day in cents, None if the goal has not started or has no valid start date
+        :type daily_cents: float | None
+        :param spent_cents: net spend in the goal's window up to as_of
+        :type spent_cents: int
+        :param target_cents: target of the goal
+        :type target_cents: int
+        :param projected_ordinal: day ordinal spend reached or is projected to reach the target, None if it won't
+        :type projected_ordinal: int | None
+        :param end_cents: projected net spend at the goal's end date, None if the goal has no valid end date
+        :type end_cents: int | None
+        """
+        self.goal_name = goal_name
+        self.as_of = as_of
+        self.daily_cents = daily_cents
+        self.spent_cents = spent_cents
+        self.target_cents = target_cents
+        self.projected_ordinal = projected_ordinal
+        self.end_cents = end_cents
+
+    @property
+    def daily_rate(self):
+        """
+        fitted spend per day in dollars, None if the goal has not started
+        """
+        return None if self.daily_cents is None else self.daily_cents / 100
+
+    @property
+    def reached(self):
+        """
+        True if spend in the window has already reached the target
+        """
+        return self.target_cents is not None and self.spent_cents >= self.target_cents
+
+    @property
+    def projected_date(self):
+        """
+        DD/MM/YY date spend reached or is projected to reach the target, None if it won't
+        """
+        if self.projected_ordinal is None:
+            return None
+        return datetime.date.fromordinal(self.projected_ordinal).strftime('%d/%m/%y')
+
+    @property
+    def projected_total(self):
+        """
+        projected net spend at the goal's end date in dollars, None if the goal has no valid end date
+        """
+        return from_cents(self.end_cents)
+
+    @property
+    def overrun(self):
+        """
+        projected dollars over the target at the goal's end date (negative when under), None without an end date
+        """
+        if self.end_cents is None or self.target_cents is None:
+            return None
+        return from_cents(self.end_cents - self.target_cents)
+
+    def __repr__(self):
+        return (f"Projection({self.goal_name!r}, daily_rate={self.daily_rate}, projected_date={self.projected_date}, "
+                f"overrun={self.overrun})")
+
+
+class GoalForecaster:
+    """
+    Projections for every goal in a budget. Each goal's spend in its window is fitted with a line through its
+    cumulative spend per day, and the line gives the day the target is reached and the spend at the end date.
+
+    All goals needing a projection are fitted together with grouped NumPy reductions. The sums the fit needs over
+    each goal's daily series are worked out in closed form from the linked transactions, so no per-day arrays are
+    built however long the goals run. Projections are cached per goal and only recomputed once the goal's version
+    (see Goal.version) shows its transactions, window or target changed.
+    """
+
+    def __init__(self, budget: Budget):
+        """
+        Init
+
+        :param budget: budget whose goals are forecast
+        :type budget: Budget
+        """
+        self.budget = budget
+        # goal key -> (goal, goal version, as_of, projection)
+        self.cache: dict[str, tuple[Goal, int, int, Projection]] = {}
+
+    def forecast(self, as_of: str | int | datetime.date = None):
+        """
+        Method to get projections for every goal in the budget
+
+        :param as_of: date to forecast from (DD/MM/YY, datetime.date or day ordinal), today if None
+        :type as_of: str | int | datetime.date
+        :return: dict - Projection keyed by lowercase goal name
+        :rtype: dict[str, Projection]
+        """
+        as_of = to_ordinal(as_of) if as_of is not None else datetime.date.today().toordinal()
+        goals = self.budget.expense_goals
+        stale = []
+        for key, goal in goals.items():
+            cached = self.cache.get(key)
+            if cached is None or cached[0] is not goal or cached[1] != goal.version or cached[2] != as_of:
+                stale.append((key, goal))
+        if stale:
+            projections = self.project([goal for _, goal in stale], as_of)
+            for (key, goal), projection in zip(stale, projections):
+                self.cache[key] = (goal, goal.version, as_of, projection)
+        if len(self.cache) != len(goals):
+            self.cache = {key: cached for key, cached in self.cache.items() if key in goals}
+        return {key: self.cache[key][3] for key in goals}
+
+    def forecast_goal(self, goal_name: str, as_of: str | int | datetime.date = None):
+        """
+        Method to get the projection of one goal
+
+        :param goal_name: name of goal
+        :type goal_name: str
+        :param as_of: date to forecast from, today if None
+        :type as_of: str | int | datetime.date
+        :return: Projection - projection of the goal
+        :rtype: Projection
+        """
+        goal = self.budget.get_expense_goal(goal_name)
+        return self.forecast(as_of)[goal.name.lower()]
+
+    @staticmethod
+    def project(goals: list[Goal], as_of: int):
+        """
+        Function to fit and project a batch of goals
+
+        :param goals: goals to project
+        :type goals: list[Goal]
+        :param as_of: day ordinal to forecast from
+        :type as_of: int
+        :return: list[Projection] - projection of each goal, in the order given
+        :rtype: list[Projection]
+        """
+        count = len(goals)
+        started = np.array([goal.start_ordinal is not None for goal in goals], dtype=bool)
+        start = np.array([goal.start_ordinal or 0 for goal in goals], dtype=np.int64)
+        has_end = np.array([goal.end_ordinal is not None for goal in goals], dtype=bool)
+        end = np.array([goal.end_ordinal or 0 for goal in goals], dtype=np.int64)
+        target = np.array([goal.target_cents or 0 for goal in goals], dtype=np.int64)
+        # the series of each goal runs from its start date to as_of or its end date, whichever is earlier
+        last = np.where(has_end, np.minimum(as_of, end), as_of)
+        days = np.where(started, np.maximum(last - start + 1, 0), 0)
+
+        # the linked transactions of every goal that has started, then the ones inside each goal's series
+        goal_index, ordinals, cents, types = [], [], [], []
+        type_codes: dict[str, int] = {}  # transaction type -> code, the types are few so the sign is found per code
+        with paused_gc():
+            for index, goal in enumerate(goals):
+                if days[index]:
+                    linked = goal.transactions.values()
+                    goal_index.extend([index] * len(linked))
+                    ordinals.extend([transaction.date_ordinal or 0 for transaction in linked])
+                    cents.extend([transaction.amount_cents for transaction in linked])
+                    types.extend([type_codes.setdefault(transaction.transaction_type, len(type_codes))
+                                  for transaction in linked])
+        # income counts against a goal, as in goal_cents
+        signs = np.array([-1.0 if str(transaction_type).lower() == 'income' else 1.0
+                          for transaction_type in type_codes])
+        goal_index = np.array(goal_index, dtype=np.int64)
+        ordinals = np.array(ordinals, dtype=np.int64)
+        cents = np.array(cents, dtype=np.float64) * signs[np.array(types, dtype=np.int64)] if types else np.zeros(0)
+        inside = (ordinals >= start[goal_index]) & (ordinals <= last[goal_index])
+        goal_index, cents = goal_index[inside], cents[inside]
+        day = ordinals[inside] - start[goal_index]
+
+        # least squares fit of cumulative spend y over days x = 0 .. n-1. A transaction on day d adds its cents to
+        # y on days d .. n-1, which gives the sums of y and x*y without building the series
+        n = days.astype(np.float64)
+        n_events = n[goal_index]
+        sum_y = np.bincount(goal_index, cents * (n_events - day), minlength=count)
+        sum_xy = np.bincount(goal_index, cents * ((n_events - 1) * n_events - (day - 1) * day) / 2, minlength=count)
+        sum_x = n * (n - 1) / 2
+        sum_x2 = (n - 1) * n * (2 * n - 1) / 6
+        spent = np.bincount(goal_index, cents, minlength=count).round().astype(np.int64)
+        denominator = n * sum_x2 - sum_x * sum_x
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = np.where(denominator > 0, (n * sum_xy - sum_x * sum_y) / denominator,
+                             np.where(n > 0, spent / n, 0.0))
+
+        # first day each goal's cumulative spend reached its target, from its transactions in date order
+        reached_day = np.full(count, -1, dtype=np.int64)
+        if len(goal_index):
+            order = np.lexsort((day, goal_index))
+            sorted_goals, sorted_days = goal_index[order], day[order]
+            running = np.cumsum(cents[order])
+            groups, group_starts = np.unique(sorted_goals, return_index=True)
+            before_group = np.where(group_starts > 0, running[np.maximum(group_starts - 1, 0)], 0)
+            running -= np.repeat(before_group, np.diff(np.append(group_starts, len(order))))
+            at_target = running >= target[sorted_goals]
+            first_days = np.where(at_target, sorted_days, np.iinfo(np.int64).max)
+            first_days = np.minimum.reduceat(first_days, group_starts)
+            reached = first_days != np.iinfo(np.int64).max
+            reached_day[groups[reached]] = first_days[reached]
+
+        projections = []
+        for index, goal in enumerate(goals):
+            if not days[index]:
+                projections.append(Projection(goal.name, as_of, None, 0, goal.target_cents, None, None))
+                continue
+            rate = float(slope[index])
+            remaining = int(target[index] - spent[index])
+            if reached_day[index] >= 0:
+                projected = int(start[index] + reached_day[index])
+            elif rate > 0 and not (has_end[index] and as_of > end[index]):
+                projected = int(last[index]) + int(np.ceil(remaining / rate))
+            else:
+                projected = None  # spend isn't growing, or the window closed short of the target
+            end_cents = None
+            if has_end[index]:
+                end_cents = int(round(spent[index] + max(rate, 0.0) * (end[index] - last[index])))
+            projections.append(Projection(goal.name, as_of, rate, int(spent[index]), goal.target_cents, projected,
+                                          end_cents))
+        return projections
@@ -1,6 +1,24 @@
+import datetime
+from date_utils import parse_date, to_ordinal
+from money import from_cents, to_cents
 from transaction import Transaction
 
 
+def goal_cents(transaction: Transaction):
+    """
+    Function to get what a transaction puts towards a goal in cents. Expenses count towards the goal and income
+    counts against it
+
+    :param transaction: transaction linked to a goal
+    :type transaction: Transaction
+    :return: int - cents, negative for income
+    :rtype: int
+    """
+    if transaction.transaction_type.lower() == 'income':
+        return -transaction.amount_cents
+    return transaction.amount_cents
+
+
 #
 # add expense goal (Requirement 1.2.11)
 #
@@ -12,16 +30,150 @@ class Goal:
         Initialize the variables for the class
         
         """
+        self.transactions: dict[int, Transaction] = {}  # linked transactions keyed by transaction id
+        # net spend (expenses less income) and number of the linked transactions dated from start_date to end_date.
+        # Kept up to date as transactions are applied and removed, so progress never rescans the transactions
+        self.window_cents: int = 0
+        self.window_count: int = 0
+        self.version: int = 0  # bumped whenever the goal's amounts, window or linked transactions change
         self.name: str = None
         self.start_date: str = None
         self.end_date: str = None
         self.note: str = None
-        self.target_amount: float = None
         self.date_spent: str = None
         self.category: str = None
-        self.current_amount: float = 0.00
-        self.amount_left: float = 0.00
-        self.transactions: list[Transaction] = []
+        # amounts are kept in integer cents so they stay exact. target_amount, current_amount and amount_left give
+        # dollars
+        self.target_cents: int = None
+        self.current_cents: int = 0
+        self.amount_left_cents: int = 0
+
+    @property
+    def start_date(self):
+        """
+        start date of goal as DD/MM/YY. Setting it also sets start_ordinal, the day ordinal of the date (None if the
+        date is not valid)
+        """
+        return self._start_date
+
+    @start_date.setter
+    def start_date(self, value: str):
+        self._start_date = value
+        self.start_ordinal = parse_date(value)
+        self.refresh_window()
+
+    @property
+    def end_date(self):
+        """
+        end date of goal as DD/MM/YY. Setting it also sets end_ordinal, the day ordinal of the date (None if the date
+        is not valid)
+        """
+        return self._end_date
+
+    @end_date.setter
+    def end_date(self, value: str):
+        self._end_date = value
+        self.end_ordinal = parse_date(value)
+        self.refresh_window()
+
+    @property
+    def target_amount(self):
+        """
+        target amount of goal in dollars
+        """
+        return from_cents(self.target_cents)
+
+    @target_amount.setter
+    def target_amount(self, value: float | str):
+        self.target_cents = to_cents(value)
+        self.set_updateBalance()
+        self.version += 1
+
+    @property
+    def current_amount(self):
+        """
+        amount put towards goal in dollars
+        """
+        return from_cents(self.current_cents)
+
+    @current_amount.setter
+    def current_amount(self, value: float | str):
+        self.current_cents = to_cents(value)
+        self.set_updateBalance()
+
+    @property
+    def amount_left(self):
+        """
+        amount left towards goal in dollars
+        """
+        return from_cents(self.amount_left_cents)
+
+    @amount_left.setter
+    def amount_left(self, value: float | str):
+        self.amount_left_cents = to_cents(value)
+
+    @property
+    def window_amount(self):
+        """
+        net amount spent towards goal in dollars by transactions dated inside the goal's start and end dates
+        """
+        return from_cents(self.window_cents)
+
+    def in_window(self, ordinal: int | None):
+        """
+        Method to check if a day ordinal falls from the goal's start date to its end date. A missing or invalid start
+        or end date leaves that side of the window open
+
+        :param ordinal: day ordinal, None for an invalid date
+        :type ordinal: int | None
+        :return: bool - True if the date is inside the window
+        :rtype: bool
+        """
+        if ordinal is None:
+            return False
+        return ((self.start_ordinal is None or ordinal >= self.start_ordinal)
+                and (self.end_ordinal is None or ordinal <= self.end_ordinal))
+
+    def refresh_window(self):
+        """
+        Method to recount the in-window aggregates from the linked transactions, for when the window itself moves
+
+        :return: None
+        """
+        self.window_cents = 0
+        self.window_count = 0
+        self.version += 1
+        if not self.transactions:
+            return
+        for transaction in self.transactions.values():
+            if self.in_window(transaction.date_ordinal):
+                self.window_cents += goal_cents(transaction)
+                self.window_count += 1
+
+    def burn_rate(self, as_of: str | int | datetime.date = None):
+        """
+        Method to get the average spend per day towards the goal inside its window, from the start date up to as_of
+        or the end date, whichever is earlier. Transactions dated after that day don't count
+
+        :param as_of: date to measure up to (DD/MM/YY, datetime.date or day ordinal), today if None
+        :type as_of: str | int | datetime.date
+        :return: float - dollars per day, None if the goal has no valid start date or as_of is before it
+        :rtype: float | None
+        """
+        if self.start_ordinal is None:
+            return None
+        last_day = to_ordinal(as_of) if as_of is not None else datetime.date.today().toordinal()
+        if self.end_ordinal is not None:
+            last_day = min(last_day, self.end_ordinal)
+        days = last_day - self.start_ordinal + 1
+        if days < 1:
+            return None
+        if self.end_ordinal is not None and last_day == self.end_ordinal:
+            cents = self.window_cents  # the whole window
+        else:
+            cents = sum(goal_cents(transaction) for transaction in self.transactions.values()
+                        if self.in_window(transaction.date_ordinal) and transaction.date_ordinal <= last_day)
+        return from_cents(cents) / days
 
     def edit(self, name: str, start_date: str, end_date: str, note: str, target_amount: float, date_spent: str,
              category: str):
@@ -158,7 +310,7 @@ class Goal:
 
         :return: None
         """
-        self.amount_left = self.target_amount
+        self.amount_left_cents = self.target_cents
        
     # Used for when the user goes to change the balance goal amount
     # This way the amount left towards goal will refelct those changes and update
@@ -172,7 +324,8 @@ class Goal:
 
         :return: None
         """
-        self.amount_left = self.target_amount - self.current_amount
+        if self.target_cents is not None:
+            self.amount_left_cents = self.target_cents - self.current_cents
 
     # Calculates the current amount torwards the goal when a transaction is added to it
     # Also updates the amount left torwards the goal
@@ -187,7 +340,7 @@ class Goal:
         :type trans_amount: float
         :return: None
         """
-        self.current_amount += trans_amount
+        self.current_cents += to_cents(trans_amount)
         self.set_updateBalance()
    
     # Calculates the current amount torwards a goal when a transaction is removed from it
@@ -203,7 +356,7 @@ class Goal:
         :type trans_amount: float
         :return:
         """
-        self.current_amount -= trans_amount
+        self.current_cents -= to_cents(trans_amount)
         self.set_updateBalance()
 
     #
@@ -217,11 +370,41 @@ class Goal:
         :type transaction: Transaction
         :return: None
         """
-        if transaction.transaction_type.lower() == 'income':
-            self.remove_currentAmount(transaction.amount)
-        else:
-            self.calc_currentAmount(transaction.amount)
-        self.transactions.append(transaction)
+        cents = goal_cents(transaction)
+        self.current_cents += cents
+        if self.in_window(transaction.date_ordinal):
+            self.window_cents += cents
+            self.window_count += 1
+        self.set_updateBalance()
+        self.transactions[transaction.transaction_id] = transaction
+        self.version += 1
+
+    #
+    # load budget (Requirement 1.3.7)
+    #
+    def apply_transactions(self, transactions: list[Transaction]):
+        """
+        Method to apply a batch of transactions to the goal, updating the goal amounts once for the whole batch
+
+        :param transactions: transactions to apply
+        :type transactions: list[Transaction]
+        :return: None
+        """
+        net_cents = 0
+        window_cents = 0
+        window_count = 0
+        for transaction in transactions:
+            cents = goal_cents(transaction)
+            net_cents += cents
+            if self.in_window(transaction.date_ordinal):
+                window_cents += cents
+                window_count += 1
+            self.transactions[transaction.transaction_id] = transaction
+        self.current_cents += net_cents
+        self.window_cents += window_cents
+        self.window_count += window_count
+        self.set_updateBalance()
+        self.version += 1
 
     #
     # create transaction with goal (requirement 1.3.9)
@@ -234,12 +417,13 @@ class Goal:
         :type transaction: Transaction
         :return: None
         """
-        try:
-            idx = self.transactions.index(transaction)
-            if transaction.transaction_type.lower() == 'income':
-                self.calc_currentAmount(transaction.amount)
-            else:
-                self.remove_currentAmount(transaction.amount)
-            del self.transactions[idx]
-        except ValueError:
-            pass
+        linked = self.transactions.pop(transaction.transaction_id, None)
+        if linked is None:
+            return
+        cents = goal_cents(linked)
+        self.current_cents -= cents
+        if self.in_window(linked.date_ordinal):
+            self.window_cents -= cents
+            self.window_count -= 1
+        self.set_updateBalance()
+        self.version += 1
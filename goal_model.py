@@ -0,0 +1,94 @@
+"""
+Module containing the Qt list model of a budget's goal names, shared by the goal selectors of the GUI
+"""
+
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+from budget import Budget
+
+
+class GoalListModel(QAbstractListModel):
+    """
+    List model of the names a transaction can be linked to: "N/A" followed by the key (lowercase name) of every goal
+    in a budget. Combo boxes showing goals share one model. The model listens to the budget, so adding, renaming or
+    deleting a goal changes just that goal's row and every combo box follows.
+    """
+
+    # first row, for transactions not linked to a goal
+    no_goal: str = "N/A"
+
+    def __init__(self, budget: Budget, parent=None):
+        """
+        Init
+
+        :param budget: budget whose goals are listed
+        :type budget: Budget
+        :param parent: parent QObject
+        """
+        super().__init__(parent)
+        self.budget = budget
+        self.names: list[str] = [self.no_goal] + list(budget.expense_goals)
+        self.rows: dict[str, int] = {name: row for row, name in enumerate(self.names)}  # goal key -> row
+        budget.add_listener(self.budget_changed)
+
+    def close(self):
+        """
+        Method to stop following the budget
+
+        :return: None
+        """
+        self.budget.remove_listener(self.budget_changed)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self.names[index.row()]
+        return None
+
+    def row_of(self, name: str):
+        """
+        Method to get the row showing a goal
+
+        :param name: key (lowercase name) of the goal
+        :type name: str
+        :return: int - row of the goal, None if the model doesn't show it
+        :rtype: int | None
+        """
+        return self.rows.get(name)
+
+    def budget_changed(self, event: str, subject):
+        """
+        Listener keeping the names in step with the budget's goals (see Budget.add_listener)
+
+        :param event: name of the change
+        :type event: str
+        :param subject: goal that changed, or (old name, goal) for a rename
+        :return: None
+        """
+        if event == 'add_goal':
+            name = subject.name.lower()
+            row = len(self.names)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.names.append(name)
+            self.rows[name] = row
+            self.endInsertRows()
+        elif event == 'rename_goal':
+            old_name, goal = subject
+            row = self.rows.pop(old_name.lower())
+            self.names[row] = goal.name.lower()
+            self.rows[goal.name.lower()] = row
+            self.dataChanged.emit(self.index(row), self.index(row))
+        elif event == 'delete_goal':
+            row = self.rows.pop(subject.name.lower(), None)
+            if row is None:
+                return
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.names[row]
+            # the goals after the removed one move up a row. This is linear in the number of goals, which stays small
+            for name in self.names[row:]:
+                self.rows[name] -= 1
+            self.endRemoveRows()
@@ -0,0 +1,346 @@
+"""
+Module containing the bank statement importer. Statements are streamed through parse -> normalize -> validate ->
+batch insert, so years of statements can be ingested in one go
+"""
+
+
+import csv
+import datetime
+import os
+import re
+import time
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+from typing import Callable
+from budget import Budget
+from money import to_cents
+from transaction import Transaction, intern_string
+
+
+# formats tried, in order, for statement dates. Day first formats come first since the budget uses DD/MM/YY
+STATEMENT_DATE_FORMATS: tuple[str, ...] = ('%d/%m/%y', '%d/%m/%Y', '%Y-%m-%d', '%Y%m%d', '%d-%m-%Y', '%d %b %Y',
+                                           '%b %d, %Y')
+
+# lowercase CSV header names recognised for each field. The budget's own CSV export uses the first name of each
+CSV_COLUMNS: dict[str, tuple[str, ...]] = {
+    'transaction_type': ('transaction_type', 'type', 'transaction type'),
+    'date': ('date', 'transaction date', 'posted date', 'posting date', 'booking date'),
+    'amount': ('amount', 'transaction amount'),
+    'debit': ('debit', 'withdrawal', 'withdrawals', 'money out'),
+    'credit': ('credit', 'deposit', 'deposits', 'money in'),
+    'vendor': ('vendor', 'description', 'payee', 'name', 'merchant'),
+    'category': ('category',),
+    'note': ('note', 'memo', 'reference'),
+    'expense_goal': ('expense_goal', 'goal'),
+}
+
+# OFX tags, <TAG>value, </TAG> or <TAG/>. Element values run to the next tag
+OFX_TOKEN = re.compile(r'<(/?)([A-Za-z0-9.]+)/?>([^<]*)')
+
+
+class ImportReport:
+    """
+    Outcome of an import: rows read, imported and rejected, the reason each rejected row was rejected, and how fast
+    the rows went in
+    """
+
+    def __init__(self, filename: str):
+        """
+        Init
+
+        :param filename: filename, including path, of the statement
+        :type filename: str
+        """
+        self.filename = filename
+        self.rows_read: int = 0
+        self.rows_imported: int = 0
+        self.rows_skipped: int = 0  # valid rows matching a transaction already in the budget
+        self.errors: list[tuple[int, str]] = []  # (row number, reason) for each rejected row
+        self.seconds: float = 0.0
+
+    @property
+    def rows_rejected(self):
+        """
+        number of rows that failed validation
+        """
+        return len(self.errors)
+
+    @property
+    def rows_per_second(self):
+        """
+        rows read per second
+        """
+        return self.rows_read / self.seconds if self.seconds else float(self.rows_read)
+
+    def __str__(self):
+        return (f"{self.filename}: {self.rows_imported} of {self.rows_read} rows imported, {self.rows_rejected} "
+                f"rejected, {self.rows_skipped} skipped as duplicates in {self.seconds:.2f}s "
+                f"({self.rows_per_second:,.0f} rows/s)")
+
+
+@lru_cache(maxsize=4096)
+def normalize_date(value: str):
+    """
+    Function to convert a statement date into the budget's DD/MM/YY format. Memoized, statements repeat dates
+
+    :param value: date as written in the statement
+    :type value: str
+    :return: str - date as DD/MM/YY
+    :rtype: str
+    """
+    value = value.strip()
+    for date_format in STATEMENT_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format).strftime('%d/%m/%y')
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date ({value})")
+
+
+def normalize_amount(value: str):
+    """
+    Function to convert a statement amount into signed cents. Currency symbols, thousands separators and
+    (bracketed) negatives are accepted
+
+    :param value: amount as written in the statement
+    :type value: str
+    :return: int - amount in cents, negative for money out
+    :rtype: int
+    """
+    value = value.strip().replace(',', '').replace('$', '')
+    if value.startswith('(') and value.endswith(')'):
+        value = '-' + value[1:-1]
+    if not value:
+        raise ValueError("Missing amount")
+    return to_cents(value)
+
+
+def make_transaction(record: dict[str, str], cents: int):
+    """
+    Function to build a validated transaction from a normalized statement record
+
+    :param record: statement record with at least a date and vendor
+    :type record: dict[str, str]
+    :param cents: signed amount in cents, negative for money out
+    :type cents: int
+    :return: Transaction - new transaction
+    :rtype: Transaction
+    """
+    transaction_type = record.get('transaction_type') or ''
+    if transaction_type.lower() not in ('expense', 'income'):
+        transaction_type = 'Expense' if cents < 0 else 'Income'
+    date = normalize_date(record.get('date') or '')
+    t = Transaction()
+    t.transaction_type = intern_string(transaction_type.capitalize())
+    t.date = intern_string(date)
+    t.amount_cents = abs(cents)
+    t.vendor = intern_string((record.get('vendor') or '').strip() or 'Unknown')
+    t.category = intern_string((record.get('category') or '').strip() or 'Other')
+    t.note = (record.get('note') or '').strip()
+    t.expense_goal = intern_string((record.get('expense_goal') or '').strip() or 'N/A')
+    return t
+
+
+def csv_field_map(headers: list[str]):
+    """
+    Function to match CSV headers to transaction fields using CSV_COLUMNS
+
+    :param headers: header row of the CSV file
+    :type headers: list[str]
+    :return: dict - field name to column number, for the fields found
+    :rtype: dict[str, int]
+    """
+    positions = {header.strip().lower(): position for position, header in enumerate(headers)}
+    field_map = {}
+    for field, names in CSV_COLUMNS.items():
+        for name in names:
+            if name in positions:
+                field_map[field] = positions[name]
+                break
+    if 'date' not in field_map or not ({'amount', 'debit', 'credit'} & field_map.keys()):
+        raise ValueError(f"CSV headers {headers} need a date column and an amount, debit or credit column")
+    return field_map
+
+
+def parse_csv(filename: str, report: ImportReport) -> Iterator[Transaction]:
+    """
+    Generator of the valid transactions in a CSV statement. Rejected rows are recorded in report
+
+    :param filename: filename, including path, of the CSV statement
+    :type filename: str
+    :param report: report to record read and rejected rows in
+    :type report: ImportReport
+    :return: iterator of transactions
+    """
+    with open(filename, newline='', encoding='utf-8-sig') as csv_file:
+        reader = csv.reader(csv_file)
+        field_map = csv_field_map(next(reader, []))
+        for row_number, row in enumerate(reader, 2):
+            if not any(row):
+                continue
+            report.rows_read += 1
+            try:
+                record = {field: row[position] for field, position in field_map.items() if position < len(row)}
+                if record.get('amount', '').strip():
+                    cents = normalize_amount(record['amount'])
+                else:
+                    # separate money out and money in columns, either may be written with or without a sign
+                    debit = record.get('debit', '').strip()
+                    credit = record.get('credit', '').strip()
+                    cents = -abs(normalize_amount(debit)) if debit else abs(normalize_amount(credit))
+                yield make_transaction(record, cents)
+            except ValueError as error:
+                report.errors.append((row_number, str(error)))
+
+
+def ofx_tokens(ofx_file, chunk_size: int = 1 << 16) -> Iterator[tuple[bool, str, str]]:
+    """
+    Generator of the tags in an OFX file, read a chunk at a time
+
+    :param ofx_file: OFX file open for reading
+    :param chunk_size: number of characters to read at a time
+    :type chunk_size: int
+    :return: iterator of (closing tag, tag name, value) tuples
+    """
+    carry = ''
+    while True:
+        chunk = ofx_file.read(chunk_size)
+        text = carry + chunk
+        carry = ''
+        if chunk:
+            # the last tag may continue in the next chunk
+            cut = text.rfind('<')
+            if cut >= 0:
+                text, carry = text[:cut], text[cut:]
+        for match in OFX_TOKEN.finditer(text):
+            yield match.group(1) == '/', match.group(2).upper(), match.group(3).strip()
+        if not chunk:
+            return
+
+
+def parse_ofx(filename: str, report: ImportReport) -> Iterator[Transaction]:
+    """
+    Generator of the valid transactions in an OFX or QFX statement, SGML (OFX 1.x) or XML (OFX 2.x). Rejected
+    transactions are recorded in report
+
+    :param filename: filename, including path, of the OFX statement
+    :type filename: str
+    :param report: report to record read and rejected transactions in
+    :type report: ImportReport
+    :return: iterator of transactions
+    """
+    with open(filename, encoding='utf-8', errors='replace') as ofx_file:
+        record = None
+        for closing, tag, value in ofx_tokens(ofx_file):
+            if tag == 'STMTTRN':
+                if not closing:
+                    record = {}
+                    continue
+                if record is None:
+                    continue
+                report.rows_read += 1
+                try:
+                    # DTPOSTED is YYYYMMDD, optionally followed by a time and time zone
+                    statement_record = {'date': record.get('DTPOSTED', '')[:8], 'vendor': record.get('NAME'),
+                                        'note': record.get('MEMO')}
+                    yield make_transaction(statement_record, normalize_amount(record.get('TRNAMT', '')))
+                except ValueError as error:
+                    report.errors.append((report.rows_read, str(error)))
+                record = None
+            elif record is not None and not closing and value:
+                record[tag] = value
+
+
+def skip_duplicates(transactions: Iterable[Transaction], budget: Budget, report: ImportReport,
+                    window_days: int = 0) -> Iterator[Transaction]:
+    """
+    Generator leaving out transactions already in the budget. Each budget transaction cancels at most one statement
+    row, so two identical rows (two coffees on one day) are only both skipped if the budget holds two of them
+
+    :param transactions: statement transactions
+    :type transactions: Iterable[Transaction]
+    :param budget: budget being imported into
+    :type budget: Budget
+    :param report: report to count skipped rows in
+    :type report: ImportReport
+    :param window_days: see Budget.find_duplicates
+    :type window_days: int
+    :return: iterator of the transactions not already in the budget
+    """
+    # ids of budget transactions already matched to a row, and of rows from this import, which can't match again
+    matched = set()
+    for transaction in transactions:
+        for match in budget.find_duplicates(transaction, window_days):
+            if match.transaction_id not in matched:
+                matched.add(match.transaction_id)
+                report.rows_skipped += 1
+                break
+        else:
+            matched.add(transaction.transaction_id)
+            yield transaction
+
+
+def batched(transactions: Iterable[Transaction], batch_size: int) -> Iterator[list[Transaction]]:
+    """
+    Generator splitting transactions into lists of at most batch_size
+
+    :param transactions: transactions to split
+    :type transactions: Iterable[Transaction]
+    :param batch_size: largest batch
+    :type batch_size: int
+    :return: iterator of batches
+    """
+    batch = []
+    for transaction in transactions:
+        batch.append(transaction)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_statement(budget: Budget, filename: str, batch_size: int = 10000,
+                     progress: Callable[[ImportReport], None] = None, dedupe: bool = False, window_days: int = 0):
+    """
+    Function to import a CSV, OFX or QFX bank statement into a budget, chosen by the file extension.
+    Transactions are categorized by the budget's category rules and added with Budget.add_transactions a batch at a
+    time
+
+    :param budget: budget to import into
+    :type budget: Budget
+    :param filename: filename, including path, of the statement
+    :type filename: str
+    :param batch_size: number of transactions added to the budget at a time
+    :type batch_size: int
+    :param progress: function called with the report after each batch
+    :type progress: Callable[[ImportReport], None]
+    :param dedupe: True to skip rows matching a transaction already in the budget, for overlapping statements
+    :type dedupe: bool
+    :param window_days: with dedupe, match transactions of the same amount this many days apart (see
+     Budget.find_duplicates)
+    :type window_days: int
+    :return: ImportReport - outcome of the import
+    :rtype: ImportReport
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        parser = parse_csv
+    elif extension in ('.ofx', '.qfx'):
+        parser = parse_ofx
+    else:
+        raise ValueError(f"Unsupported statement file {filename}. Supported types are .csv, .ofx and .qfx")
+
+    report = ImportReport(filename)
+    start = time.perf_counter()
+    transactions = parser(filename, report)
+    if dedupe:
+        transactions = skip_duplicates(transactions, budget, report, window_days)
+    for batch in batched(transactions, batch_size):
+        budget.category_rules.categorize_transactions(batch)
+        report.rows_imported += budget.add_transactions(batch)
+        report.seconds = time.perf_counter() - start
+        if progress:
+            progress(report)
+    report.seconds = time.perf_counter() - start
+    return report
@@ -0,0 +1,214 @@
+"""
+Module containing the append-only budget journal
+"""
+
+
+import json
+import os
+from budget import Budget, journal_filename, load_goal, read_json_file, write_json_to_file
+
+
+# goal attributes a journal entry can update. Names are changed by deleting and adding the goal
+goal_attributes: tuple[str, ...] = ('start_date', 'end_date', 'note', 'target_amount', 'date_spent', 'category')
+
+
+class BudgetJournal:
+    """
+    Saves a budget as a snapshot file plus a journal of the changes made since the snapshot was written. Each change
+    is appended to the journal as one JSON line, so a save costs O(changes) rather than rewriting every transaction.
+    Once the journal holds compact_after entries it is folded into a new snapshot.
+
+    Every entry carries a sequence number and the snapshot records the last one it includes, so entries already in
+    the snapshot are never applied twice. Snapshots are replaced atomically and a partly written last entry is
+    dropped, so a crash part way through a save loses at most the changes being saved.
+
+    While a budget is journaled it should be saved through the journal, Budget.save_budget removes the journal.
+    """
+
+    def __init__(self, budget: Budget, filename: str, compact_after: int = 10000):
+        """
+        Init. Call load to read an existing snapshot and journal into the budget
+
+        :param budget: budget to journal
+        :type budget: Budget
+        :param filename: filename, including path, of the snapshot. The journal is kept next to it
+        :type filename: str
+        :param compact_after: number of journal entries that triggers a new snapshot
+        :type compact_after: int
+        """
+        self.budget = budget
+        self.filename = filename
+        self.journal_filename = journal_filename(filename)
+        self.compact_after = compact_after
+        self.sequence: int = 0  # sequence number of the last change recorded
+        self.snapshot_sequence: int = 0  # sequence number of the last change included in the snapshot
+        self.journal_entries: int = 0  # entries in the journal file
+        self.pending: list[dict] = []  # entries recorded but not yet written to the journal
+        budget.add_listener(self.record)
+
+    def close(self):
+        """
+        Method to stop recording changes to the budget. Changes not yet saved are dropped
+
+        :return: None
+        """
+        self.budget.remove_listener(self.record)
+        self.pending = []
+
+    def record(self, event: str, subject):
+        """
+        Method called by the budget for every change (see Budget.add_listener), turning it into journal entries
+
+        :param event: name of the change
+        :type event: str
+        :param subject: what changed
+        :return: None
+        """
+        if event == 'add_transactions':
+            for transaction in subject:
+                self.append({'event': 'add_transaction', 'transaction': transaction.to_dict()})
+        elif event in ('add_transaction', 'update_transaction'):
+            self.append({'event': event, 'transaction': subject.to_dict()})
+        elif event == 'delete_transaction':
+            self.append({'event': event, 'transaction_id': subject.transaction_id})
+        elif event in ('add_goal', 'update_goal'):
+            self.append({'event': event, 'goal': subject.to_dict()})
+        elif event == 'delete_goal':
+            self.append({'event': event, 'name': subject.name})
+        elif event == 'rename_goal':
+            old_name, goal = subject
+            self.append({'event': event, 'name': old_name, 'new_name': goal.name})
+        elif event == 'categories':
+            self.append({'event': event, 'categories': list(subject)})
+
+    def append(self, entry: dict):
+        """
+        Method to number an entry and hold it until the next save
+
+        :param entry: journal entry
+        :type entry: dict
+        :return: None
+        """
+        self.sequence += 1
+        entry['sequence'] = self.sequence
+        self.pending.append(entry)
+
+    #
+    # save budget (Requirement 1.3.6)
+    #
+    def save(self):
+        """
+        Method to append the changes recorded since the last save to the journal, compacting it if it is full
+
+        :return: None
+        """
+        if self.pending:
+            with open(self.journal_filename, 'a', encoding='utf-8') as journal_file:
+                journal_file.write(''.join(json.dumps(entry) + '\n' for entry in self.pending))
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            self.journal_entries += len(self.pending)
+            self.pending = []
+        if self.journal_entries >= self.compact_after or not os.path.exists(self.filename):
+            self.compact()
+
+    #
+    # save budget (Requirement 1.3.6)
+    #
+    def compact(self):
+        """
+        Method to write the whole budget to a new snapshot and empty the journal
+
+        :return: None
+        """
+        budget_dict = self.budget.to_dict()
+        budget_dict['journal_sequence'] = self.sequence
+        write_json_to_file(budget_dict, self.filename)
+        # the snapshot now holds every change, a crash before the journal is emptied only leaves entries load skips
+        self.snapshot_sequence = self.sequence
+        self.pending = []
+        with open(self.journal_filename, 'w', encoding='utf-8'):
+            pass
+        self.journal_entries = 0
+
+    #
+    # load budget (Requirement 1.3.7)
+    #
+    def load(self):
+        """
+        Method to load the snapshot into the budget and replay the journal over it
+
+        :return: None
+        """
+        self.budget.remove_listener(self.record)  # replayed changes are already in the journal
+        try:
+            if os.path.exists(self.filename):
+                budget_dict = read_json_file(self.filename)
+                self.budget.update_from_dict(budget_dict)
+                self.snapshot_sequence = budget_dict.get('journal_sequence', 0)
+            self.sequence = self.snapshot_sequence
+            self.journal_entries = 0
+            if os.path.exists(self.journal_filename):
+                self.replay()
+        finally:
+            self.budget.add_listener(self.record)
+
+    def replay(self):
+        """
+        Method to apply the journal entries newer than the snapshot to the budget. A partly written last entry, left
+        by a crash during a save, is dropped and cut off the journal so later entries are appended after whole ones
+
+        :return: None
+        """
+        complete_bytes = 0
+        with open(self.journal_filename, 'rb') as journal_file:
+            for line in journal_file:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("entry was not finished")
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                complete_bytes += len(line)
+                self.journal_entries += 1
+                if entry['sequence'] > self.snapshot_sequence:
+                    self.apply(entry)
+                    self.sequence = entry['sequence']
+        if complete_bytes < os.path.getsize(self.journal_filename):
+            os.truncate(self.journal_filename, complete_bytes)
+
+    def apply(self, entry: dict):
+        """
+        Method to make the change described by a journal entry to the budget
+
+        :param entry: journal entry
+        :type entry: dict
+        :return: None
+        """
+        event = entry['event']
+        if event == 'add_transaction':
+            self.budget.add_transaction(self.budget.load_transaction(entry['transaction']))
+        elif event == 'update_transaction':
+            transaction = self.budget.get_transaction(entry['transaction']['transaction_id'])
+            if transaction is None:
+                return
+            for attribute, value in entry['transaction'].items():
+                if attribute != 'transaction_id' and transaction.get(attribute) != value:
+                    self.budget.update_transaction(transaction, attribute, value)
+        elif event == 'delete_transaction':
+            transaction = self.budget.get_transaction(entry['transaction_id'])
+            if transaction is not None:
+                self.budget.delete_transaction(transaction)
+        elif event == 'add_goal':
+            self.budget.add_expense_goal(load_goal(entry['goal']))
+        elif event == 'update_goal':
+            goal = self.budget.get_expense_goal(entry['goal']['name'])
+            for attribute in goal_attributes:
+                if goal.get(attribute) != entry['goal'][attribute]:
+                    self.budget.update_expense_goal(goal.name, attribute, entry['goal'][attribute])
+        elif event == 'delete_goal':
+            self.budget.delete_expense_goal(entry['name'])
+        elif event == 'rename_goal':
+            self.budget.rename_expense_goal(entry['name'], entry['new_name'])
+        elif event == 'categories':
+            self.budget.set_categories(entry['categories'])
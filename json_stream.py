@@ -0,0 +1,140 @@
+"""
+Module containing an incremental reader for large JSON files
+"""
+
+
+import codecs
+import json
+import os
+from collections.abc import Iterator
+from typing import Callable
+
+
+# characters that can continue a JSON number
+NUMBER_CHARACTERS: str = '0123456789+-.eE'
+
+
+class JsonStreamReader:
+    """
+    Reads the top level object of a JSON file a chunk at a time. Members whose value is an array are handed out one
+    element at a time, so only one element needs to be in memory at once no matter how large the file is.
+    """
+
+    def __init__(self, filename: str, chunk_size: int = 1 << 16, progress: Callable[[int, int], None] = None):
+        """
+        Init
+
+        :param filename: filename, including path, of the JSON file
+        :type filename: str
+        :param chunk_size: number of bytes to read at a time
+        :type chunk_size: int
+        :param progress: function called with (bytes read, total bytes) after each chunk is read
+        :type progress: Callable[[int, int], None]
+        """
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.total_bytes: int = os.path.getsize(filename)
+        self.bytes_read: int = 0
+        self.buffer: str = ""
+        self.pos: int = 0
+        self.eof: bool = False
+        self.file = None
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json_decoder = json.JSONDecoder()
+
+    def fill(self):
+        """
+        Method to read the next chunk of the file into the buffer, dropping the part already parsed
+
+        :return: bool - True if more text was read, False at the end of the file
+        :rtype: bool
+        """
+        if self.eof:
+            return False
+        raw = self.file.read(self.chunk_size)
+        self.bytes_read += len(raw)
+        self.eof = not raw
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(raw, final=self.eof)
+        self.pos = 0
+        if self.progress:
+            self.progress(self.bytes_read, self.total_bytes)
+        return not self.eof
+
+    def next_char(self):
+        """
+        Method to skip whitespace and get the next character without consuming it
+
+        :return: str - next character, empty string at the end of the file
+        :rtype: str
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, characters: str):
+        """
+        Method to consume the next character, which must be one of the given characters
+
+        :param characters: characters allowed next
+        :type characters: str
+        :return: str - character consumed
+        :rtype: str
+        """
+        char = self.next_char()
+        if not char or char not in characters:
+            raise ValueError(f"Invalid JSON in {self.filename}: expected one of {characters!r} at byte "
+                             f"{self.bytes_read}, found {char!r}")
+        self.pos += 1
+        return char
+
+    def decode_value(self):
+        """
+        Method to decode the next complete JSON value, reading more of the file until the value is complete
+
+        :return: decoded value
+        """
+        self.next_char()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # a number near the end of the buffer may continue in the next chunk. The decoder stops before a
+            # trailing '.', 'e' or sign it can't use yet, so "12." decodes as 12 with the '.' left over
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and not self.buffer[end:].strip(NUMBER_CHARACTERS) and self.fill()):
+                continue
+            self.pos = end
+            return value
+
+    def __iter__(self) -> Iterator[tuple[str, object]]:
+        """
+        Iterate over (key, value) pairs of the top level object. For array members, one pair is yielded per element
+
+        :return: iterator of (key, value) pairs
+        """
+        with open(self.filename, 'rb') as self.file:
+            self.expect('{')
+            if self.next_char() == '}':
+                return
+            while True:
+                key = self.decode_value()
+                self.expect(':')
+                if self.next_char() == '[':
+                    self.pos += 1
+                    if self.next_char() == ']':
+                        self.pos += 1
+                    else:
+                        while True:
+                            yield key, self.decode_value()
+                            if self.expect(',]') == ']':
+                                break
+                else:
+                    yield key, self.decode_value()
+                if self.expect(',}') == '}':
+                    return
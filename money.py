@@ -0,0 +1,61 @@
+"""
+Module containing helpers for money amounts. Amounts are held as integer cents so running totals stay exact
+"""
+
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+
+def to_cents(amount: float | int | str | Decimal | None):
+    """
+    Function to convert an amount in dollars to integer cents, rounding half a cent up
+
+    :param amount: amount in dollars
+    :type amount: float | int | str | Decimal | None
+    :return: int - amount in cents, None if amount is None
+    :rtype: int | None
+    """
+    if amount is None:
+        return None
+    if isinstance(amount, bool):
+        raise ValueError(f"Invalid amount ({amount}). Amounts must be numbers")
+    if isinstance(amount, int):
+        return amount * 100
+    if isinstance(amount, float):
+        # repr gives the shortest text that reads back as the same float, so 1.005 rounds from 1.005 and not from
+        # the float just below it, which amount * 100 would give. float() first, as numpy floats repr with their type
+        amount = repr(float(amount))
+    try:
+        return int((Decimal(str(amount).strip()) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount ({amount}). Amounts must be numbers")
+
+
+def from_cents(cents: int | None):
+    """
+    Function to convert integer cents to an amount in dollars
+
+    :param cents: amount in cents
+    :type cents: int | None
+    :return: float - amount in dollars, None if cents is None
+    :rtype: float | None
+    """
+    if cents is None:
+        return None
+    return cents / 100
+
+
+def format_cents(cents: int | None):
+    """
+    Function to format integer cents as a dollar amount with two decimal places, without going through a float
+
+    :param cents: amount in cents
+    :type cents: int | None
+    :return: str - amount in dollars (e.g. '-12.05'), empty string if cents is None
+    :rtype: str
+    """
+    if cents is None:
+        return ''
+    sign = '-' if cents < 0 else ''
+    dollars, cents = divmod(abs(cents), 100)
+    return f'{sign}{dollars}.{cents:02d}'
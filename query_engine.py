@@ -0,0 +1,391 @@
+"""
+Module containing the query engine used by the budget to look up transactions
+"""
+
+
+from bisect import bisect_left, bisect_right
+from operator import attrgetter, itemgetter
+from typing import Callable
+from transaction import Transaction
+
+
+class SortedIndex:
+    """
+    Transactions kept in order of a sort key using bisect-maintained parallel lists, so a range of keys is found in
+    O(log n) and returned as a slice. Batches added with add_many are held back and sorted in the next time the
+    index is used, so a load made of many batches sorts once.
+    """
+
+    def __init__(self, key_func: Callable[[Transaction], object]):
+        """
+        Init
+
+        :param key_func: function returning the sort key of a transaction, or None to leave it out of the index
+        :type key_func: Callable[[Transaction], object]
+        """
+        self.key_func = key_func
+        self.keys: list[tuple] = []  # (sort key, transaction id) pairs in ascending order
+        self.transactions: list[Transaction] = []  # transactions in the same order as self.keys
+        self.pending: list[tuple] = []  # ((sort key, transaction id), transaction) pairs not sorted in yet
+
+    def __len__(self):
+        return len(self.keys) + len(self.pending)
+
+    def add(self, transaction: Transaction):
+        """
+        Method to insert a transaction at its sorted position. Transactions with equal keys are ordered by id
+
+        :param transaction: transaction to insert
+        :type transaction: Transaction
+        :return: None
+        """
+        key = self.key_func(transaction)
+        if key is None:
+            return
+        self.flush()
+        entry = (key, transaction.transaction_id)
+        position = bisect_left(self.keys, entry)
+        self.keys.insert(position, entry)
+        self.transactions.insert(position, transaction)
+
+    def add_many(self, transactions: list[Transaction]):
+        """
+        Method to insert a batch of transactions. They are sorted in when the index is next used
+
+        :param transactions: transactions to insert
+        :type transactions: list[Transaction]
+        :return: None
+        """
+        self.pending.extend(((key, transaction.transaction_id), transaction)
+                            for key, transaction in zip(map(self.key_func, transactions), transactions)
+                            if key is not None)
+
+    def flush(self):
+        """
+        Method to sort pending batches into the index
+
+        :return: None
+        """
+        if not self.pending:
+            return
+        pairs = self.pending
+        self.pending = []
+        if self.keys:
+            # the existing entries are one sorted run, which the sort merges with the new ones cheaply
+            pairs = list(zip(self.keys, self.transactions)) + pairs
+        pairs.sort(key=itemgetter(0))
+        self.keys = list(map(itemgetter(0), pairs))
+        self.transactions = list(map(itemgetter(1), pairs))
+
+    def remove(self, transaction: Transaction):
+        """
+        Method to remove a transaction from the index. Must be called before the transaction's sort key changes
+
+        :param transaction: transaction to remove
+        :type transaction: Transaction
+        :return: None
+        """
+        key = self.key_func(transaction)
+        if key is None:
+            return
+        self.flush()
+        entry = (key, transaction.transaction_id)
+        position = bisect_left(self.keys, entry)
+        if position < len(self.keys) and self.keys[position] == entry:
+            del self.keys[position]
+            del self.transactions[position]
+
+    def range(self, lo=None, hi=None):
+        """
+        Method to get the transactions with lo <= key <= hi, in key order
+
+        :param lo: lowest key to include, None for no lower bound
+        :param hi: highest key to include, None for no upper bound
+        :return: [Transaction] - transactions in the range
+        :rtype: list[Transaction]
+        """
+        self.flush()
+        start = 0 if lo is None else bisect_left(self.keys, (lo,))
+        end = len(self.keys) if hi is None else bisect_right(self.keys, (hi, float('inf')))
+        return self.transactions[start:end]
+
+
+class DuplicateIndex:
+    """
+    Fingerprints of transactions, for spotting the same transaction imported twice. A fingerprint is
+    (date, amount, vendor, type), and transactions are also grouped by (amount, type) and then date, so transactions
+    with the same amount within a few days of each other are found with a handful of hash lookups.
+    """
+
+    def __init__(self):
+        """
+        Init
+        """
+        self.exact: dict[tuple, dict[int, Transaction]] = {}  # fingerprint -> transactions with that fingerprint
+        # (amount in cents, type) -> date ordinal -> transactions
+        self.by_amount: dict[tuple, dict[int | None, dict[int, Transaction]]] = {}
+
+    @staticmethod
+    def fingerprint(transaction: Transaction):
+        """
+        Function to get the fingerprint of a transaction. Vendor and type are compared case-insensitively
+
+        :param transaction: transaction to fingerprint
+        :type transaction: Transaction
+        :return: tuple - (date ordinal, amount in cents, vendor, type)
+        :rtype: tuple
+        """
+        return (transaction.date_ordinal, transaction.amount_cents, (transaction.vendor or '').strip().lower(),
+                (transaction.transaction_type or '').lower())
+
+    def add(self, transaction: Transaction):
+        """
+        Method to add a transaction's fingerprint
+
+        :param transaction: transaction to add
+        :type transaction: Transaction
+        :return: None
+        """
+        date, cents, _, transaction_type = fingerprint = self.fingerprint(transaction)
+        self.exact.setdefault(fingerprint, {})[transaction.transaction_id] = transaction
+        self.by_amount.setdefault((cents, transaction_type), {}).setdefault(date, {})[
+            transaction.transaction_id] = transaction
+
+    def add_many(self, transactions: list[Transaction]):
+        """
+        Method to add the fingerprints of a batch of transactions
+
+        :param transactions: transactions to add
+        :type transactions: list[Transaction]
+        :return: None
+        """
+        exact = self.exact
+        by_amount = self.by_amount
+        for transaction in transactions:
+            transaction_id = transaction.transaction_id
+            date = transaction.date_ordinal
+            cents = transaction.amount_cents
+            transaction_type = (transaction.transaction_type or '').lower()
+            fingerprint = (date, cents, (transaction.vendor or '').strip().lower(), transaction_type)
+            bucket = exact.get(fingerprint)
+            if bucket is None:
+                bucket = exact[fingerprint] = {}
+            bucket[transaction_id] = transaction
+            dates = by_amount.get((cents, transaction_type))
+            if dates is None:
+                dates = by_amount[(cents, transaction_type)] = {}
+            bucket = dates.get(date)
+            if bucket is None:
+                bucket = dates[date] = {}
+            bucket[transaction_id] = transaction
+
+    def remove(self, transaction: Transaction):
+        """
+        Method to remove a transaction's fingerprint. Must be called before the transaction's date, amount, vendor or
+        type changes
+
+        :param transaction: transaction to remove
+        :type transaction: Transaction
+        :return: None
+        """
+        date, cents, _, transaction_type = fingerprint = self.fingerprint(transaction)
+        bucket = self.exact.get(fingerprint)
+        if bucket is not None:
+            bucket.pop(transaction.transaction_id, None)
+            if not bucket:
+                del self.exact[fingerprint]
+        dates = self.by_amount.get((cents, transaction_type))
+        if dates is not None and date in dates:
+            dates[date].pop(transaction.transaction_id, None)
+            if not dates[date]:
+                del dates[date]
+            if not dates:
+                del self.by_amount[(cents, transaction_type)]
+
+    def find(self, transaction: Transaction, window_days: int = 0):
+        """
+        Method to get the indexed transactions that look like duplicates of a transaction
+
+        :param transaction: transaction to check
+        :type transaction: Transaction
+        :param window_days: 0 to match date, amount, vendor and type exactly. Otherwise transactions of the same
+         amount and type dated up to window_days either side also match, whatever their vendor
+        :type window_days: int
+        :return: [Transaction] - matching transactions, exact matches first, not including transaction itself
+        :rtype: list[Transaction]
+        """
+        date, cents, _, transaction_type = fingerprint = self.fingerprint(transaction)
+        matches = dict(self.exact.get(fingerprint, {}))
+        if window_days and date is not None:
+            dates = self.by_amount.get((cents, transaction_type), {})
+            for offset in sorted(range(-window_days, window_days + 1), key=abs):
+                for transaction_id, match in dates.get(date + offset, {}).items():
+                    matches.setdefault(transaction_id, match)
+        matches.pop(transaction.transaction_id, None)
+        return list(matches.values())
+
+
+class TransactionIndex:
+    """
+    Secondary hash indexes over the transactions held in a budget.
+
+    Each indexed attribute maps a value to an insertion ordered dict of the transactions holding that value, keyed by
+    transaction id, so a lookup costs O(matches) instead of a scan over every transaction in the budget.
+    """
+
+    # attributes that get a hash index
+    indexed_keys: tuple[str, ...] = ('transaction_type', 'category', 'vendor', 'expense_goal', 'date')
+    # attributes the budget already treats case-insensitively ("Expense" == "expense", goal keys are lowercase)
+    case_insensitive_keys: tuple[str, ...] = ('transaction_type', 'expense_goal')
+    # attributes that get a sorted index for range queries, and how their sort key is found
+    range_keys: dict[str, Callable[[Transaction], object]] = {
+        'date': lambda trans: trans.date_ordinal,
+        'amount': lambda trans: trans.amount_cents,
+    }
+
+    def __init__(self):
+        """
+        Init
+        """
+        self.transactions: dict[int, Transaction] = {}  # every indexed transaction, keyed by transaction id
+        self.indexes: dict[str, dict[object, dict[int, Transaction]]] = {key: {} for key in self.indexed_keys}
+        self.sorted_indexes: dict[str, SortedIndex] = {key: SortedIndex(key_func)
+                                                       for key, key_func in self.range_keys.items()}
+        self.duplicates: DuplicateIndex = DuplicateIndex()
+
+    def __contains__(self, transaction: Transaction):
+        return transaction.transaction_id in self.transactions
+
+    def __len__(self):
+        return len(self.transactions)
+
+    def normalize(self, key: str, value):
+        """
+        Method to get the value stored in the index for a key/value pair
+
+        :param key: name of transaction attribute
+        :type key: str
+        :param value: value of attribute
+        :return: value as stored in the index
+        """
+        if key in self.case_insensitive_keys and isinstance(value, str):
+            return value.lower()
+        return value
+
+    def add(self, transaction: Transaction):
+        """
+        Method to add a transaction to every index
+
+        :param transaction: transaction to index
+        :type transaction: Transaction
+        :return: None
+        """
+        self.transactions[transaction.transaction_id] = transaction
+        for key, index in self.indexes.items():
+            value = self.normalize(key, transaction.get(key))
+            index.setdefault(value, {})[transaction.transaction_id] = transaction
+        for sorted_index in self.sorted_indexes.values():
+            sorted_index.add(transaction)
+        self.duplicates.add(transaction)
+
+    def add_many(self, transactions: list[Transaction]):
+        """
+        Method to add a batch of transactions to every index, building each sorted index once for the batch
+
+        :param transactions: transactions to index
+        :type transactions: list[Transaction]
+        :return: None
+        """
+        ids = [transaction.transaction_id for transaction in transactions]
+        for key, index in self.indexes.items():
+            values = map(attrgetter(key), transactions)
+            if key in self.case_insensitive_keys:
+                values = (value.lower() if isinstance(value, str) else value for value in values)
+            for value, transaction_id, transaction in zip(values, ids, transactions):
+                bucket = index.get(value)
+                if bucket is None:
+                    bucket = index[value] = {}
+                bucket[transaction_id] = transaction
+        self.transactions.update(zip(ids, transactions))
+        for sorted_index in self.sorted_indexes.values():
+            sorted_index.add_many(transactions)
+        self.duplicates.add_many(transactions)
+
+    def remove(self, transaction: Transaction):
+        """
+        Method to remove a transaction from every index. Must be called before the transaction's indexed
+        attributes change.
+
+        :param transaction: transaction to remove
+        :type transaction: Transaction
+        :return: bool - True if transaction was removed, False if it was not indexed
+        :rtype: bool
+        """
+        if transaction.transaction_id not in self.transactions:
+            return False
+        del self.transactions[transaction.transaction_id]
+        for key, index in self.indexes.items():
+            value = self.normalize(key, transaction.get(key))
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.pop(transaction.transaction_id, None)
+                if not bucket:
+                    del index[value]  # don't keep empty buckets for values that are gone
+        for sorted_index in self.sorted_indexes.values():
+            sorted_index.remove(transaction)
+        self.duplicates.remove(transaction)
+        return True
+
+    def query(self, **kwargs):
+        """
+        Method to get transactions matching all of the given attribute values
+
+        :param kwargs: keyword arguments (key=value) that every returned transaction must match
+        :return: [Transaction] - list of matching transactions, empty if none match
+        :rtype: list[Transaction]
+        """
+        return self.filter(None, **kwargs)
+
+    def query_range(self, field: str, lo=None, hi=None, **kwargs):
+        """
+        Method to get transactions with lo <= field <= hi, sorted by field, that also match the given attribute values
+
+        :param field: attribute with a sorted index ('date' or 'amount', with amount bounds in cents)
+        :type field: str
+        :param lo: lowest sort key to include, None for no lower bound
+        :param hi: highest sort key to include, None for no upper bound
+        :param kwargs: keyword arguments (key=value) that every returned transaction must match
+        :return: [Transaction] - list of matching transactions in field order
+        :rtype: list[Transaction]
+        """
+        return self.filter(self.sorted_indexes[field].range(lo, hi), **kwargs)
+
+    def filter(self, candidates: list[Transaction] | None, **kwargs):
+        """
+        Method to narrow candidate transactions down to those matching all of the given attribute values
+
+        :param candidates: transactions to filter, keeping their order. None to pick candidates from the indexes
+        :type candidates: list[Transaction] | None
+        :param kwargs: keyword arguments (key=value) that every returned transaction must match
+        :return: [Transaction] - list of matching transactions
+        :rtype: list[Transaction]
+        """
+        buckets = []
+        filters = []
+        for key, value in kwargs.items():
+            if key in self.indexes:
+                bucket = self.indexes[key].get(self.normalize(key, value))
+                if not bucket:
+                    return []  # nothing can match every key
+                buckets.append(bucket)
+            else:
+                filters.append((key, value))
+
+        if candidates is None:
+            # walk the smallest bucket and probe the others, so the cost is bounded by the most selective key
+            buckets.sort(key=len)
+            candidates = (buckets[0] if buckets else self.transactions).values()
+            buckets = buckets[1:]
+        return [trans for trans in candidates
+                if all(trans.transaction_id in bucket for bucket in buckets)
+                and all(trans.get(key) == value for key, value in filters)]
@@ -0,0 +1,191 @@
+"""
+Module containing the per-period aggregate rollups kept by the budget
+"""
+
+
+from date_utils import ordinal_to_month
+from money import from_cents
+from transaction import Transaction
+
+
+def period_label(month: int | None, period: str):
+    """
+    Function to get the label of the period a month number (see date_utils.ordinal_to_month) falls in
+
+    :param month: month number, None for transactions without a valid date
+    :type month: int | None
+    :param period: 'month', 'quarter' or 'year'
+    :type period: str
+    :return: str - label such as '2023-10', '2023-Q4' or '2023', None if month is None
+    :rtype: str | None
+    """
+    if month is None:
+        return None
+    year, month = divmod(month, 12)
+    if period == 'month':
+        return f'{year:04d}-{month + 1:02d}'
+    if period == 'quarter':
+        return f'{year:04d}-Q{month // 3 + 1}'
+    return f'{year:04d}'
+
+
+class Rollups:
+    """
+    Running totals of the budget's transactions per month, overall and per category, vendor and goal. Each table
+    maps (month number, value) to [expense cents, income cents, expense count, income count] and is updated in O(1)
+    as transactions are added, removed or changed, so a report never rescans the transactions.
+    """
+
+    # transaction attributes with a rollup table. None is the table of overall totals per month
+    dimensions: tuple[str | None, ...] = (None, 'category', 'vendor', 'expense_goal')
+    periods: tuple[str, ...] = ('month', 'quarter', 'year')
+    measures: tuple[str, ...] = ('expense', 'income', 'net', 'count')
+
+    def __init__(self):
+        """
+        Init
+        """
+        self.tables: dict[str | None, dict[tuple, list[int]]] = {dimension: {} for dimension in self.dimensions}
+
+    def update(self, transaction: Transaction, sign: int):
+        """
+        Method to add a transaction to (sign 1) or take it out of (sign -1) every table
+
+        :param transaction: transaction to add or take out
+        :type transaction: Transaction
+        :param sign: 1 to add, -1 to take out
+        :type sign: int
+        :return: None
+        """
+        transaction_type = transaction.transaction_type.lower()
+        if transaction_type == 'expense':
+            column = 0
+        elif transaction_type == 'income':
+            column = 1
+        else:
+            return  # only expenses and income are totalled, as in the budget totals
+        ordinal = transaction.date_ordinal
+        month = ordinal_to_month(ordinal) if ordinal else None
+        cents = transaction.amount_cents * sign
+        for dimension, table in self.tables.items():
+            value = None
+            if dimension is not None:
+                value = transaction.get(dimension)
+                if dimension == 'expense_goal' and isinstance(value, str):
+                    value = value.lower()  # goals are named case-insensitively
+            key = (month, value)
+            totals = table.get(key)
+            if totals is None:
+                totals = table[key] = [0, 0, 0, 0]
+            totals[column] += cents
+            totals[column + 2] += sign
+            if not totals[2] and not totals[3]:
+                del table[key]
+
+    def add(self, transaction: Transaction):
+        """
+        Method to add a transaction to the rollups
+
+        :param transaction: transaction to add
+        :type transaction: Transaction
+        :return: None
+        """
+        self.update(transaction, 1)
+
+    def add_many(self, transactions: list[Transaction]):
+        """
+        Method to add a batch of transactions to the rollups
+
+        :param transactions: transactions to add
+        :type transactions: list[Transaction]
+        :return: None
+        """
+        # the same work as update, with the lookups hoisted out of the loop
+        tables = [(dimension, table) for dimension, table in self.tables.items()]
+        for transaction in transactions:
+            transaction_type = transaction.transaction_type.lower()
+            if transaction_type == 'expense':
+                column = 0
+            elif transaction_type == 'income':
+                column = 1
+            else:
+                continue
+            ordinal = transaction.date_ordinal
+            month = ordinal_to_month(ordinal) if ordinal else None
+            cents = transaction.amount_cents
+            goal = transaction.expense_goal
+            values = (None, transaction.category, transaction.vendor,  # in dimensions order
+                      goal.lower() if isinstance(goal, str) else goal)
+            for (dimension, table), value in zip(tables, values):
+                key = (month, value)
+                totals = table.get(key)
+                if totals is None:
+                    totals = table[key] = [0, 0, 0, 0]
+                totals[column] += cents
+                totals[column + 2] += 1
+
+    def remove(self, transaction: Transaction):
+        """
+        Method to take a transaction out of the rollups. Must be called before the transaction changes
+
+        :param transaction: transaction to take out
+        :type transaction: Transaction
+        :return: None
+        """
+        self.update(transaction, -1)
+
+    def aggregate(self, by: str | None = 'category', period: str | None = 'month', measure: str = 'expense',
+                  start_month: int = None, end_month: int = None):
+        """
+        Method to total the rollups by period and/or attribute
+
+        :param by: attribute to group by ('category', 'vendor' or 'expense_goal'), None for no grouping
+        :type by: str | None
+        :param period: 'month', 'quarter' or 'year' to group by, None for no grouping
+        :type period: str | None
+        :param measure: 'expense', 'income' or 'net' (income less expenses) for dollars, 'count' for transactions
+        :type measure: str
+        :param start_month: first month number to include, None for no lower bound
+        :type start_month: int
+        :param end_month: last month number to include, None for no upper bound
+        :type end_month: int
+        :return: dict - totals keyed by (period label, value), period label or value depending on the grouping, in
+         period then value order. Keyed by None when there is no grouping. Transactions without a valid date are
+         under period None and left out when the months are bounded
+        :rtype: dict
+        """
+        if by not in self.dimensions:
+            raise ValueError(f"Invalid grouping ({by}). Valid groupings are {list(self.dimensions)}.")
+        if period is not None and period not in self.periods:
+            raise ValueError(f"Invalid period ({period}). Valid periods are {list(self.periods)} or None.")
+        if measure not in self.measures:
+            raise ValueError(f"Invalid measure ({measure}). Valid measures are {list(self.measures)}.")
+        bounded = start_month is not None or end_month is not None
+
+        results = {}
+        for (month, value), totals in sorted(self.tables[by].items(), key=lambda item: (
+                item[0][0] is None, item[0][0] or 0, item[0][1] is None, str(item[0][1]))):
+            if bounded and (month is None or (start_month is not None and month < start_month)
+                            or (end_month is not None and month > end_month)):
+                continue
+            if measure == 'expense' and not totals[2] or measure == 'income' and not totals[3]:
+                continue  # no transactions of the type measured
+            label = period_label(month, period) if period is not None else None
+            if by is None:
+                key = label
+            elif period is None:
+                key = value
+            else:
+                key = (label, value)
+            if measure == 'expense':
+                total = totals[0]
+            elif measure == 'income':
+                total = totals[1]
+            elif measure == 'net':
+                total = totals[1] - totals[0]
+            else:
+                total = totals[2] + totals[3]
+            results[key] = results.get(key, 0) + total
+        if measure != 'count':
+            results = {key: from_cents(total) for key, total in results.items()}
+        return results
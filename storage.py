@@ -0,0 +1,423 @@
+"""
+Module containing storage backends a budget can be saved to and loaded from
+"""
+
+
+import datetime
+from abc import ABC, abstractmethod
+import os
+import sqlite3
+from budget import Budget, load_goal
+from date_utils import to_ordinal
+from goal import Goal
+from journal import BudgetJournal
+from money import from_cents, to_cents
+from transaction import Transaction, intern_string, transaction_ids
+
+
+class StorageBackend(ABC):
+    """
+    Place a budget is saved. load adds the saved data to a budget and starts following it, after which save writes
+    the budget's changes. Subclasses implement load and save
+    """
+
+    def __init__(self, filename: str):
+        """
+        Init
+
+        :param filename: filename, including path, of the saved budget
+        :type filename: str
+        """
+        self.filename = filename
+        self.budget: Budget | None = None
+
+    #
+    # load budget (Requirement 1.3.7)
+    #
+    @abstractmethod
+    def load(self, budget: Budget):
+        """
+        Method to add the saved budget data to budget and follow its changes from then on
+
+        :param budget: budget to load into
+        :type budget: Budget
+        :return: None
+        """
+
+    #
+    # save budget (Requirement 1.3.6)
+    #
+    @abstractmethod
+    def save(self):
+        """
+        Method to save the followed budget
+
+        :return: None
+        """
+
+    def close(self):
+        """
+        Method to stop following the budget. Changes not yet saved are dropped
+
+        :return: None
+        """
+        self.budget = None
+
+
+class JsonStorage(StorageBackend):
+    """
+    The JSON save file written by Budget.save_budget. Every save rewrites the whole file
+    """
+
+    def load(self, budget: Budget):
+        self.budget = budget
+        if os.path.exists(self.filename):
+            budget.load_budget(self.filename)
+
+    def save(self):
+        self.budget.save_budget(self.filename)
+
+
+class JournalStorage(StorageBackend):
+    """
+    JSON snapshot plus an append-only journal of changes (see journal.BudgetJournal). A save writes only the changes
+    """
+
+    def __init__(self, filename: str, compact_after: int = 10000):
+        """
+        Init
+
+        :param filename: filename, including path, of the snapshot
+        :type filename: str
+        :param compact_after: number of journal entries that triggers a new snapshot
+        :type compact_after: int
+        """
+        super().__init__(filename)
+        self.compact_after = compact_after
+        self.journal: BudgetJournal | None = None
+
+    def load(self, budget: Budget):
+        self.budget = budget
+        self.journal = BudgetJournal(budget, self.filename, self.compact_after)
+        self.journal.load()
+
+    def save(self):
+        self.journal.save()
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        super().close()
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    SQLite database holding transactions, goals and categories in indexed tables. Changes to the budget are written
+    to the database as they happen and committed by save, and transactions can be queried straight from the
+    database without loading them into a budget.
+
+    Amounts are stored in integer cents and dates also as day ordinals, so amount and date ranges use the indexes.
+    Transaction type and goal name compare case-insensitively, as they do in the budget.
+    """
+
+    # transaction columns, in the order rows are read and written
+    transaction_columns: tuple[str, ...] = ('transaction_id', 'transaction_type', 'date', 'date_ordinal',
+                                            'amount_cents', 'vendor', 'category', 'note', 'expense_goal')
+    goal_columns: tuple[str, ...] = ('name', 'start_date', 'end_date', 'note', 'target_cents', 'date_spent',
+                                     'category')
+    schema: str = """
+        CREATE TABLE IF NOT EXISTS transactions (
+            transaction_id INTEGER PRIMARY KEY,
+            transaction_type TEXT COLLATE NOCASE,
+            date TEXT,
+            date_ordinal INTEGER,
+            amount_cents INTEGER,
+            vendor TEXT,
+            category TEXT,
+            note TEXT,
+            expense_goal TEXT COLLATE NOCASE
+        );
+        CREATE INDEX IF NOT EXISTS transactions_type ON transactions (transaction_type);
+        CREATE INDEX IF NOT EXISTS transactions_date ON transactions (date_ordinal);
+        CREATE INDEX IF NOT EXISTS transactions_amount ON transactions (amount_cents);
+        CREATE INDEX IF NOT EXISTS transactions_vendor ON transactions (vendor);
+        CREATE INDEX IF NOT EXISTS transactions_category ON transactions (category);
+        CREATE INDEX IF NOT EXISTS transactions_goal ON transactions (expense_goal);
+        CREATE TABLE IF NOT EXISTS goals (
+            name TEXT PRIMARY KEY COLLATE NOCASE,
+            start_date TEXT,
+            end_date TEXT,
+            note TEXT,
+            target_cents INTEGER,
+            date_spent TEXT,
+            category TEXT
+        );
+        CREATE TABLE IF NOT EXISTS categories (
+            position INTEGER PRIMARY KEY,
+            name TEXT
+        );
+    """
+
+    def __init__(self, filename: str):
+        """
+        Init. Opens the database, creating it if it does not exist
+
+        :param filename: filename, including path, of the database
+        :type filename: str
+        """
+        super().__init__(filename)
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute('PRAGMA journal_mode=WAL')  # a crash mid-save leaves the last committed save
+        self.connection.executescript(self.schema)
+        self.insert_transaction_sql = (f"INSERT OR REPLACE INTO transactions ({', '.join(self.transaction_columns)}) "
+                                       f"VALUES ({', '.join('?' * len(self.transaction_columns))})")
+        self.insert_goal_sql = (f"INSERT OR REPLACE INTO goals ({', '.join(self.goal_columns)}) "
+                                f"VALUES ({', '.join('?' * len(self.goal_columns))})")
+
+    def load(self, budget: Budget, field: str = None, lo: str | float | datetime.date = None,
+             hi: str | float | datetime.date = None, **kwargs):
+        """
+        Method to add the stored budget to budget and follow its changes from then on. Given a field or keyword
+        arguments, only the matching transactions are loaded (see query_range and get_transactions); the rest stay
+        in the database untouched by later saves, and goal amounts count only the loaded transactions
+
+        :param budget: budget to load into
+        :type budget: Budget
+        :param field: 'date' or 'amount' to load only transactions between lo and hi, None to load every date and amount
+        :type field: str
+        :param lo: lowest value of field to load, None for no lower bound
+        :type lo: str | float | datetime.date
+        :param hi: highest value of field to load, None for no upper bound
+        :type hi: str | float | datetime.date
+        :param kwargs: keyword arguments (key=value) that loaded transactions must match
+        :return: None
+        """
+        self.budget = budget
+        # transactions already in the budget are not in the database yet
+        unsaved = list(budget.transaction_index.transactions.values())
+        moved_ids = []
+        for goal in self.get_goals():
+            budget.add_expense_goal(goal)
+        if field is not None:
+            transactions = self.query_range(field, lo, hi, **kwargs)
+        else:
+            transactions = self.get_transactions(**kwargs)
+        # new transactions must not take the id of a stored transaction, loaded or not
+        last_id = self.connection.execute("SELECT MAX(transaction_id) FROM transactions").fetchone()[0]
+        if last_id is not None:
+            transaction_ids.reserve(last_id)
+        if field is not None or kwargs:
+            # a transaction in the budget may have the id of a stored one that was not loaded, which moves to a new id
+            loaded_ids = {transaction.transaction_id for transaction in transactions}
+            for transaction in unsaved:
+                if transaction.transaction_id not in loaded_ids:
+                    self.connection.execute("UPDATE transactions SET transaction_id = ? WHERE transaction_id = ?",
+                                            (next(transaction_ids), transaction.transaction_id))
+        for transaction in transactions:
+            if transaction in budget.transaction_index:
+                # id already used by a transaction in the budget, give the loaded one a new id
+                moved_ids.append(transaction.transaction_id)
+                transaction.transaction_id = next(transaction_ids)
+                unsaved.append(transaction)
+        categories = [row[0] for row in self.connection.execute("SELECT name FROM categories ORDER BY position")]
+        if categories:
+            budget.set_categories(categories)
+        budget.add_transactions(transactions)
+
+        self.connection.executemany("DELETE FROM transactions WHERE transaction_id = ?",
+                                    [(transaction_id,) for transaction_id in moved_ids])
+        self.upsert_transactions(budget.get_transaction(transaction.transaction_id) for transaction in unsaved)
+        for goal in budget.expense_goals.values():
+            self.upsert_goal(goal)
+        self.replace_categories(budget.categories)
+        budget.add_listener(self.record)
+
+    def save(self):
+        self.connection.commit()
+
+    def close(self):
+        if self.budget is not None:
+            self.budget.remove_listener(self.record)
+        self.connection.rollback()
+        self.connection.close()
+        super().close()
+
+    def record(self, event: str, subject):
+        """
+        Method called by the budget for every change (see Budget.add_listener), writing the change to the database
+
+        :param event: name of the change
+        :type event: str
+        :param subject: what changed
+        :return: None
+        """
+        if event in ('add_transaction', 'update_transaction'):
+            self.upsert_transactions([subject])
+        elif event == 'add_transactions':
+            self.upsert_transactions(subject)
+        elif event == 'delete_transaction':
+            self.connection.execute("DELETE FROM transactions WHERE transaction_id = ?", (subject.transaction_id,))
+        elif event in ('add_goal', 'update_goal'):
+            self.upsert_goal(subject)
+        elif event == 'delete_goal':
+            self.connection.execute("DELETE FROM goals WHERE name = ?", (subject.name,))
+        elif event == 'rename_goal':
+            old_name, goal = subject
+            self.connection.execute("UPDATE goals SET name = ? WHERE name = ?", (goal.name, old_name))
+        elif event == 'categories':
+            self.replace_categories(subject)
+
+    def upsert_transactions(self, transactions):
+        """
+        Method to insert transactions, replacing any stored rows with the same ids
+
+        :param transactions: transactions to write
+        :type transactions: Iterable[Transaction]
+        :return: None
+        """
+        self.connection.executemany(self.insert_transaction_sql, (
+            (t.transaction_id, t.transaction_type, t.date, t.date_ordinal, t.amount_cents, t.vendor, t.category,
+             t.note, t.expense_goal)
+            for t in transactions))
+
+    def upsert_goal(self, goal: Goal):
+        """
+        Method to insert a goal, replacing any stored goal with the same name
+
+        :param goal: goal to write
+        :type goal: Goal
+        :return: None
+        """
+        self.connection.execute(self.insert_goal_sql, (goal.name, goal.start_date, goal.end_date, goal.note,
+                                                       goal.target_cents, goal.date_spent, goal.category))
+
+    def replace_categories(self, categories: list[str]):
+        """
+        Method to replace the stored categories
+
+        :param categories: categories of the budget
+        :type categories: list[str]
+        :return: None
+        """
+        self.connection.execute("DELETE FROM categories")
+        self.connection.executemany("INSERT INTO categories (position, name) VALUES (?, ?)", enumerate(categories))
+
+    def get_goals(self):
+        """
+        Method to read the stored goals. Amounts towards the goals are rebuilt as their transactions are added
+
+        :return: [Goal] - stored goals
+        :rtype: list[Goal]
+        """
+        goals = []
+        for row in self.connection.execute(f"SELECT {', '.join(self.goal_columns)} FROM goals"):
+            goal_dict = dict(zip(self.goal_columns, row))
+            goal_dict['target_amount'] = from_cents(goal_dict.pop('target_cents'))
+            goals.append(load_goal(goal_dict))
+        return goals
+
+    def get_transactions(self, **kwargs):
+        """
+        Method to get stored transactions matching all of the given attribute values, as Budget.get_transactions does
+
+        :param kwargs: keyword arguments (key=value) that every returned transaction must match
+        :return: [Transaction] - list of matching transactions, not part of any budget
+        :rtype: list[Transaction]
+        """
+        where, parameters = self.where_clause(kwargs)
+        return self.select_transactions(where, parameters)
+
+    def query_range(self, field: str, lo: str | float | datetime.date = None, hi: str | float | datetime.date = None,
+                    **kwargs):
+        """
+        Method to get stored transactions whose date or amount falls between lo and hi (inclusive), sorted by that
+        field, as Budget.query_range does
+
+        :param field: field to query on, either 'date' or 'amount'
+        :type field: str
+        :param lo: lowest value to include, None for no lower bound
+        :type lo: str | float | datetime.date
+        :param hi: highest value to include, None for no upper bound
+        :type hi: str | float | datetime.date
+        :param kwargs: keyword arguments (key=value) that returned transactions must also match
+        :return: [Transaction] - list of matching transactions sorted by field, not part of any budget
+        :rtype: list[Transaction]
+        """
+        if field not in ('date', 'amount'):
+            raise ValueError(f"Invalid field ({field}) provided. Valid fields are ['date', 'amount'].")
+        column, convert = ('date_ordinal', to_ordinal) if field == 'date' else ('amount_cents', to_cents)
+        where, parameters = self.where_clause(kwargs)
+        conditions = [where] if where else []
+        if lo is not None:
+            conditions.append(f"{column} >= ?")
+            parameters += (convert(lo),)
+        if hi is not None:
+            conditions.append(f"{column} <= ?")
+            parameters += (convert(hi),)
+        return self.select_transactions(' AND '.join(conditions), parameters,
+                                        order_by=f"{column}, transaction_id")
+
+    def totals(self):
+        """
+        Method to get the stored budget's totals without loading its transactions
+
+        :return: (float, float) - total expenses and total income in dollars
+        :rtype: tuple[float, float]
+        """
+        row = self.connection.execute(
+            "SELECT TOTAL(CASE WHEN transaction_type = 'expense' THEN amount_cents END), "
+            "TOTAL(CASE WHEN transaction_type = 'income' THEN amount_cents END) FROM transactions").fetchone()
+        return from_cents(int(row[0])), from_cents(int(row[1]))
+
+    def where_clause(self, kwargs: dict):
+        """
+        Method to turn get_transactions keyword arguments into an SQL condition
+
+        :param kwargs: keyword arguments (key=value) to match
+        :type kwargs: dict
+        :return: (str, tuple) - condition and its parameters, empty if there are no keyword arguments
+        :rtype: tuple[str, tuple]
+        """
+        conditions = []
+        parameters = ()
+        for key, value in kwargs.items():
+            if key not in Budget.query_keys:
+                raise ValueError(f"Invalid key ({key}) provided. Valid keys are {Budget.query_keys}.")
+            if key == 'amount':
+                key, value = 'amount_cents', to_cents(value)
+            conditions.append(f"{key} = ?")  # keys are checked against query_keys above
+            parameters += (value,)
+        return ' AND '.join(conditions), parameters
+
+    def select_transactions(self, where: str, parameters: tuple, order_by: str = "transaction_id"):
+        """
+        Method to read stored transactions
+
+        :param where: SQL condition rows must meet, empty for every row
+        :type where: str
+        :param parameters: parameters of the condition
+        :type parameters: tuple
+        :param order_by: SQL ordering of the rows
+        :type order_by: str
+        :return: [Transaction] - transactions read, not part of any budget
+        :rtype: list[Transaction]
+        """
+        sql = f"SELECT {', '.join(self.transaction_columns)} FROM transactions"
+        if where:
+            sql += f" WHERE {where}"
+        transactions = []
+        for (transaction_id, transaction_type, date, _, amount_cents, vendor, category, note,
+             expense_goal) in self.connection.execute(f"{sql} ORDER BY {order_by}", parameters):
+            t = Transaction()
+            t.transaction_type = intern_string(transaction_type)
+            t.date = intern_string(date)
+            t.amount_cents = amount_cents
+            t.vendor = intern_string(vendor)
+            t.category = intern_string(category)
+            t.note = note
+            t.expense_goal = intern_string(expense_goal)
+            t.transaction_id = transaction_id
+            transaction_ids.reserve(transaction_id)
+            transactions.append(t)
+        return transactions
@@ -0,0 +1,36 @@
+"""
+Module containing the table of distinct strings used to store string columns as integer codes
+"""
+
+
+class StringTable:
+    """
+    Table of the distinct strings in a column. Rows store a small integer code instead of a string object.
+    Code 0 is always None.
+    """
+
+    def __init__(self):
+        """
+        Init
+        """
+        self.values: list[str | None] = [None]
+        self.codes: dict[str | None, int] = {None: 0}
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value: str | None):
+        """
+        Method to get the code for a string, adding it to the table if it is new
+
+        :param value: string to encode
+        :type value: str | None
+        :return: int - code for the string
+        :rtype: int
+        """
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
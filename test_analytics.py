@@ -0,0 +1,54 @@
+import pytest
+
+from analytics import Analytics
+from budget import Budget
+from tests_support import make_transaction
+
+
+def make_budget():
+    b = Budget()
+    b.add_transactions([make_transaction(date="01/10/22", amount=20, category="Groceries"),
+                        make_transaction(date="01/10/23", amount=10.10, category="Groceries"),
+                        make_transaction(date="20/10/23", amount=5, vendor="costco", category="Groceries"),
+                        make_transaction(date="02/12/23", amount=30, category="Gas"),
+                        make_transaction("Income", "05/11/23", 100, "work", "Other")])
+    return b
+
+
+def test_monthly_totals_and_moving_average():
+    analytics = Analytics(make_budget())
+    totals = analytics.monthly_totals()
+    assert len(totals) == 15
+    assert totals['2022-10'] == 20 and totals['2023-10'] == 15.10 and totals['2023-11'] == 0
+    assert analytics.monthly_totals('net')['2023-11'] == 100
+    averages = analytics.moving_average(3)
+    assert list(averages)[0] == '2022-12'
+    assert averages['2023-12'] == pytest.approx((15.10 + 0 + 30) / 3)
+    assert analytics.year_over_year()['2023-10'] == (15.10, 20, -4.9, pytest.approx(-0.245))
+    assert analytics.year_over_year()['2023-11'] == (0, 0, 0, None)
+
+
+def test_shares_and_percentiles():
+    analytics = Analytics(make_budget())
+    assert analytics.shares() == {'Gas': pytest.approx(30 / 65.10), 'Groceries': pytest.approx(35.10 / 65.10)}
+    assert analytics.shares('vendor', start="01/01/23") == {'costco': pytest.approx(5 / 45.10),
+                                                            'target': pytest.approx(40.10 / 45.10)}
+    assert analytics.percentiles((0, 50, 100)) == {0: 5, 50: pytest.approx(15.05), 100: 30}
+    by_category = analytics.percentiles((50,), by='category')
+    assert by_category == {'Groceries': {50: 10.10}, 'Gas': {50: 30}}
+    with pytest.raises(ValueError):
+        analytics.shares('note')
+
+
+def test_arrays_invalidated_on_change():
+    b = make_budget()
+    analytics = Analytics(b)
+    ledger = analytics.arrays()
+    assert analytics.arrays() is ledger
+    b.add_category("Travel")
+    assert analytics.arrays() is ledger
+    b.add_transaction(make_transaction(date="03/12/23", amount=1))
+    assert analytics.arrays() is not ledger
+    assert analytics.monthly_totals()['2023-12'] == 31
+    analytics.close()
+    assert analytics.invalidate not in b.listeners
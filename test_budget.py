@@ -1,8 +1,13 @@
+import json
+import threading
+
+import openpyxl
 import pytest
 
 from budget import Budget
 from goal import Goal
-from transaction import Transaction
+from tests_support import make_transaction
+from transaction import Transaction, TransactionIds
 
 
 def test_add_transaction_expense():
@@ -10,14 +15,14 @@ def test_add_transaction_expense():
     t = Transaction("expense", "13/10/2023", 23.23, 'target', 'clothes', "new shirt")
     b.add_transaction(t)
     print(b.expense_transactions)
-    assert t in b.expense_transactions
+    assert t.transaction_id in b.expense_transactions
 
 
 def test_add_transaction_income():
     b = Budget()
     t = Transaction("income", "13/10/2023", 23.23, 'target', 'clothes', "new shirt")
     b.add_transaction(t)
-    assert t in b.income_transactions
+    assert t.transaction_id in b.income_transactions
 
 
 def test_delete_transaction_expense():
@@ -25,7 +30,7 @@ def test_delete_transaction_expense():
     t = Transaction("expense", "13/10/2023", 23.23, 'target', 'clothes', "new shirt")
     b.add_transaction(t)
     b.delete_transaction(t)
-    assert t not in b.expense_transactions
+    assert t.transaction_id not in b.expense_transactions
 
 
 def test_delete_transaction_income():
@@ -33,7 +38,62 @@ def test_delete_transaction_income():
     t = Transaction("income", "13/10/2023", 23.23, 'target', 'clothes', "new shirt")
     b.add_transaction(t)
     b.delete_transaction(t)
-    assert t not in b.income_transactions
+    assert t.transaction_id not in b.income_transactions
+
+
+def test_transaction_ids_unique():
+    assert make_transaction().transaction_id != make_transaction().transaction_id
+
+
+def test_transaction_ids_unique_across_threads():
+    ids = TransactionIds()
+    taken = []
+
+    def take():
+        taken.extend(next(ids) for _ in range(10000))
+
+    threads = [threading.Thread(target=take) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    ids.reserve(100)
+    for thread in threads:
+        thread.join()
+    assert len(set(taken)) == len(taken) == 40000
+
+
+def test_add_transaction_twice():
+    b = Budget()
+    t = make_transaction()
+    b.add_transaction(t)
+    with pytest.raises(ValueError):
+        b.add_transaction(t)
+
+
+def test_get_transaction_by_id():
+    b = Budget()
+    t = make_transaction()
+    b.add_transaction(t)
+    assert b.get_transaction(t.transaction_id) is t
+    b.delete_transaction(t)
+    assert b.get_transaction(t.transaction_id) is None
+
+
+def test_delete_transaction_not_in_budget():
+    b = Budget()
+    assert b.delete_transaction(make_transaction()) is False
+
+
+def test_delete_transaction_unlinks_goal():
+    b = Budget()
+    g = Goal()
+    g.init_goal("Food", "01/10/23", "31/10/23", "", 100.0, "12/12/12", "Groceries")
+    b.add_expense_goal(g)
+    t = make_transaction(amount=10.0, expense_goal="food")
+    b.add_transaction(t)
+    assert t.transaction_id in g.transactions
+    b.delete_transaction(t)
+    assert g.transactions == {}
+    assert g.current_amount == 0
 
 
 def test_get_transactions_income():
@@ -44,6 +104,214 @@ def test_get_transactions_income():
     assert t in ts
 
 
+def test_get_transactions_matches_all_keys():
+    b = Budget()
+    t1 = make_transaction(vendor="target", category="Groceries")
+    t2 = make_transaction(vendor="target", category="Other")
+    t3 = make_transaction(vendor="costco", category="Groceries")
+    for t in (t1, t2, t3):
+        b.add_transaction(t)
+    assert b.get_transactions(vendor="target", category="Groceries") == [t1]
+
+
+def test_get_transactions_no_duplicates():
+    b = Budget()
+    t = make_transaction(vendor="target", category="Groceries")
+    b.add_transaction(t)
+    assert b.get_transactions(transaction_type="expense", vendor="target", amount=23.23) == [t]
+
+
+def test_get_transactions_after_delete():
+    b = Budget()
+    t = make_transaction()
+    b.add_transaction(t)
+    b.delete_transaction(t)
+    assert b.get_transactions(vendor="target") == []
+
+
+def test_get_transactions_invalid_key():
+    b = Budget()
+    with pytest.raises(ValueError):
+        b.get_transactions(colour="blue")
+
+
+def test_update_transaction_reindexes():
+    b = Budget()
+    t = make_transaction(vendor="target")
+    b.add_transaction(t)
+    b.update_transaction(t, "vendor", "costco")
+    assert b.get_transactions(vendor="target") == []
+    assert b.get_transactions(vendor="costco") == [t]
+
+
+def test_update_transaction_amount_updates_totals():
+    b = Budget()
+    t = make_transaction(amount=10.0)
+    b.add_transaction(t)
+    b.update_transaction(t, "amount", 25.0)
+    assert b.total_expenses == 25.0
+    assert b.balance == -25.0
+
+
+def test_update_transaction_expense_goal_relinks():
+    b = Budget()
+    g = Goal()
+    g.init_goal("Food", "01/10/23", "31/10/23", "", 100.0, "12/12/12", "Groceries")
+    b.add_expense_goal(g)
+    t = make_transaction(amount=10.0)
+    b.add_transaction(t)
+    b.update_transaction(t, "expense_goal", "food")
+    assert g.current_amount == 10.0
+    assert b.get_transactions(expense_goal="Food") == [t]
+    b.update_transaction(t, "expense_goal", "N/A")
+    assert g.current_amount == 0
+    assert t.transaction_id not in g.transactions
+
+
+def test_query_range_date():
+    b = Budget()
+    t1 = make_transaction(date="30/09/23")
+    t2 = make_transaction(date="15/10/23")
+    t3 = make_transaction(date="01/10/23")
+    t4 = make_transaction(date="01/11/23")
+    for t in (t1, t2, t3, t4):
+        b.add_transaction(t)
+    assert b.query_range("date", "01/10/23", "31/10/23") == [t3, t2]
+
+
+def test_query_range_amount_with_filter():
+    b = Budget()
+    t1 = make_transaction(amount=600.0)
+    t2 = make_transaction(amount=499.99)
+    t3 = make_transaction("Income", amount=900.0)
+    t4 = make_transaction(amount=500.0)
+    for t in (t1, t2, t3, t4):
+        b.add_transaction(t)
+    assert b.query_range("amount", lo=500) == [t4, t1, t3]
+    assert b.query_range("amount", lo=500, transaction_type="expense") == [t4, t1]
+
+
+def test_query_range_after_delete():
+    b = Budget()
+    t = make_transaction(date="15/10/23")
+    b.add_transaction(t)
+    b.delete_transaction(t)
+    assert b.query_range("date", "01/10/23", "31/10/23") == []
+
+
+def test_query_range_invalid_field():
+    b = Budget()
+    with pytest.raises(ValueError):
+        b.query_range("vendor", "a", "z")
+
+
+def test_totals_exact_after_many_updates():
+    b = Budget()
+    transactions = [make_transaction(amount=0.1) for _ in range(1000)]
+    for t in transactions:
+        b.add_transaction(t)
+    assert b.total_expenses == 100.0
+    for t in transactions[:999]:
+        b.delete_transaction(t)
+    assert b.expense_cents == 10
+    assert b.total_expenses == 0.1
+
+
+def test_balance():
+    b = Budget()
+    b.add_transaction(make_transaction("Income", amount=100.1))
+    b.add_transaction(make_transaction(amount=0.2))
+    assert b.balance == 99.9
+
+
+def test_goal_amounts_exact():
+    b = Budget()
+    g = Goal()
+    g.init_goal("Food", "01/10/23", "31/10/23", "", 1.0, "12/12/12", "Groceries")
+    b.add_expense_goal(g)
+    for _ in range(10):
+        b.add_transaction(make_transaction(amount=0.1, expense_goal="food"))
+    assert g.current_amount == 1.0
+    assert g.amount_left == 0
+
+
+def test_add_transactions():
+    b = Budget()
+    g = Goal()
+    g.init_goal("Food", "01/10/23", "31/10/23", "", 100.0, "12/12/12", "Groceries")
+    b.add_expense_goal(g)
+    b.add_transaction(make_transaction(date="05/10/23", amount=1.0))
+    batch = [make_transaction(date="03/10/23", amount=2.5, expense_goal="food"),
+             make_transaction("Income", date="04/10/23", amount=10.0),
+             make_transaction(date="01/10/23", amount=4.0, expense_goal="Food")]
+    assert b.add_transactions(batch) == 3
+    assert b.total_expenses == 7.5
+    assert b.total_income == 10.0
+    assert g.current_amount == 6.5
+    assert g.amount_left == 93.5
+    assert b.get_transactions(expense_goal="food") == [batch[0], batch[2]]
+    assert [t.amount for t in b.query_range("date", "01/10/23", "31/10/23")] == [4.0, 2.5, 10.0, 1.0]
+
+
+def test_add_transactions_validates_whole_batch():
+    b = Budget()
+    t = make_transaction()
+    with pytest.raises(ValueError):
+        b.add_transactions([t, t])
+    with pytest.raises(ValueError):
+        b.add_transactions([make_transaction(), "not a transaction"])
+    assert b.get_transactions() == []
+
+
+def test_save_and_load_budget(tmp_path):
+    b = Budget()
+    g = Goal()
+    g.init_goal("Food", "01/10/23", "31/10/23", "", 100.0, "12/12/12", "Groceries")
+    b.add_expense_goal(g)
+    b.add_transaction(make_transaction(amount=12.34, expense_goal="food"))
+    b.add_transaction(make_transaction("Income", amount=50.0))
+    filename = str(tmp_path / "budget.txt")
+    b.save_budget(filename)
+    loaded = Budget()
+    loaded.load_budget(filename)
+    assert loaded.total_expenses == 12.34
+    assert loaded.balance == 37.66
+    assert loaded.get_expense_goal("food").amount_left == 87.66
+    assert len(loaded.get_transactions(vendor="target")) == 2
+
+
+def test_load_budget_stream(tmp_path):
+    b = Budget()
+    g = Goal()
+    g.init_goal("Food", "01/10/23", "31/10/23", "", 100.0, "12/12/12", "Groceries")
+    b.add_expense_goal(g)
+    b.add_category("pickles")
+    for i in range(25):
+        b.add_transaction(make_transaction(amount=1.0, expense_goal="food" if i % 2 else "N/A"))
+    b.add_transaction(make_transaction("Income", amount=50.0))
+    filename = str(tmp_path / "budget.txt")
+    b.save_budget(filename)
+    loaded = Budget()
+    loaded.load_budget_stream(filename, batch_size=4)
+    assert loaded.total_expenses == 25.0
+    assert loaded.total_income == 50.0
+    assert loaded.get_expense_goal("food").current_amount == 12.0
+    assert "pickles" in loaded.categories
+
+
+def test_load_budget_stream_goals_after_transactions(tmp_path):
+    filename = str(tmp_path / "budget.txt")
+    t = make_transaction(amount=5.0, expense_goal="food")
+    g = Goal()
+    g.init_goal("Food", "01/10/23", "31/10/23", "", 100.0, "12/12/12", "Groceries")
+    with open(filename, 'w') as save_file:
+        json.dump({'expense_transactions': [t.to_dict()], 'income_transactions': [], 'goals': [g.to_dict()],
+                   'categories': ["Other"]}, save_file)
+    loaded = Budget()
+    loaded.load_budget_stream(filename)
+    assert loaded.get_expense_goal("food").current_amount == 5.0
+
+
 def test_add_category():
     b = Budget()
     b.add_category("pickles")
@@ -137,3 +405,162 @@ def test_delete_expense_goal_not_found():
     b = Budget()
     with pytest.raises(ValueError):
         b.delete_expense_goal("test")
+
+
+def test_export_transactions(tmp_path):
+    b = Budget()
+    b.add_transaction(make_transaction(amount=12.5, vendor="costco"))
+    b.add_transaction(make_transaction("Income", amount=100))
+    filename = str(tmp_path / "export.xlsx")
+    b.export_transactions(filename)
+    rows = list(openpyxl.load_workbook(filename).active.iter_rows(values_only=True))
+    assert rows[0] == Budget.export_headers
+    assert rows[1][2:4] == (12.5, "costco")
+    assert rows[2][0] == "Income"
+
+
+def test_export_empty_budget(tmp_path):
+    filename = str(tmp_path / "export.xlsx")
+    Budget().export_transactions(filename)
+    rows = list(openpyxl.load_workbook(filename).active.iter_rows(values_only=True))
+    assert rows == [Budget.export_headers]
+
+
+def test_find_duplicates():
+    b = Budget()
+    t = make_transaction(date="13/10/23", amount=9.99, vendor="Netflix")
+    b.add_transaction(t)
+    assert b.find_duplicates(make_transaction(date="13/10/23", amount=9.99, vendor="NETFLIX")) == [t]
+    assert b.find_duplicates(make_transaction(date="14/10/23", amount=9.99, vendor="Netflix")) == []
+    assert b.find_duplicates(make_transaction(date="15/10/23", amount=9.99, vendor="NFLX"), window_days=2) == [t]
+    assert b.find_duplicates(t) == []
+
+    b.update_transaction(t, "date", "20/10/23")
+    assert b.find_duplicates(make_transaction(date="20/10/23", amount=9.99, vendor="Netflix")) == [t]
+    b.delete_transaction(t)
+    assert b.find_duplicates(make_transaction(date="20/10/23", amount=9.99, vendor="Netflix")) == []
+
+
+def test_goal_date_ordinals():
+    b = Budget()
+    g = Goal()
+    g.init_goal("Car", "01/10/23", "31/12/23", "", 1000, "", "Other")
+    b.add_expense_goal(g)
+    assert (g.start_ordinal, g.end_ordinal) == (738794, 738885)
+    b.update_expense_goal("car", "end_date", "01/01/24")
+    assert g.end_ordinal == 738886
+    assert g.to_dict()['end_date'] == "01/01/24"
+
+
+def test_goal_window_aggregates():
+    b = Budget()
+    g = Goal()
+    g.init_goal("Trip", "01/10/23", "10/10/23", "", 100, "", "Other")
+    b.add_expense_goal(g)
+    inside = make_transaction(date="02/10/23", amount=20, expense_goal="trip")
+    outside = make_transaction(date="20/10/23", amount=5, expense_goal="trip")
+    b.add_transaction(inside)
+    b.add_transactions([outside, make_transaction("Income", date="03/10/23", amount=2, expense_goal="trip")])
+    assert (g.current_amount, g.window_amount, g.window_count) == (23, 18, 2)
+    assert g.burn_rate("05/10/23") == 18 / 5
+    assert g.burn_rate("31/12/23") == 18 / 10
+    assert g.burn_rate("01/09/23") is None
+    # a transaction dated after as_of does not count towards the rate up to as_of
+    later = make_transaction(date="08/10/23", amount=30, expense_goal="trip")
+    b.add_transaction(later)
+    assert g.burn_rate("05/10/23") == 18 / 5
+    assert g.burn_rate("10/10/23") == 48 / 10
+    b.delete_transaction(later)
+
+    b.update_transaction(outside, "date", "09/10/23")
+    assert (g.window_amount, g.window_count) == (23, 3)
+    b.delete_transaction(inside)
+    assert (g.window_amount, g.window_count) == (3, 2)
+    b.update_expense_goal("trip", "end_date", "05/10/23")
+    assert (g.window_amount, g.window_count) == (-2, 1)
+
+
+def test_goal_target_update_refreshes_amount_left():
+    b = Budget()
+    g = Goal()
+    g.init_goal("Trip", "01/10/23", "10/10/23", "", 100, "", "Other")
+    b.add_expense_goal(g)
+    b.add_transaction(make_transaction(date="02/10/23", amount=30, expense_goal="trip"))
+    b.update_expense_goal("trip", "target_amount", "50")
+    assert g.amount_left == 20
+
+
+def test_rename_expense_goal():
+    b = Budget()
+    g = Goal()
+    g.init_goal("Car", "01/10/23", "31/12/23", "", 100, "", "Other")
+    b.add_expense_goal(g)
+    linked = make_transaction(date="13/10/23", amount=20, expense_goal="car")
+    other = make_transaction(date="13/10/23", amount=5, expense_goal="Car Wash")
+    b.add_transactions([linked, other])
+    assert b.update_expense_goal("car", "name", "Truck") is g
+    assert b.get_expense_goal("truck") is g and "car" not in b.expense_goals
+    assert (linked.expense_goal, other.expense_goal) == ("Truck", "Car Wash")
+    assert g.current_amount == 20
+    assert b.get_transactions(expense_goal="truck") == [linked]
+    assert b.aggregate("expense_goal", None) == {"car wash": 5, "truck": 20}
+    g2 = Goal()
+    g2.init_goal("Boat", "01/10/23", "31/12/23", "", 100, "", "Other")
+    b.add_expense_goal(g2)
+    with pytest.raises(ValueError):
+        b.rename_expense_goal("truck", "BOAT")
+
+
+def test_delete_expense_goal_unlinks_transactions():
+    b = Budget()
+    g = Goal()
+    g.init_goal("Car", "01/10/23", "31/12/23", "", 100, "", "Other")
+    b.add_expense_goal(g)
+    linked = make_transaction(amount=20, expense_goal="car")
+    other = make_transaction(amount=5, expense_goal="Car Wash")
+    b.add_transactions([linked, other])
+    assert b.delete_expense_goal("CAR") == [linked]
+    assert (linked.expense_goal, other.expense_goal) == ("N/A", "Car Wash")
+    assert b.get_transactions(expense_goal="car") == []
+
+
+def test_save_budget_progress_and_cancel(tmp_path):
+    b = Budget()
+    for _ in range(3):
+        b.add_transaction(make_transaction())
+    filename = str(tmp_path / "budget.txt")
+    reports = []
+    b.save_budget(filename, progress=lambda done, total: reports.append((done, total)))
+    # six default categories and three transactions
+    assert reports[0] == (0, 9) and reports[-1] == (9, 9)
+    with open(filename) as save_file:
+        assert save_file.read() == json.dumps(b.to_dict())
+
+    def cancel(done, total):
+        raise KeyboardInterrupt
+
+    b.add_transaction(make_transaction())
+    with pytest.raises(KeyboardInterrupt):
+        b.save_budget(filename, progress=cancel)
+    with open(filename) as save_file:
+        assert len(json.load(save_file)['expense_transactions']) == 3
+    assert not (tmp_path / "budget.txt.tmp").exists()
+
+
+def test_read_budget_file_then_add(tmp_path):
+    b = Budget()
+    g = Goal()
+    g.init_goal("Food", "01/10/23", "31/10/23", "", 100.0, "12/12/12", "Groceries")
+    b.add_expense_goal(g)
+    saved = make_transaction(amount=12.34, expense_goal="food")
+    b.add_transaction(saved)
+    filename = str(tmp_path / "budget.txt")
+    b.save_budget(filename)
+    loaded = Budget()
+    budget_data = loaded.read_budget_file(filename)
+    assert loaded.get_transactions(vendor="target") == []
+    loaded.add_transaction(saved)  # takes the saved id after the file was read
+    loaded.add_budget_data(budget_data)
+    assert loaded.total_expenses == 24.68
+    assert loaded.get_expense_goal("food").current_amount == 12.34
+    assert len(loaded.get_transactions(vendor="target")) == 2
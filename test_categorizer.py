@@ -0,0 +1,72 @@
+import pytest
+
+from budget import Budget
+from categorizer import Categorizer
+from tests_support import make_transaction
+
+
+def test_rule_precedence():
+    c = Categorizer()
+    c.add_rules([('keyword', 'coffee', 'Dining'),
+                 ('regex', r'shell\s+#?\d+', 'Gas'),
+                 ('prefix', 'amzn', 'Shopping'),
+                 ('prefix', 'amzn prime', 'Entertainment'),
+                 ('exact', 'Amzn Fresh', 'Groceries'),
+                 ('keyword', 'market', 'Groceries')])
+    assert c.categorize("AMZN Mktp US") == "Shopping"
+    assert c.categorize("amzn prime video") == "Entertainment"
+    assert c.categorize("amzn fresh") == "Groceries"
+    assert c.categorize("Blue Bottle Coffee") == "Dining"
+    assert c.categorize("SHELL #1234") == "Gas"
+    assert c.categorize("Unknown vendor") is None
+
+
+def test_earliest_match_wins():
+    c = Categorizer()
+    c.add_rule('keyword', 'market', 'Groceries')
+    c.add_rule('regex', r'coffee\s*co', 'Dining')
+    c.add_rule('keyword', 'coffee', 'Entertainment')
+    assert c.categorize("coffee co market") == "Dining"
+    assert c.categorize("coffee market") == "Entertainment"
+    assert c.categorize("market coffee co") == "Groceries"
+
+
+def test_regex_rules_that_cannot_be_combined():
+    c = Categorizer()
+    c.add_rule('regex', r'(?x) shell \s+ \d+', 'Gas')
+    c.add_rule('regex', r'(a)\1', 'Groceries')
+    c.add_rule('regex', r'(?P<letter>b)(?P=letter)', 'Dining')
+    c.add_rule('regex', r'coffee', 'Entertainment')
+    assert c.categorize("SHELL 42") == "Gas"
+    assert c.categorize("aa") == "Groceries"
+    assert c.categorize("bb") == "Dining"
+    assert c.categorize("ab bb coffee") == "Dining"
+    assert c.categorize("coffee bb") == "Entertainment"
+    assert c.categorize("ab") is None
+    with pytest.raises(ValueError):
+        c.add_rule('regex', r'(unclosed', 'Gas')
+
+
+def test_rules_cached_and_cleared():
+    c = Categorizer()
+    c.add_rule('keyword', 'uber', 'Gas')
+    assert c.categorize("Uber Trip") == "Gas"
+    c.add_rule('exact', 'uber trip', 'Entertainment')
+    assert c.categorize("Uber Trip") == "Entertainment"
+
+
+def test_budget_categorize_transactions(tmp_path):
+    rules = tmp_path / "rules.csv"
+    rules.write_text("kind,pattern,category\nkeyword,netflix,Subscriptions\nprefix,shell,Gas\n")
+    b = Budget()
+    assert b.load_category_rules(str(rules)) == 2
+    assert "Subscriptions" in b.categories
+
+    netflix = make_transaction(vendor="NETFLIX.COM")
+    chosen = make_transaction(vendor="Shell Oil", category="Rent/Housing")
+    b.add_transactions([netflix, chosen, make_transaction(vendor="corner store")])
+    assert b.categorize_transactions() == 1
+    assert b.get_transactions(category="Subscriptions") == [netflix]
+    assert chosen.category == "Rent/Housing"
+    assert b.categorize_transactions(overwrite=True) == 1
+    assert b.get_transactions(category="Gas") == [chosen]
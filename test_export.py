@@ -0,0 +1,51 @@
+import csv
+
+from budget import Budget
+from export import iter_row_groups, read_columnar, write_columnar
+from tests_support import make_transaction
+
+
+def test_export_csv(tmp_path):
+    b = Budget()
+    b.add_transaction(make_transaction(amount=0.1))
+    b.add_transaction(make_transaction("Income", amount=1234.5, vendor="work, inc"))
+    filename = str(tmp_path / "export.csv")
+    assert b.export_csv(filename) == 2
+    with open(filename, newline='') as csv_file:
+        rows = list(csv.reader(csv_file))
+    assert tuple(rows[0]) == Budget.export_headers
+    assert rows[1][2] == "0.10"
+    assert rows[2][2:4] == ["1234.50", "work, inc"]
+
+
+def test_export_columnar_round_trip(tmp_path):
+    b = Budget()
+    transactions = [make_transaction(date="01/10/23", amount=10, vendor="a"),
+                    make_transaction(date="02/10/23", amount=20, vendor="b", category="Gas"),
+                    make_transaction("Income", "bad date", 30, "a")]
+    b.add_transactions(transactions)
+    filename = str(tmp_path / "export.btc")
+    assert b.export_columnar(filename) == 3
+
+    columns = read_columnar(filename)
+    assert list(columns['transaction_id']) == [t.transaction_id for t in transactions]
+    assert list(columns['amount_cents']) == [1000, 2000, 3000]
+    assert columns['vendor'] == ["a", "b", "a"]
+    assert columns['category'] == ["Other", "Gas", "Other"]
+    assert columns['transaction_type'] == ["Expense", "Expense", "Income"]
+    assert columns['date'] == ["01/10/23", "02/10/23", None]
+
+
+def test_export_columnar_row_groups(tmp_path):
+    filename = str(tmp_path / "export.btc")
+    write_columnar((make_transaction(amount=i) for i in range(5)), filename, row_group_size=2)
+    groups = list(iter_row_groups(filename))
+    assert [len(group['amount_cents']) for group in groups] == [2, 2, 1]
+    values, codes = groups[0]['vendor']
+    assert values[codes[0]] == "target"
+
+
+def test_export_columnar_empty(tmp_path):
+    filename = str(tmp_path / "export.btc")
+    assert Budget().export_columnar(filename) == 0
+    assert list(read_columnar(filename)['amount_cents']) == []
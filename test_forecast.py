@@ -0,0 +1,49 @@
+import pytest
+
+from budget import Budget
+from forecast import GoalForecaster
+from tests_support import make_goal, make_transaction
+
+
+def test_forecast_projects_target_and_overrun():
+    b = Budget()
+    b.add_expense_goal(make_goal("Trip", end_date="31/10/23", target_amount=100))
+    b.add_transactions([make_transaction(date=f"0{day}/10/23", amount=10, expense_goal="trip") for day in range(1, 6)])
+    projection = GoalForecaster(b).forecast("05/10/23")["trip"]
+    assert projection.daily_rate == pytest.approx(10)
+    assert projection.projected_date == "10/10/23"
+    assert projection.projected_total == 310
+    assert projection.overrun == 210
+    assert not projection.reached
+
+
+def test_forecast_reached_idle_and_not_started():
+    b = Budget()
+    b.add_expense_goal(make_goal("Trip", end_date="31/10/23", target_amount=100))
+    b.add_expense_goal(make_goal("Idle", end_date="31/10/23", target_amount=50))
+    b.add_expense_goal(make_goal("Later", "01/12/23", "31/12/23", target_amount=100))
+    b.add_transactions([make_transaction(date="02/10/23", amount=60, expense_goal="trip"),
+                        make_transaction(date="04/10/23", amount=60, expense_goal="trip"),
+                        make_transaction(date="20/11/23", amount=500, expense_goal="trip")])
+    projections = GoalForecaster(b).forecast("06/10/23")
+    assert projections["trip"].reached and projections["trip"].projected_date == "04/10/23"
+    assert projections["idle"].projected_date is None and projections["idle"].overrun == -50
+    assert projections["later"].daily_rate is None and projections["later"].projected_date is None
+
+
+def test_forecast_cache_follows_goal_changes():
+    b = Budget()
+    b.add_expense_goal(make_goal("Trip", end_date="31/10/23", target_amount=100))
+    b.add_expense_goal(make_goal("Other", end_date="31/10/23", target_amount=100))
+    b.add_transaction(make_transaction(date="01/10/23", amount=20, expense_goal="trip"))
+    forecaster = GoalForecaster(b)
+    first = forecaster.forecast("05/10/23")
+    assert forecaster.forecast("05/10/23")["trip"] is first["trip"]
+    b.add_transaction(make_transaction(date="03/10/23", amount=20, expense_goal="trip"))
+    second = forecaster.forecast("05/10/23")
+    assert second["trip"] is not first["trip"] and second["other"] is first["other"]
+    assert second["trip"].spent_cents == 4000
+    b.delete_expense_goal("other")
+    assert list(forecaster.forecast("05/10/23")) == ["trip"]
+    with pytest.raises(ValueError):
+        forecaster.forecast_goal("other")
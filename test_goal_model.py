@@ -0,0 +1,38 @@
+from budget import Budget
+from goal_model import GoalListModel
+from tests_support import make_goal
+
+
+def names(model):
+    return [model.index(row).data() for row in range(model.rowCount())]
+
+
+def test_goal_list_follows_budget():
+    b = Budget()
+    b.add_expense_goal(make_goal("Trip"))
+    model = GoalListModel(b)
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    for name in ("Car", "Car Wash", "Boat"):
+        b.add_expense_goal(make_goal(name))
+    assert inserted == [(2, 2), (3, 3), (4, 4)]
+    assert names(model) == ["N/A", "trip", "car", "car wash", "boat"]
+    b.rename_expense_goal("car", "Van")
+    b.delete_expense_goal("trip")
+    assert names(model) == ["N/A", "van", "car wash", "boat"]
+    b.delete_expense_goal("car wash")
+    b.rename_expense_goal("boat", "Yacht")
+    assert names(model) == ["N/A", "van", "yacht"]
+
+
+def test_row_of_after_deletes():
+    b = Budget()
+    for number in range(20):
+        b.add_expense_goal(make_goal(f"Goal {number}"))
+    model = GoalListModel(b)
+    for number in (5, 0, 19, 12):
+        b.delete_expense_goal(f"goal {number}")
+    b.add_expense_goal(make_goal("New"))
+    b.rename_expense_goal("goal 13", "Thirteen")
+    assert all(model.row_of(name) == row for row, name in enumerate(names(model)))
+    assert model.row_of("goal 5") is None
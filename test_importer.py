@@ -0,0 +1,91 @@
+from budget import Budget
+from importer import import_statement, normalize_amount, normalize_date
+from tests_support import make_transaction
+
+
+def test_normalize_amount():
+    assert normalize_amount("$1,234.50") == 123450
+    assert normalize_amount("(12.05)") == -1205
+    assert normalize_amount("-3") == -300
+
+
+def test_normalize_date():
+    assert normalize_date("2023-10-13") == "13/10/23"
+    assert normalize_date("13/10/2023") == "13/10/23"
+    assert normalize_date("20231013") == "13/10/23"
+
+
+def test_import_csv(tmp_path):
+    filename = tmp_path / "statement.csv"
+    filename.write_text("Date,Description,Amount\n"
+                        "2023-10-01,Coffee Shop,-4.50\n"
+                        "2023-10-02,Payroll,\"1,000.00\"\n"
+                        "not a date,Broken,-1.00\n"
+                        "2023-10-03,Grocer,-20.10\n")
+    b = Budget()
+    report = import_statement(b, str(filename), batch_size=2)
+    assert report.rows_read == 4
+    assert report.rows_imported == 3
+    assert report.errors[0][0] == 4
+    assert b.total_expenses == 24.60
+    assert b.total_income == 1000
+    assert b.get_transactions(vendor="Payroll")[0].date == "02/10/23"
+
+
+def test_import_csv_debit_credit_columns(tmp_path):
+    filename = tmp_path / "statement.csv"
+    filename.write_text("Posted Date,Payee,Debit,Credit\n"
+                        "01/10/2023,Rent,800.00,\n"
+                        "02/10/2023,Refund,,15.00\n")
+    b = Budget()
+    import_statement(b, str(filename))
+    assert b.total_expenses == 800
+    assert b.total_income == 15
+
+
+def test_import_budget_csv_export(tmp_path):
+    b = Budget()
+    b.add_transaction(make_transaction("Expense", amount=12.5, vendor="target", category="Groceries"))
+    b.add_transaction(make_transaction("Income", amount=100, vendor="work"))
+    filename = str(tmp_path / "export.csv")
+    b.export_csv(filename)
+
+    imported = Budget()
+    import_statement(imported, filename)
+    assert imported.total_expenses == 12.5
+    assert imported.total_income == 100
+    assert imported.get_transactions(vendor="target")[0].category == "Groceries"
+
+
+def test_import_ofx(tmp_path):
+    filename = tmp_path / "statement.ofx"
+    filename.write_text("OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n"
+                        "<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>20231001120000[-5:EST]\n<TRNAMT>-12.34\n"
+                        "<FITID>1\n<NAME>Gas Station\n<MEMO>fuel\n</STMTTRN>\n"
+                        "<STMTTRN><TRNTYPE>CREDIT</TRNTYPE><DTPOSTED>20231002</DTPOSTED><TRNAMT>50.00</TRNAMT>"
+                        "<FITID>2</FITID><NAME>Transfer</NAME></STMTTRN>\n"
+                        "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+    b = Budget()
+    report = import_statement(b, str(filename))
+    assert report.rows_imported == 2
+    gas = b.get_transactions(vendor="Gas Station")[0]
+    assert (gas.transaction_type, gas.date, gas.amount, gas.note) == ("Expense", "01/10/23", 12.34, "fuel")
+    assert b.total_income == 50
+
+
+def test_import_overlapping_statements(tmp_path):
+    first = tmp_path / "september.csv"
+    first.write_text("Date,Description,Amount\n"
+                     "2023-09-30,Coffee,-4.50\n"
+                     "2023-10-01,Coffee,-4.50\n")
+    second = tmp_path / "october.csv"
+    second.write_text("Date,Description,Amount\n"
+                      "2023-10-01,Coffee,-4.50\n"
+                      "2023-10-01,Coffee,-4.50\n"
+                      "2023-10-02,Grocer,-20.00\n")
+    b = Budget()
+    import_statement(b, str(first), dedupe=True)
+    report = import_statement(b, str(second), dedupe=True)
+    # one of the two coffees on the 1st was already imported, the second is a new purchase
+    assert (report.rows_imported, report.rows_skipped) == (2, 1)
+    assert b.total_expenses == 33.50
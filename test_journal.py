@@ -0,0 +1,125 @@
+import json
+import os
+
+from budget import Budget
+from journal import BudgetJournal
+from tests_support import make_goal, make_transaction
+
+
+def reload(filename):
+    b = Budget()
+    journal = BudgetJournal(b, filename)
+    journal.load()
+    return b, journal
+
+
+def test_journal_round_trip(tmp_path):
+    filename = str(tmp_path / "budget.txt")
+    b, journal = reload(filename)
+    b.add_expense_goal(make_goal())
+    kept = make_transaction(expense_goal="car")
+    removed = make_transaction(amount=5)
+    b.add_transactions([kept, removed, make_transaction("Income", amount=100)])
+    journal.save()
+
+    b.update_transaction(kept, "amount", 50)
+    b.update_transaction(kept, "vendor", "costco")
+    b.delete_transaction(removed)
+    b.update_expense_goal("car", "note", "new car")
+    b.add_category("Travel")
+    journal.save()
+    assert journal.journal_entries == 5
+
+    loaded, _ = reload(filename)
+    assert loaded.total_expenses == 50
+    assert loaded.total_income == 100
+    assert loaded.get_transaction(kept.transaction_id).vendor == "costco"
+    assert loaded.get_transaction(removed.transaction_id) is None
+    assert loaded.get_expense_goal("car").note == "new car"
+    assert loaded.get_expense_goal("car").current_amount == 50
+    assert "Travel" in loaded.categories
+
+
+def test_journal_replays_goal_rename_and_delete(tmp_path):
+    filename = str(tmp_path / "budget.txt")
+    b, journal = reload(filename)
+    b.add_expense_goal(make_goal())
+    b.add_expense_goal(make_goal("boat"))
+    b.add_transactions([make_transaction(expense_goal="car"), make_transaction(amount=5, expense_goal="boat")])
+    journal.save()
+    b.rename_expense_goal("car", "Truck")
+    b.delete_expense_goal("boat")
+    journal.save()
+
+    loaded, _ = reload(filename)
+    assert list(loaded.expense_goals) == ["truck"]
+    assert loaded.get_expense_goal("truck").current_amount == 23.23
+    assert sorted(t.expense_goal for t in loaded.get_transactions()) == ["N/A", "Truck"]
+
+
+def test_journal_compacts_into_snapshot(tmp_path):
+    filename = str(tmp_path / "budget.txt")
+    b = Budget()
+    journal = BudgetJournal(b, filename, compact_after=3)
+    for _ in range(3):
+        b.add_transaction(make_transaction())
+    journal.save()
+    assert os.path.getsize(journal.journal_filename) == 0
+
+    loaded, _ = reload(filename)
+    assert len(loaded.expense_transactions) == 3
+
+
+def test_journal_skips_entries_in_snapshot(tmp_path):
+    # crash after a compaction replaced the snapshot but before the journal was emptied
+    filename = str(tmp_path / "budget.txt")
+    b, journal = reload(filename)
+    b.add_transaction(make_transaction())
+    journal.save()
+    with open(journal.journal_filename) as journal_file:
+        entries = journal_file.read()
+    journal.compact()
+    with open(journal.journal_filename, 'w') as journal_file:
+        journal_file.write(entries)
+
+    loaded, _ = reload(filename)
+    assert len(loaded.expense_transactions) == 1
+
+
+def test_journal_drops_partial_entry(tmp_path):
+    filename = str(tmp_path / "budget.txt")
+    b, journal = reload(filename)
+    t = make_transaction()
+    b.add_transaction(t)
+    journal.save()
+    with open(journal.journal_filename, 'a') as journal_file:
+        journal_file.write(json.dumps({'event': 'delete_transaction', 'transaction_id': t.transaction_id})[:20])
+
+    loaded, journal = reload(filename)
+    assert loaded.get_transaction(t.transaction_id) is not None
+    loaded.add_transaction(make_transaction(amount=1))
+    journal.save()
+
+    loaded, _ = reload(filename)
+    assert loaded.total_expenses == 24.23
+
+
+def test_journal_skips_update_of_missing_transaction(tmp_path):
+    filename = str(tmp_path / "budget.txt")
+    b, journal = reload(filename)
+    journal.save()
+    missing = make_transaction()
+    b.add_transactions([missing, make_transaction(amount=1)])
+    b.update_transaction(missing, "amount", 50)
+    journal.save()
+    # drop the add entry, so the update refers to a transaction the budget never gets
+    with open(journal.journal_filename) as journal_file:
+        entries = [json.loads(line) for line in journal_file]
+    with open(journal.journal_filename, 'w') as journal_file:
+        for entry in entries:
+            if entry['event'] != 'add_transaction' or entry['transaction']['transaction_id'] != missing.transaction_id:
+                journal_file.write(json.dumps(entry) + '\n')
+
+    loaded, _ = reload(filename)
+    assert loaded.get_transaction(missing.transaction_id) is None
+    assert loaded.total_expenses == 1
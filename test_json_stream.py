@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from budget import Budget
+from json_stream import JsonStreamReader
+from tests_support import make_goal, make_transaction
+
+
+def write(tmp_path, data):
+    filename = str(tmp_path / "data.txt")
+    with open(filename, 'w') as json_file:
+        json.dump(data, json_file)
+    return filename
+
+
+def test_arrays_yield_elements(tmp_path):
+    filename = write(tmp_path, {'total': 12.5, 'rows': [{'a': 1}, {'a': 2}], 'empty': [], 'names': ["x", "y"]})
+    assert list(JsonStreamReader(filename)) == [('total', 12.5), ('rows', {'a': 1}), ('rows', {'a': 2}),
+                                                ('names', "x"), ('names', "y")]
+
+
+def test_small_chunks(tmp_path):
+    rows = [{'vendor': "café %d" % i, 'amount': 1234567.89 + i} for i in range(200)]
+    filename = write(tmp_path, {'rows': rows, 'count': 123456789})
+    pairs = list(JsonStreamReader(filename, chunk_size=7))
+    assert [value for key, value in pairs if key == 'rows'] == rows
+    assert pairs[-1] == ('count', 123456789)
+
+
+def test_progress(tmp_path):
+    filename = write(tmp_path, {'rows': list(range(1000))})
+    calls = []
+    list(JsonStreamReader(filename, chunk_size=256, progress=lambda done, total: calls.append((done, total))))
+    assert calls[-1][0] == calls[-1][1]
+    assert len(calls) > 1
+
+
+def test_invalid_json(tmp_path):
+    filename = str(tmp_path / "data.txt")
+    with open(filename, 'w') as json_file:
+        json_file.write('{"rows": [1, 2')
+    with pytest.raises(ValueError):
+        list(JsonStreamReader(filename))
+
+
+def test_saved_budget_at_every_chunk_size(tmp_path):
+    # numbers split after their '.' or 'e' at a chunk boundary must still decode whole
+    b = Budget()
+    b.add_expense_goal(make_goal("Car", "01/01/23", target_amount=1500.75))
+    b.add_transactions([make_transaction(date="05/01/23", amount=amount, expense_goal="car")
+                        for amount in (12.5, 0.01, 1234.56, 7, 1e-05, 99.99)])
+    filename = str(tmp_path / "budget.txt")
+    b.save_budget(filename)
+    with open(filename) as json_file:
+        expected = [(key, element) for key, value in json.load(json_file).items()
+                    for element in (value if isinstance(value, list) else [value])]
+    for chunk_size in range(1, 65):
+        assert list(JsonStreamReader(filename, chunk_size=chunk_size)) == expected, chunk_size
@@ -0,0 +1,31 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from money import format_cents, from_cents, to_cents
+
+
+def test_to_cents_rounds_half_up():
+    assert to_cents(0.125) == 13
+    assert to_cents(1.005) == 101
+    assert to_cents(0.005) == 1
+    assert to_cents(-0.125) == -13
+    assert to_cents(19.99) == 1999
+    assert to_cents("2.345") == 235
+    assert to_cents(Decimal("0.015")) == 2
+    assert to_cents(7) == 700
+    assert to_cents(np.float64(1.005)) == 101
+    assert to_cents(None) is None
+
+
+def test_to_cents_rejects_bad_amounts():
+    for amount in (True, False, "ten", float("nan")):
+        with pytest.raises(ValueError):
+            to_cents(amount)
+
+
+def test_format_cents():
+    assert format_cents(-1205) == "-12.05"
+    assert format_cents(None) == ''
+    assert from_cents(to_cents(12.05)) == 12.05
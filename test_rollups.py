@@ -0,0 +1,40 @@
+import pytest
+
+from budget import Budget
+from tests_support import make_goal, make_transaction
+
+
+def make_budget():
+    b = Budget()
+    b.add_expense_goal(make_goal("Car"))
+    b.add_transactions([make_transaction(date="01/10/23", amount=10.10, category="Groceries"),
+                        make_transaction(date="20/10/23", amount=5, vendor="costco", category="Groceries"),
+                        make_transaction(date="02/11/23", amount=7, category="Gas", expense_goal="car"),
+                        make_transaction("Income", "05/11/23", 100, "work", "Other")])
+    return b
+
+
+def test_aggregate_by_month_and_category():
+    b = make_budget()
+    assert b.aggregate() == {('2023-10', 'Groceries'): 15.10, ('2023-11', 'Gas'): 7}
+    assert b.aggregate(None, 'month', 'net') == {'2023-10': -15.10, '2023-11': 93}
+    assert b.aggregate('vendor', None, 'count') == {'costco': 1, 'target': 2, 'work': 1}
+    assert b.aggregate('expense_goal', 'quarter') == {('2023-Q4', 'n/a'): 15.10, ('2023-Q4', 'car'): 7}
+    assert b.aggregate(None, None, 'income') == {None: 100}
+    assert b.aggregate('category', 'year', start="01/11/23") == {('2023', 'Gas'): 7}
+
+
+def test_rollups_follow_changes():
+    b = make_budget()
+    t = b.get_transactions(vendor="costco")[0]
+    b.update_transaction(t, "date", "01/12/23")
+    b.update_transaction(t, "amount", 6)
+    b.update_transaction(t, "category", "Other")
+    assert b.aggregate() == {('2023-10', 'Groceries'): 10.10, ('2023-11', 'Gas'): 7, ('2023-12', 'Other'): 6}
+    b.delete_transaction(t)
+    assert b.aggregate() == {('2023-10', 'Groceries'): 10.10, ('2023-11', 'Gas'): 7}
+
+
+def test_aggregate_invalid_grouping():
+    with pytest.raises(ValueError):
+        Budget().aggregate('note')
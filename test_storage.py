@@ -0,0 +1,142 @@
+import os
+
+import pytest
+
+from budget import Budget
+from storage import JournalStorage, SQLiteStorage, StorageBackend
+from tests_support import make_goal, make_transaction
+
+
+def test_sqlite_round_trip(tmp_path):
+    filename = str(tmp_path / "budget.db")
+    storage = SQLiteStorage(filename)
+    b = Budget()
+    b.add_transaction(make_transaction(vendor="before load"))
+    storage.load(b)
+    b.add_expense_goal(make_goal())
+    kept = make_transaction(expense_goal="car")
+    removed = make_transaction(amount=5)
+    b.add_transactions([kept, removed, make_transaction("Income", "01/11/23", 100)])
+    b.update_transaction(kept, "amount", 50)
+    b.delete_transaction(removed)
+    b.add_category("Travel")
+    storage.save()
+    storage.close()
+
+    storage = SQLiteStorage(filename)
+    loaded = Budget()
+    storage.load(loaded)
+    assert loaded.total_expenses == 73.23
+    assert loaded.total_income == 100
+    assert loaded.get_transaction(kept.transaction_id).amount == 50
+    assert loaded.get_transaction(removed.transaction_id) is None
+    assert loaded.get_expense_goal("car").current_amount == 50
+    assert "Travel" in loaded.categories
+    storage.close()
+
+
+def test_sqlite_unsaved_changes_dropped(tmp_path):
+    filename = str(tmp_path / "budget.db")
+    storage = SQLiteStorage(filename)
+    b = Budget()
+    storage.load(b)
+    b.add_transaction(make_transaction())
+    storage.save()
+    b.add_transaction(make_transaction())
+    storage.close()
+
+    storage = SQLiteStorage(filename)
+    assert len(storage.get_transactions()) == 1
+    storage.close()
+
+
+def test_sqlite_queries(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "budget.db"))
+    b = Budget()
+    storage.load(b)
+    b.add_transactions([make_transaction(date="05/10/23", amount=10, vendor="a"),
+                        make_transaction(date="01/10/23", amount=20, vendor="b"),
+                        make_transaction("Income", "03/10/23", 30, "a"),
+                        make_transaction(date="01/11/23", amount=40, vendor="a")])
+
+    assert [t.amount for t in storage.get_transactions(transaction_type="expense", vendor="a")] == [10, 40]
+    assert storage.get_transactions(amount=20)[0].vendor == "b"
+    assert [t.amount for t in storage.query_range("date", "01/10/23", "31/10/23")] == [20, 30, 10]
+    assert [t.amount for t in storage.query_range("amount", 15, vendor="a")] == [30, 40]
+    assert storage.totals() == (70, 30)
+    storage.close()
+
+
+def test_journal_storage(tmp_path):
+    filename = str(tmp_path / "budget.txt")
+    storage = JournalStorage(filename)
+    b = Budget()
+    storage.load(b)
+    t = make_transaction()
+    b.add_transaction(t)
+    storage.save()
+    storage.close()
+
+    loaded = Budget()
+    JournalStorage(filename).load(loaded)
+    assert loaded.get_transaction(t.transaction_id).amount == 23.23
+
+
+def test_sqlite_filtered_load(tmp_path):
+    filename = str(tmp_path / "budget.db")
+    storage = SQLiteStorage(filename)
+    b = Budget()
+    storage.load(b)
+    december = make_transaction(date="01/12/23", amount=40, vendor="a")
+    b.add_transactions([make_transaction(date="05/10/23", amount=10, vendor="a"),
+                        make_transaction(date="01/11/23", amount=20, vendor="b"), december])
+    storage.save()
+    storage.close()
+
+    storage = SQLiteStorage(filename)
+    october = Budget()
+    kept = make_transaction(date="15/10/23", amount=5)
+    kept.transaction_id = december.transaction_id  # same id as a stored transaction that is not loaded
+    october.add_transaction(kept)
+    storage.load(october, "date", "01/10/23", "31/10/23")
+    assert sorted(t.amount for t in october.all_transactions()) == [5, 10]
+    october.add_transaction(make_transaction(date="20/10/23", amount=1))
+    storage.save()
+    assert len({t.transaction_id for t in storage.get_transactions()}) == 5
+    assert [t.amount for t in storage.get_transactions(vendor="a")] == [10, 40]
+    storage.close()
+
+    storage = SQLiteStorage(filename)
+    vendor_a = Budget()
+    storage.load(vendor_a, vendor="a")
+    assert sorted(t.amount for t in vendor_a.all_transactions()) == [10, 40]
+    assert storage.totals() == (76, 0)
+    storage.close()
+
+
+def test_storage_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StorageBackend("budget.txt")
+
+
+def test_sqlite_records_loaded_categories(tmp_path):
+    saved = Budget()
+    saved.add_category("Travel")
+    saved.save_budget(str(tmp_path / "budget.txt"))
+
+    filename = str(tmp_path / "budget.db")
+    for load in ("load_budget", "load_budget_stream"):
+        storage = SQLiteStorage(filename)
+        b = Budget()
+        storage.load(b)
+        getattr(b, load)(str(tmp_path / "budget.txt"))
+        storage.save()
+        storage.close()
+
+        storage = SQLiteStorage(filename)
+        loaded = Budget()
+        loaded.remove_category("Gas")
+        storage.load(loaded)
+        assert loaded.categories == saved.categories
+        storage.close()
+        os.remove(filename)
@@ -0,0 +1,29 @@
+from string_table import StringTable
+from tests_support import make_transaction
+
+
+def test_transaction_has_no_dict():
+    assert not hasattr(make_transaction(), '__dict__')
+
+
+def test_date_ordinal_follows_date():
+    t = make_transaction()
+    assert t.date_ordinal == 738806
+    t.update_attribute("date", "01/11/23")
+    assert t.date_ordinal == 738825
+    t.date = "31/02/23"
+    assert t.date_ordinal is None
+
+
+def test_amounts_in_cents():
+    t = make_transaction(amount=19.99)
+    assert t.amount_cents == 1999
+    assert t.amount == 19.99
+
+
+def test_string_table_shares_codes():
+    table = StringTable()
+    codes = [table.encode(vendor) for vendor in ("target", "costco", "target", None)]
+    assert codes == [1, 2, 1, 0]
+    assert table.values == [None, "target", "costco"]
+    assert len(table) == 3
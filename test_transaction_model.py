@@ -0,0 +1,80 @@
+from PyQt5.QtCore import Qt
+
+from budget import Budget
+from tests_support import make_goal, make_transaction
+from transaction_model import TransactionTableModel
+
+
+def column(model, index):
+    return [model.index(row, index).data() for row in range(model.rowCount())]
+
+
+def test_model_follows_budget():
+    b = Budget()
+    model = TransactionTableModel(b)
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    b.add_transactions([make_transaction(amount=amount) for amount in (5, 7, 1)])
+    assert inserted == [(0, 2)]
+    assert column(model, 2) == ['5.0', '7.0', '1.0']
+    stored = model.transaction_at(1)
+    assert model.index(1, 0).data(Qt.UserRole) is stored
+    b.update_transaction(stored, "vendor", "costco")
+    assert column(model, 3) == ['target', 'costco', 'target']
+    b.delete_transaction(stored)
+    assert column(model, 2) == ['5.0', '1.0']
+
+
+def test_model_keeps_rows_sorted():
+    b = Budget()
+    model = TransactionTableModel(b)
+    b.add_transactions([make_transaction(date=date) for date in ("05/01/23", "02/02/22", "09/01/23")])
+    model.sort(0, Qt.AscendingOrder)
+    assert column(model, 0) == ["02/02/22", "05/01/23", "09/01/23"]
+    b.add_transaction(make_transaction(date="06/01/23"))
+    assert column(model, 0) == ["02/02/22", "05/01/23", "06/01/23", "09/01/23"]
+    b.update_transaction(model.transaction_at(0), "date", "01/01/24")
+    assert column(model, 0) == ["05/01/23", "06/01/23", "09/01/23", "01/01/24"]
+    model.sort(2, Qt.DescendingOrder)
+    b.add_transaction(make_transaction(amount=100))
+    assert column(model, 2)[0] == '100.0'
+
+
+def test_model_redraws_renamed_goal():
+    b = Budget()
+    b.add_expense_goal(make_goal("Trip"))
+    model = TransactionTableModel(b)
+    b.add_transaction(make_transaction(expense_goal="trip"))
+    changed = []
+    model.dataChanged.connect(lambda first, last: changed.append(first.row()))
+    b.rename_expense_goal("trip", "Holiday")
+    assert changed == [0]
+    assert model.index(0, 6).data() == "Holiday"
+
+
+def test_row_of_follows_inserts_removals_and_sorts():
+    b = Budget()
+    model = TransactionTableModel(b)
+    b.add_transactions([make_transaction(amount=amount) for amount in range(0, 200, 2)])
+    model.sort(2, Qt.DescendingOrder)
+    for amount in range(1, 200, 20):
+        b.add_transaction(make_transaction(amount=amount))
+    for row in (100, 3, 60):
+        b.delete_transaction(model.transaction_at(row))
+    b.update_transaction(model.transaction_at(0), "amount", 0.5)
+    assert all(model.row_of(transaction) == row for row, transaction in enumerate(model.rows))
+    assert model.row_of(make_transaction()) is None
+
+
+def test_batch_is_merged_into_sorted_rows():
+    b = Budget()
+    model = TransactionTableModel(b)
+    b.add_transactions([make_transaction(amount=amount) for amount in (10, 30, 20)])
+    model.sort(2, Qt.DescendingOrder)
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    b.add_transactions([make_transaction(amount=amount) for amount in (1, 5)])
+    assert inserted == [(3, 4)]
+    b.add_transactions([make_transaction(amount=amount) for amount in (25, 40, 15)])
+    assert column(model, 2) == ['40.0', '30.0', '25.0', '20.0', '15.0', '10.0', '5.0', '1.0']
+    assert all(model.row_of(transaction) == row for row, transaction in enumerate(model.rows))
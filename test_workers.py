@@ -0,0 +1,35 @@
+from workers import Job
+
+
+def run(function, cancel=False):
+    job = Job(function)
+    ended = []
+    job.signals.progress.connect(lambda done, total: ended.append(('progress', done, total)))
+    job.signals.finished.connect(lambda result: ended.append(('finished', result)))
+    job.signals.failed.connect(lambda message: ended.append(('failed', message)))
+    job.signals.cancelled.connect(lambda: ended.append(('cancelled',)))
+    if cancel:
+        job.cancel()
+    job.run()
+    return ended
+
+
+def count_to_two(progress):
+    progress(1, 2)
+    progress(2, 2)
+    return 'done'
+
+
+def test_job_reports_progress_and_result():
+    assert run(count_to_two) == [('progress', 1, 2), ('progress', 2, 2), ('finished', 'done')]
+
+
+def test_job_cancel_stops_at_next_progress():
+    assert run(count_to_two, cancel=True) == [('cancelled',)]
+
+
+def test_job_failure():
+    def fail(progress):
+        raise ValueError("bad file")
+
+    assert run(fail) == [('failed', 'bad file')]
@@ -0,0 +1,15 @@
+from goal import Goal
+from transaction import Transaction
+
+
+def make_transaction(transaction_type="Expense", date="13/10/23", amount=23.23, vendor="target", category="Other",
+                     note="", expense_goal="N/A"):
+    t = Transaction()
+    t.edit(transaction_type, date, amount, vendor, category, note, expense_goal)
+    return t
+
+
+def make_goal(name="car", start_date="01/10/23", end_date="31/12/23", target_amount=1000, category="Other"):
+    g = Goal()
+    g.init_goal(name, start_date, end_date, "", target_amount, "", category)
+    return g
@@ -3,19 +3,81 @@ Module for Transaction Class
 """
 
 
+import sys
+import threading
+from date_utils import parse_date
+from money import from_cents, to_cents
+
+
+class TransactionIds:
+    """
+    Source of transaction ids. Ids are unique for the life of the program, and ids read back from a save are
+    reserved so new transactions never reuse them. Safe to use from several threads, as loads run on a worker thread
+    while the GUI thread adds transactions
+    """
+
+    def __init__(self):
+        """
+        Init
+        """
+        self.next_id: int = 1
+        self.lock: threading.Lock = threading.Lock()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self.lock:
+            transaction_id = self.next_id
+            self.next_id += 1
+        return transaction_id
+
+    def reserve(self, transaction_id: int):
+        """
+        Method to make sure an id read back from a save is never handed out again
+
+        :param transaction_id: id in use
+        :type transaction_id: int
+        :return: None
+        """
+        with self.lock:
+            if transaction_id >= self.next_id:
+                self.next_id = transaction_id + 1
+
+
+transaction_ids = TransactionIds()
+
+
+def intern_string(value):
+    """
+    Function to intern a string so repeated values (dates, vendors, categories...) share one object in memory
+
+    :param value: value to intern
+    :return: interned string, or value unchanged if it is not a string
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
 #
 # add transaction (requirement 1.1.8)
 #
 class Transaction:
     """
     transaction_type : str
-    date : str
-    amount : float
+    date : str - DD/MM/YY, parsed once when set into the day ordinal date_ordinal
+    amount : float - kept as integer cents in amount_cents
     vendor : str
     category : str
     note : str
     expense_goal: str
+    transaction_id: int - stable id used by budgets and goals to find the transaction
     """
+    # slots instead of an instance __dict__, budgets can hold millions of transactions
+    __slots__ = ('transaction_type', '_date', 'date_ordinal', 'amount_cents', 'vendor', 'category', 'note',
+                 'expense_goal', 'transaction_id')
+
     # methods
    
     # ---------------------------------------------------------------------
@@ -27,11 +89,36 @@ class Transaction:
     def __init__(self):
         self.transaction_type: str = None
         self.date: str = None
-        self.amount: float = None
+        self.amount_cents: int = None
         self.vendor: str = None
         self.category: str = None
         self.note: str = None
         self.expense_goal: str = None
+        self.transaction_id: int = next(transaction_ids)
+
+    @property
+    def date(self):
+        """
+        date of transaction as DD/MM/YY. Setting it also sets date_ordinal, the day ordinal of the date (None if the
+        date is not valid), which sorting, indexes and reports use instead of parsing the string again
+        """
+        return self._date
+
+    @date.setter
+    def date(self, value: str):
+        self._date = value
+        self.date_ordinal = parse_date(value)
+
+    @property
+    def amount(self):
+        """
+        amount of transaction in dollars
+        """
+        return from_cents(self.amount_cents)
+
+    @amount.setter
+    def amount(self, value: float | str):
+        self.amount_cents = to_cents(value)
 
     #
     # load budget (Requirement 1.3.7)
@@ -44,13 +131,17 @@ class Transaction:
         :type transaction_dict: dict[str, str | float]
         :return: None
         """
-        self.transaction_type = transaction_dict['transaction_type']
-        self.date = transaction_dict['date']
+        self.transaction_type = intern_string(transaction_dict['transaction_type'])
+        self.date = intern_string(transaction_dict['date'])
         self.amount = transaction_dict['amount']
-        self.vendor = transaction_dict['vendor']
-        self.category = transaction_dict['category']
+        self.vendor = intern_string(transaction_dict['vendor'])
+        self.category = intern_string(transaction_dict['category'])
         self.note = transaction_dict['note']
-        self.expense_goal = transaction_dict['expense_goal']
+        self.expense_goal = intern_string(transaction_dict['expense_goal'])
+        if 'transaction_id' in transaction_dict:
+            # keep the saved id, so journals and other saved references to the transaction still find it
+            self.transaction_id = transaction_dict['transaction_id']
+            transaction_ids.reserve(self.transaction_id)
 
     #
     # remove transaction (requirement 1.1.9)
@@ -99,13 +190,13 @@ class Transaction:
         :type expense_goal:  str
         :return:
         """
-        self.transaction_type = transaction_type
-        self.date = date
+        self.transaction_type = intern_string(transaction_type)
+        self.date = intern_string(date)
         self.amount = amount
-        self.vendor = vendor
-        self.category = category
+        self.vendor = intern_string(vendor)
+        self.category = intern_string(category)
         self.note = note
-        self.expense_goal = expense_goal
+        self.expense_goal = intern_string(expense_goal)
 
     #
     # add transaction (requirement 1.1.8)
@@ -132,5 +223,6 @@ class Transaction:
         :rtype: dict[str, str|float]
         """
         trans_dict = {'transaction_type': self.transaction_type, 'date': self.date, 'amount': self.amount,
-                      'vendor': self.vendor, 'category': self.category, 'note': self.note, 'expense_goal': self.expense_goal}
+                      'vendor': self.vendor, 'category': self.category, 'note': self.note,
+                      'expense_goal': self.expense_goal, 'transaction_id': self.transaction_id}
         return trans_dict
@@ -0,0 +1,355 @@
+"""
+Module containing the Qt table model of a budget's transactions
+"""
+
+
+from bisect import bisect_left
+from typing import Callable
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from budget import Budget
+from transaction import Transaction
+
+
+class TransactionTableModel(QAbstractTableModel):
+    """
+    Table model showing every transaction in a budget. The model holds only the order of the rows; cell text is read
+    from the transaction when the view asks for it, so only the rows on screen are ever turned into text.
+
+    The model listens to the budget, so rows appear, change and disappear as the budget changes. A batch of
+    transactions added with Budget.add_transactions is sorted on its own and spliced in between the rows already
+    shown: a single ranged insert when it all lands in one place, one layout change otherwise.
+    """
+
+    headers: tuple[str, ...] = ("Date", "Type", "Amount", "Vendor", "Category", "Note", "Expense Goal")
+
+    # column -> function giving the value a transaction sorts by in that column. Dates sort by their day ordinal
+    # (DD/MM/YY text does not sort chronologically) and amounts by their value in cents
+    sort_keys: tuple[Callable[[Transaction], object], ...] = (
+        lambda transaction: transaction.date_ordinal or 0,
+        lambda transaction: transaction.transaction_type or '',
+        lambda transaction: transaction.amount_cents,
+        lambda transaction: transaction.vendor or '',
+        lambda transaction: transaction.category or '',
+        lambda transaction: transaction.note or '',
+        lambda transaction: transaction.expense_goal or '',
+    )
+
+    def __init__(self, budget: Budget, parent=None):
+        """
+        Init
+
+        :param budget: budget whose transactions are shown
+        :type budget: Budget
+        :param parent: parent QObject
+        """
+        super().__init__(parent)
+        self.budget = budget
+        self.rows: list[Transaction] = list(budget.all_transactions())  # transactions in display order
+        # (sort value, transaction id) of each row, in display order. The ids make every key unique, so a row is found
+        # by binary search on its key. Until the view sorts the rows, the sort value is the order rows were added in
+        self.keys: list[tuple] = [(row, transaction.transaction_id) for row, transaction in enumerate(self.rows)]
+        # id of each transaction -> its key, so a transaction whose values changed can still be found by its old key
+        self.key_map: dict[int, tuple] = {id(transaction): key for transaction, key in zip(self.rows, self.keys)}
+        self.next_sequence: int = len(self.rows)  # sort value of the next row added while the rows are not sorted
+        self.sort_column: int | None = None  # column the rows are sorted by, None until the view sorts them
+        self.sort_order: Qt.SortOrder = Qt.AscendingOrder
+        budget.add_listener(self.budget_changed)
+
+    def close(self):
+        """
+        Method to stop following the budget
+
+        :return: None
+        """
+        self.budget.remove_listener(self.budget_changed)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        transaction = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return self.cell_text(transaction, index.column())
+        if role == Qt.UserRole:
+            return transaction
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    @staticmethod
+    def cell_text(transaction: Transaction, column: int):
+        """
+        Function to get the text shown in a cell
+
+        :param transaction: transaction of the cell's row
+        :type transaction: Transaction
+        :param column: column of the cell
+        :type column: int
+        :return: str - text of the cell
+        :rtype: str
+        """
+        if column == 0:
+            return transaction.date
+        if column == 1:
+            return transaction.transaction_type
+        if column == 2:
+            return str(transaction.amount)
+        if column == 3:
+            return transaction.vendor
+        if column == 4:
+            return transaction.category
+        if column == 5:
+            return transaction.note
+        return transaction.expense_goal
+
+    def transaction_at(self, row: int):
+        """
+        Method to get the transaction shown in a row
+
+        :param row: row of the table
+        :type row: int
+        :return: Transaction - transaction of the row
+        :rtype: Transaction
+        """
+        return self.rows[row]
+
+    def row_of(self, transaction: Transaction):
+        """
+        Method to get the row showing a transaction, by binary search on its key
+
+        :param transaction: transaction to find
+        :type transaction: Transaction
+        :return: int - row of the transaction, None if the model doesn't show it
+        :rtype: int | None
+        """
+        key = self.key_map.get(id(transaction))
+        if key is None:
+            return None
+        return self.find(key)
+
+    @property
+    def descending(self):
+        """
+        True while the rows are sorted in descending order
+        """
+        return self.sort_column is not None and self.sort_order == Qt.DescendingOrder
+
+    def find(self, key: tuple, low: int = 0, high: int = None):
+        """
+        Method to find the row holding a key, or the row a new row with that key goes in
+
+        :param key: (sort value, transaction id)
+        :type key: tuple
+        :param low: first row to search
+        :type low: int
+        :param high: row after the last row to search, None for the end of the table
+        :type high: int
+        :return: int - first row from low to high whose key does not come before key in display order
+        :rtype: int
+        """
+        keys = self.keys
+        if high is None:
+            high = len(keys)
+        if not self.descending:
+            return bisect_left(keys, key, low, high)
+        while low < high:
+            middle = (low + high) // 2
+            if keys[middle] > key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def key_of(self, transaction: Transaction):
+        """
+        Method to get the key a transaction sorts by. While the rows are not sorted, each call hands out the next
+        sequence number, so a new transaction goes at the end
+
+        :param transaction: transaction to get the key of
+        :type transaction: Transaction
+        :return: tuple - (sort value, transaction id)
+        :rtype: tuple
+        """
+        if self.sort_column is None:
+            self.next_sequence += 1
+            return self.next_sequence - 1, transaction.transaction_id
+        return self.sort_keys[self.sort_column](transaction), transaction.transaction_id
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder):
+        """
+        Method to sort the rows by a column. Called by the view when a column header is clicked. Rows added later
+        are put in their sorted place
+
+        :param column: column to sort by, -1 to stop sorting (rows keep their current order)
+        :type column: int
+        :param order: Qt.AscendingOrder or Qt.DescendingOrder
+        :type order: Qt.SortOrder
+        :return: None
+        """
+        self.layoutAboutToBeChanged.emit([], QAbstractTableModel.VerticalSortHint)
+        persistent = self.persistentIndexList()
+        moving = [self.rows[index.row()] for index in persistent]
+        if column < 0 or column >= len(self.headers):
+            # the rows keep their order, numbered as they stand
+            self.sort_column = None
+            self.keys = [(row, transaction.transaction_id) for row, transaction in enumerate(self.rows)]
+            self.next_sequence = len(self.rows)
+        else:
+            self.sort_column = column
+            self.sort_order = order
+            key = self.sort_keys[column]
+            keys = [(key(transaction), transaction.transaction_id) for transaction in self.rows]
+            order_of_rows = sorted(range(len(keys)), key=keys.__getitem__, reverse=order == Qt.DescendingOrder)
+            self.rows = [self.rows[row] for row in order_of_rows]
+            self.keys = [keys[row] for row in order_of_rows]
+        self.key_map = {id(transaction): key for transaction, key in zip(self.rows, self.keys)}
+
+        # move the selection and current cell along with their rows
+        if persistent:
+            self.changePersistentIndexList(persistent, [
+                self.index(self.row_of(transaction), index.column()) for index, transaction in zip(persistent, moving)])
+        self.layoutChanged.emit([], QAbstractTableModel.VerticalSortHint)
+
+    def insert(self, row: int, transaction: Transaction, key: tuple):
+        """
+        Method to put a transaction in a row, without telling the view
+
+        :param row: row to insert at
+        :type row: int
+        :param transaction: transaction to insert
+        :type transaction: Transaction
+        :param key: key of the transaction (see key_of)
+        :type key: tuple
+        :return: None
+        """
+        self.rows.insert(row, transaction)
+        self.keys.insert(row, key)
+        self.key_map[id(transaction)] = key
+
+    def budget_changed(self, event: str, subject):
+        """
+        Listener keeping the rows in step with the budget (see Budget.add_listener). Each single change finds its
+        row by binary search, and the list insert or delete behind it is a memory move
+
+        :param event: name of the change
+        :type event: str
+        :param subject: transaction, or list of transactions, that changed
+        :return: None
+        """
+        if event == 'add_transaction':
+            key = self.key_of(subject)
+            row = self.find(key)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.insert(row, subject, key)
+            self.endInsertRows()
+        elif event == 'add_transactions':
+            if subject:
+                self.add_batch(subject)
+        elif event == 'delete_transaction':
+            row = self.row_of(subject)
+            if row is not None:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.rows[row]
+                del self.keys[row]
+                del self.key_map[id(subject)]
+                self.endRemoveRows()
+        elif event == 'update_transaction':
+            row = self.row_of(subject)
+            if row is not None:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
+                self.move_to_sorted_position(row)
+
+    def add_batch(self, transactions: list[Transaction]):
+        """
+        Method to put a batch of new transactions in their rows. Only the batch is sorted; the rows already shown
+        keep their keys, so each new row's place is a binary search and the batch is spliced in between them
+
+        :param transactions: transactions added to the budget
+        :type transactions: list[Transaction]
+        :return: None
+        """
+        if self.sort_column is None:
+            keys = [self.key_of(transaction) for transaction in transactions]
+            batch = list(transactions)
+        else:
+            key = self.sort_keys[self.sort_column]
+            unsorted_keys = [(key(transaction), transaction.transaction_id) for transaction in transactions]
+            order_of_batch = sorted(range(len(unsorted_keys)), key=unsorted_keys.__getitem__, reverse=self.descending)
+            keys = [unsorted_keys[row] for row in order_of_batch]
+            batch = [transactions[row] for row in order_of_batch]
+        # the batch is in display order, so each row goes at or after the row found for the one before it
+        positions = []
+        position = 0
+        for key in keys:
+            position = self.find(key, position)
+            positions.append(position)
+        for transaction, key in zip(batch, keys):
+            self.key_map[id(transaction)] = key
+
+        if positions[0] == positions[-1]:
+            # the whole batch lands between the same two rows: one ranged insert
+            first = positions[0]
+            self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+            self.rows[first:first] = batch
+            self.keys[first:first] = keys
+            self.endInsertRows()
+            return
+
+        self.layoutAboutToBeChanged.emit([], QAbstractTableModel.VerticalSortHint)
+        persistent = self.persistentIndexList()
+        moving = [self.rows[index.row()] for index in persistent]
+        rows = []
+        merged_keys = []
+        start = 0
+        for position, transaction, key in zip(positions, batch, keys):
+            rows += self.rows[start:position]
+            merged_keys += self.keys[start:position]
+            rows.append(transaction)
+            merged_keys.append(key)
+            start = position
+        rows += self.rows[start:]
+        merged_keys += self.keys[start:]
+        self.rows = rows
+        self.keys = merged_keys
+        if persistent:
+            self.changePersistentIndexList(persistent, [
+                self.index(self.row_of(transaction), index.column()) for index, transaction in zip(persistent, moving)])
+        self.layoutChanged.emit([], QAbstractTableModel.VerticalSortHint)
+
+    def move_to_sorted_position(self, row: int):
+        """
+        Method to move a row whose values changed back to its sorted place
+
+        :param row: row to move
+        :type row: int
+        :return: None
+        """
+        if self.sort_column is None:
+            return
+        transaction = self.rows[row]
+        key = self.key_of(transaction)
+        keys = self.keys
+        # the rows before and after this one are still in order, so search the side the new key belongs on
+        if row > 0 and (keys[row - 1] > key if not self.descending else keys[row - 1] < key):
+            position = self.find(key, 0, row)
+            destination = position
+        elif row + 1 < len(keys) and (keys[row + 1] < key if not self.descending else keys[row + 1] > key):
+            position = self.find(key, row + 1) - 1  # counted once the row is taken out
+            destination = position + 1  # beginMoveRows counts with the moving row still in place
+        else:
+            keys[row] = key
+            self.key_map[id(transaction)] = key
+            return
+        self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), destination)
+        del self.rows[row]
+        del self.keys[row]
+        self.insert(position, transaction, key)
+        self.endMoveRows()
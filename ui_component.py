@@ -1,13 +1,19 @@
 import os
 import re
+import tempfile
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
                              QMessageBox, QFileDialog, QComboBox, QTableWidget, QTableWidgetItem, QTabWidget,
-                             QDialog, QAbstractItemView, QAction, QMainWindow)
-import transaction
+                             QDialog, QAbstractItemView, QAction, QMainWindow, QTableView, QHeaderView,
+                             QProgressDialog)
 from transaction import Transaction
 from budget import Budget
+from date_utils import parse_date
 from goal import Goal
+from goal_model import GoalListModel
+from importer import import_statement
+from transaction_model import TransactionTableModel
+from workers import JobRunner
 
 
 def insert_layout(update_cell_dialog: QDialog, new_input_line: QLineEdit, save_changes_button: QPushButton,
@@ -36,6 +42,30 @@ def insert_layout(update_cell_dialog: QDialog, new_input_line: QLineEdit, save_c
     update_cell_dialog.setLayout(layout)
 
 
+class SortableTableItem(QTableWidgetItem):
+    """
+    Table item that sorts by a key instead of by its text, so dates sort by their day ordinal (DD/MM/YY text does not
+    sort chronologically) and amounts sort by their value
+    """
+
+    def __init__(self, text: str, sort_key: int):
+        """
+        Init
+
+        :param text: text shown in the cell
+        :type text: str
+        :param sort_key: value the item sorts by, such as a date ordinal (0 for invalid dates) or an amount in cents
+        :type sort_key: int
+        """
+        super().__init__(text)
+        self.sort_key = sort_key
+
+    def __lt__(self, other: QTableWidgetItem):
+        if isinstance(other, SortableTableItem):
+            return self.sort_key < other.sort_key
+        return super().__lt__(other)
+
+
 #
 #  Open Application (Requirement 1.1.1)
 #
@@ -55,6 +85,9 @@ class BudgetTrackerApp(QMainWindow):
         '''
         self.last_clicked_column: None = None
 
+        # saving, loading and exporting run on a worker thread so the window stays responsive
+        self.jobs: JobRunner = JobRunner(self)
+
         # Create the two tabs
         self.budget_tracker_tab: QWidget = QWidget()
         self.expense_goal_tab: QWidget = QWidget()  # Second tab for goals (Requirement 1.2.4)
@@ -110,11 +143,15 @@ class BudgetTrackerApp(QMainWindow):
         export_action = QAction('Export to Excel', self)
         export_action.triggered.connect(self.export_budget_dialog)
 
+        import_action = QAction('Import Statement', self)
+        import_action.triggered.connect(self.import_statement_dialog)
+
         # Add actions to the File menu
         file_menu.addAction(save_action)  # save budget (Requirement 1.3.6)
         file_menu.addAction(load_action)  # load budget (Requirement 1.3.7)
         file_menu.addAction(delete_action)  # delete budget (Requirement 1.3.8)
         file_menu.addAction(export_action)  # export transactions (Requirement 1.3.5)
+        file_menu.addAction(import_action)
 
         '''
         Begin block of code for the Transaction tracker. 
@@ -136,11 +173,21 @@ class BudgetTrackerApp(QMainWindow):
         #
         # add goal to transaction (Requirement 1.3.1, 1.3.9)
         #
+        # every goal selector shares one list of goal names, which follows the budget's goals as they are added,
+        # renamed and removed
+        self.goal_list_model = GoalListModel(self.budget, self)
         self.expense_goals = QComboBox()
+        self.expense_goals.setModel(self.goal_list_model)
         self.expense_goals.setFixedWidth(100)
 
-        self.transaction_table = QTableWidget()
+        # the table is a view over a model that follows the budget, so transactions show up in the table as the
+        # budget changes. Only the rows on screen are drawn, which keeps the tab responsive with very large budgets
+        self.transaction_model = TransactionTableModel(self.budget, self)
+        self.transaction_table = QTableView()
+        self.transaction_table.setModel(self.transaction_model)
         self.transaction_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # fixed height rows, so the view never measures every row
+        self.transaction_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
 
         #
         # Total Expense below table (requirement 1.1.10)
@@ -163,13 +210,6 @@ class BudgetTrackerApp(QMainWindow):
             self.transaction_category.addItem(transaction_category)
             transaction_index += 1
 
-        #
-        # select category for goal (Requirement 1.1.7)
-        #
-        for expense_goal_index, expense_goal_name in enumerate(self.budget.expense_goals):
-            self.expense_goals.addItem(expense_goal_name)
-        self.expense_goals.addItem("N/A")
-
         # Create buttons
         self.add_transaction_button = QPushButton("Add Transaction")  # add transaction (requirement 1.1.8)
         self.remove_transaction_button = QPushButton("Remove Transaction")  # remove transaction (requirement 1.1.9)
@@ -182,7 +222,7 @@ class BudgetTrackerApp(QMainWindow):
         #
         # remove transaction (requirement 1.1.9, 1.2.2)
         #
-        self.remove_transaction_button.clicked.connect(lambda: self.remove_from_table(self.transaction_table))
+        self.remove_transaction_button.clicked.connect(self.remove_transaction_from_table)
 
         #
         # update transaction (requirement 1.3.3)
@@ -263,10 +303,8 @@ class BudgetTrackerApp(QMainWindow):
         budget_fifth_row_layout.addWidget(self.remove_transaction_button)  # remove transaction (requirement 1.1.9)
         budget_tracker_tab_layout.addLayout(budget_fifth_row_layout)
 
-        # Set the number of columns to match the expected input and name them.
-        self.transaction_table.setColumnCount(7)
-        self.transaction_table_headers = ["Date", "Type", "Amount", "Vendor", "Category", "Note",  "Expense Goal"]
-        self.transaction_table.setHorizontalHeaderLabels(self.transaction_table_headers)
+        # The columns and their names come from the model
+        self.transaction_table_headers = list(self.transaction_model.headers)
 
         # Add display to show list of transactions and set default sortingEnabled to true
         budget_tracker_tab_layout.addWidget(self.transaction_table)  # add transaction (requirement 1.1.8)
@@ -311,6 +349,9 @@ class BudgetTrackerApp(QMainWindow):
 
         self.expense_goal_table = QTableWidget()
         self.expense_goal_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # goal -> the goal's name item in the table. The table moves its items as rows are sorted, inserted and
+        # removed, so item.row() is always the goal's row
+        self.expense_goal_items: dict[Goal, QTableWidgetItem] = {}
 
         # Adding pre-determined strings for Category drop down boxes
         #
@@ -464,11 +505,8 @@ class BudgetTrackerApp(QMainWindow):
             goal = self.budget.get_expense_goal(transaction.expense_goal)
             self.add_expense_goal_list_to_table(goal)
 
-        # Pull the attributes out from both expense and income lists and insert them into the table.
-        self.add_transaction_lists_to_table(transaction)
-
+        # the transaction table model adds the row itself when the budget reports the new transaction
         # Update table
-        self.transaction_table.update()
         self.expense_goal_table.update()
 
         # Clear fields for end user
@@ -477,13 +515,37 @@ class BudgetTrackerApp(QMainWindow):
         # Update total expenses, income and balance
         self.update_under_table_hud()
 
+    # Removes the selected transaction from the budget class list/dict. The table model removes its row
+    #
+    # remove transaction (requirement 1.1.9)
+    #
+    def remove_transaction_from_table(self):
+        """
+        Removes the transaction in the selected row of the transaction table from the budget.
+
+        :return: None
+        """
+        selected_indexes = self.transaction_table.selectionModel().selectedIndexes()
+        if not selected_indexes:
+            QMessageBox.warning(self, "Remove from table", "No row was selected.")
+            return
+
+        transaction_obj = self.transaction_model.transaction_at(selected_indexes[0].row())
+
+        # delete_transaction takes the amount off the linked goal, then the goal row is refreshed
+        self.budget.delete_transaction(transaction_obj)
+        if transaction_obj.expense_goal != "N/A":
+            goal = self.budget.get_expense_goal(transaction_obj.expense_goal)
+            self.add_expense_goal_list_to_table(goal)
+        self.update_under_table_hud()
+
     # Removes rows from the table first, and then removes them from the budget class list/dict
     #
     # remove transaction (requirement 1.1.9)
     #
     def remove_from_table(self, table: QTableWidget):
         """
-        Removes the selected row from the provided QTableWidget and updates the associated budget data.
+        Removes the selected row from the provided expense goal QTableWidget and updates the associated budget data.
 
         :param table: The QTableWidget from which to remove the selected row.
         :type table: QTableWidget
@@ -494,7 +556,7 @@ class BudgetTrackerApp(QMainWindow):
         selected_item = table.selectedItems()
 
         if selected_item:
-            # gives us the row int, which is important for removing income/expense objects
+            # gives us the row int, which is important for removing goal objects
             selected_row = selected_item[0].row()
 
             remove_from_table = table.item(selected_row, 0)
@@ -502,41 +564,12 @@ class BudgetTrackerApp(QMainWindow):
 
             # Remove the row from the table itself
             table.removeRow(selected_row)
+            del self.expense_goal_items[budget_obj]
 
-            # Check to see if its a transaction or a goal. Perform actions as neccessary
-            if isinstance(budget_obj, transaction.Transaction):
-                # Remove the transaction object from its respective list
-                #
-                # remove transaction (requirement 1.1.9)
-                #
-                if budget_obj.expense_goal != "N/A":
-                    goal = self.budget.get_expense_goal(budget_obj.expense_goal)
-                    self.budget.update_transaction_expense_goal_cell(budget_obj)
-                    self.add_expense_goal_list_to_table(goal)
-                self.budget.delete_transaction(budget_obj)
-                self.update_under_table_hud()
-            else:
-                # Remove the goal object from its respective list
-                self.budget.delete_expense_goal(budget_obj.name)
-
-                # set all transactions that have this goal in the last column to "N/A"
-                set_na_transactions = self.transaction_table.findItems(budget_obj.name, Qt.MatchContains)
-
-                for transaction_item in set_na_transactions:
-                    row = transaction_item.row()
-                    column = transaction_item.column()
-                    change_in_table = self.transaction_table.item(row, 0)
-                    trans_obj = change_in_table.data(Qt.UserRole)
-
-                    if column == 6:
-                        self.transaction_table.setItem(row, column, QTableWidgetItem("N/A"))
-                        trans_obj.update_attribute("expense_goal", "N/A")
-
-                # update the goal Q Combo Box
-                self.expense_goals.clear()
-                self.expense_goals.addItem("N/A")
-                for expense_goal_index, expense_goal_name in enumerate(self.budget.expense_goals):
-                    self.expense_goals.addItem(expense_goal_name)
+            # Remove the goal object from its respective list. The budget sets exactly the transactions linked to
+            # the goal to "N/A", and the transaction table model redraws their rows as the budget reports them
+            # the goal Q Combo Box drops the goal as the budget reports the deletion
+            self.budget.delete_expense_goal(budget_obj.name)
 
         else:
             QMessageBox.warning(self, "Remove from table", "No row was selected.")
@@ -588,129 +621,144 @@ class BudgetTrackerApp(QMainWindow):
         # Update table
         self.expense_goal_table.update()
 
-        # Clear fields for end user
+        # Clear fields for end user. The goal Q Combo Box already lists the new goal
         self.clear_expense_goal_ui()
-        self.expense_goals.clear()
-        self.expense_goals.addItem("N/A")
-        for expense_goal_index, expense_goal_name in enumerate(self.budget.expense_goals):
-            self.expense_goals.addItem(expense_goal_name)
 
-    # adds the transaction list from the budget class to the transaction table in the GUI
+    # Add the expense goal dictionary to the expense goal table in the GUI
     #
-    # add transaction (requirement 1.1.8)
+    # add expense goal (Requirement 1.2.11)
     #
-    def add_transaction_lists_to_table(self, transaction_object: Transaction):
+    def add_expense_goal_list_to_table(self, goal_object: Goal):
         """
-        Adds a transaction object to the expense transaction table and updates the table.
+        Adds an expense goal object to the expense goal table, or updates its row if it is already in the table.
 
-        :param transaction_object: The Transaction object to be added to the table.
-        :type transaction_object: Transaction
+        :param goal_object: The Goal object to be added to the table.
+        :type goal_object: Goal
         :return: None
         """
 
-        # turn off sorting so we don't add blank cells
-        self.transaction_table.setSortingEnabled(False)
+        # a goal already in the table is found through its name item, and its cells are updated in place. With
+        # sorting on, the table moves just that row if a changed cell is the one it is sorted by
+        name_item = self.expense_goal_items.get(goal_object)
+        if name_item is not None:
+            row_position = name_item.row()
+            items = [self.expense_goal_table.item(row_position, column)
+                     for column in range(self.expense_goal_table.columnCount())]
+            for item, (text, sort_key) in zip(items, self.expense_goal_cells(goal_object)):
+                if isinstance(item, SortableTableItem):
+                    item.sort_key = sort_key
+                if item.text() != text:
+                    item.setText(text)
+            return
 
-        # Create a variable so we can store the object into the QTableWidget.
-        # This will allow us to pull this exact object back out when we delete it from the table.
-        transaction_object_date = QTableWidgetItem(transaction_object.date)
-        transaction_object_date.setData(Qt.UserRole, transaction_object)
+        # turn of sorting so we don't add blank cells
+        self.expense_goal_table.setSortingEnabled(False)
 
-        # Add expense transaction to the table
-        row_position = self.transaction_table.rowCount()
-        self.transaction_table.insertRow(row_position)
+        # Add new expense goal to the end of the table
+        row_position = self.expense_goal_table.rowCount()
+        # start balance is now set in init_goal() method of goal object
+        # goal_object.set_startBalance()
+        self.expense_goal_table.insertRow(row_position)
 
-        # Use row_position as the row index for setting items
-        self.transaction_table.setItem(row_position, 0, transaction_object_date)
-        self.transaction_table.setItem(row_position, 1, QTableWidgetItem(transaction_object.transaction_type))
-        self.transaction_table.setItem(row_position, 2, QTableWidgetItem(str(transaction_object.amount)))
-        self.transaction_table.setItem(row_position, 3, QTableWidgetItem(transaction_object.vendor))
-        self.transaction_table.setItem(row_position, 4, QTableWidgetItem(transaction_object.category))
-        self.transaction_table.setItem(row_position, 5, QTableWidgetItem(transaction_object.note))
-        self.transaction_table.setItem(row_position, 6, QTableWidgetItem(transaction_object.expense_goal))
+        # Use row-position as the row index for setting items
+        self.set_expense_goal_row(row_position, goal_object)
 
-        self.transaction_table.setSortingEnabled(True)
+        # turn the sorting back on
+        self.expense_goal_table.setSortingEnabled(True)
 
-    # Add the expense goal dictionary to the expense goal table in the GUI
+    # fills every row of the expense goal table at once, used when a budget is loaded
     #
-    # add expense goal (Requirement 1.2.11)
+    # load budget (Requirement 1.3.7)
     #
-    def add_expense_goal_list_to_table(self, goal_object: Goal):
+    def populate_expense_goal_table(self):
         """
-        Adds an expense goal object to the expense goal table and updates the table.
+        Rebuilds the expense goal table from the budget's goals in one pass. The row count is set once and the rows
+        are filled with sorting and screen updates off, so the table sorts and repaints once rather than per goal.
 
-        :param goal_object: The Goal object to be added to the table.
-        :type goal_object: Goal
         :return: None
         """
-
-        # turn of sorting so we don't add blank cells
         self.expense_goal_table.setSortingEnabled(False)
+        self.expense_goal_table.setUpdatesEnabled(False)
+        try:
+            self.expense_goal_table.setRowCount(0)
+            self.expense_goal_items.clear()
+            self.expense_goal_table.setRowCount(len(self.budget.expense_goals))
+            for row_position, goal_object in enumerate(self.budget.expense_goals.values()):
+                self.set_expense_goal_row(row_position, goal_object)
+        finally:
+            # turning sorting back on sorts the table once, by the column it was last sorted by
+            self.expense_goal_table.setSortingEnabled(True)
+            self.expense_goal_table.setUpdatesEnabled(True)
+
+    def set_expense_goal_row(self, row_position: int, goal_object: Goal):
+        """
+        Writes every cell of a row of the expense goal table from a goal. Sorting must be off while it runs.
 
-        # get the original name out of the goal object if there is one. We need it for updating a goal that already
-        # exists
-        goal_name = goal_object.name
-        goal_amount_update = self.expense_goal_table.findItems(goal_name, Qt.MatchContains)
-
-        # Add expense goal to table. If == already existing else == new expense goal
-        if goal_amount_update:
-            for item in goal_amount_update:
-                row = item.row()
-                column = item.column()
-                if column == 0:
-                    row_position = row
-            expense_goal_object_name = QTableWidgetItem(goal_name)
-            expense_goal_object_name.setData(Qt.UserRole, goal_object)
-        else:
-            row_position = self.expense_goal_table.rowCount()
-            # Create a variable, so we can store the object into the QTableWidget. This will allow us to pull this
-            # exact object back out when we delete it from the table.
-            expense_goal_object_name = QTableWidgetItem(goal_object.name)
-            expense_goal_object_name.setData(Qt.UserRole, goal_object)
-            # start balance is now set in init_goal() method of goal object
-            # goal_object.set_startBalance()
-            self.expense_goal_table.insertRow(row_position)
+        :param row_position: The row to write.
+        :type row_position: int
+        :param goal_object: The Goal object shown in the row.
+        :type goal_object: Goal
+        :return: None
+        """
+        for column, (text, sort_key) in enumerate(self.expense_goal_cells(goal_object)):
+            if sort_key is None:
+                item = QTableWidgetItem(text)
+            else:
+                item = SortableTableItem(text, sort_key)
+            self.expense_goal_table.setItem(row_position, column, item)
 
-        # Use row-position as the row index for setting items
-        self.expense_goal_table.setItem(row_position, 0, expense_goal_object_name)
-        self.expense_goal_table.setItem(row_position, 1, QTableWidgetItem(goal_object.category))
-        self.expense_goal_table.setItem(row_position, 2, QTableWidgetItem(goal_object.start_date))
-        self.expense_goal_table.setItem(row_position, 3, QTableWidgetItem(goal_object.end_date))
-        self.expense_goal_table.setItem(row_position, 4, QTableWidgetItem(str(goal_object.current_amount)))
-        self.expense_goal_table.setItem(row_position, 5, QTableWidgetItem(str(goal_object.target_amount)))
-        self.expense_goal_table.setItem(row_position, 6, QTableWidgetItem(str(goal_object.amount_left)))
-        self.expense_goal_table.setItem(row_position, 7, QTableWidgetItem(goal_object.note))
+        # Store the object in the name item, so we can pull this exact object back out when we delete it from the
+        # table, and remember the item to find the goal's row
+        name_item = self.expense_goal_table.item(row_position, 0)
+        name_item.setData(Qt.UserRole, goal_object)
+        self.expense_goal_items[goal_object] = name_item
 
-        # turn the sorting back on
-        self.expense_goal_table.setSortingEnabled(True)
+    @staticmethod
+    def expense_goal_cells(goal_object: Goal):
+        """
+        Gets the cells of a goal's row in the expense goal table.
+
+        :param goal_object: The Goal object shown in the row.
+        :type goal_object: Goal
+        :return: (text, sort key) of each column. The sort key is None for columns that sort by their text.
+        :rtype: list[tuple[str, int | None]]
+        """
+        return [(goal_object.name, None),
+                (goal_object.category, None),
+                (goal_object.start_date, goal_object.start_ordinal or 0),
+                (goal_object.end_date, goal_object.end_ordinal or 0),
+                (str(goal_object.current_amount), goal_object.current_cents),
+                (str(goal_object.target_amount), goal_object.target_cents),
+                (str(goal_object.amount_left), goal_object.amount_left_cents),
+                (goal_object.note, None)]
 
     # updates a cell on the transaction table. Checks for appropriate data validation through method calls
     #
     # update transaction (requirement 1.3.3)
     #
-    def update_transaction_cell_method(self, table: QTableWidget):
+    def update_transaction_cell_method(self, table: QTableView):
         """
-        Opens a dialog box to update the content of a selected cell in the provided QTableWidget.
+        Opens a dialog box to update the content of a selected cell in the provided QTableView.
 
-        :param table: The QTableWidget containing the cell to be updated.
-        :type table: QTableWidget
+        :param table: The QTableView containing the cell to be updated.
+        :type table: QTableView
         :return: None
         """
 
-        # Set selected item to the currently clicked item
-        selected_item = table.currentItem()
+        # Set selected index to the currently clicked cell
+        selected_index = table.currentIndex()
 
-        # get row and column from the selected item, otherwise no cell was selected
-        if selected_item:
-            current_row = table.row(selected_item)
-            current_column = table.column(selected_item)
+        # get row and column from the selected index, otherwise no cell was selected
+        if selected_index.isValid():
+            current_row = selected_index.row()
+            current_column = selected_index.column()
         else:
             QMessageBox.warning(self, "Update Cell", "No Cell was selected")
             return
 
         # create a dialog box to update the cells
         update_cell_dialog = QDialog()
-        update_cell_dialog.setWindowTitle(f"{self.expense_header_labels[current_column]} Cell Update")
+        update_cell_dialog.setWindowTitle(f"{self.transaction_table_headers[current_column]} Cell Update")
         update_cell_dialog.setWindowFlags(Qt.Window | Qt.CustomizeWindowHint | Qt.WindowCloseButtonHint)
         update_cell_dialog.resize(200, 75)
 
@@ -740,9 +788,8 @@ class BudgetTrackerApp(QMainWindow):
         # create save button for update_cell_dialog
         save_changes_button = QPushButton("Save")
 
-        # get the goal object out of the table. Stored in the first column
-        cell_to_update_obj = self.transaction_table.item(row, 0)
-        transaction_obj = cell_to_update_obj.data(Qt.UserRole)
+        # get the transaction object shown in the row out of the table model
+        transaction_obj = self.transaction_model.transaction_at(row)
 
         # Create the layout for the contents of the dialog box
         layout = QVBoxLayout()
@@ -751,7 +798,7 @@ class BudgetTrackerApp(QMainWindow):
         # check to see if the new line, for current column, matches data restrictions
         if column in (0, 2, 3, 5):
             new_input_line = QLineEdit()
-            new_input_line.setText(self.transaction_table.item(row, column).text())
+            new_input_line.setText(self.transaction_model.cell_text(transaction_obj, column))
             insert_layout(update_cell_dialog, new_input_line, save_changes_button, layout, prompt)
 
             # validate that the updates hold the same restrictions as initial input
@@ -774,78 +821,47 @@ class BudgetTrackerApp(QMainWindow):
             save_changes_button.clicked.connect(lambda: update_cell_dialog.accept())
         elif column == 6:
             new_input_line = QComboBox()
-            new_input_line.addItem("N/A")
-            for expense_goal_index, expense_goal_name in enumerate(self.budget.expense_goals):
-                new_input_line.addItem(expense_goal_name)
+            new_input_line.setModel(self.goal_list_model)
             insert_layout(update_cell_dialog, new_input_line, save_changes_button, layout, prompt)
 
             save_changes_button.clicked.connect(lambda: update_cell_dialog.accept())
 
         result = update_cell_dialog.exec()
 
-        # edit the correct transaction object attribute
+        # edit the correct transaction object attribute. Changes go through the budget so its totals, goals and
+        # indexes stay in step, and the table model redraws the row when the budget reports the change
         if result == QDialog.Accepted:
             if column == 0:
-                transaction_obj.update_attribute("date", new_input_line.text())
-                self.transaction_table.setItem(row, column, QTableWidgetItem(new_input_line.text()))
+                self.budget.update_transaction(transaction_obj, "date", new_input_line.text())
             elif column == 1:
-                self.budget.delete_transaction(transaction_obj)
-                # delete_transaction auto updates goal amounts
-                # if transaction_obj.expense_goal != "N/A":
-                #    self.budget.update_transaction_expense_goal_cell(transaction_obj)
-                transaction_obj.update_attribute("transaction_type", new_input_line.currentText())
-                self.transaction_table.setItem(row, column, QTableWidgetItem(new_input_line.currentText()))
-                self.budget.add_transaction(transaction_obj)
+                # update_transaction moves the amount between totals and updates the goal amounts
+                self.budget.update_transaction(transaction_obj, "transaction_type", new_input_line.currentText())
                 self.update_under_table_hud()
                 if transaction_obj.expense_goal != "N/A":
-                    # add_transaction auto updates goal amounts
-                    # self.budget.new_transaction_update_goal_amount(transaction_obj)
                     goal = self.budget.get_expense_goal(transaction_obj.expense_goal)
                     self.add_expense_goal_list_to_table(goal)
-                    self.update_under_table_hud()
             elif column == 2:
-                self.budget.update_transaction_expense_goal_cell(transaction_obj)
-                transaction_obj.update_attribute("amount", float(new_input_line.text()))
-                self.transaction_table.setItem(row, column, QTableWidgetItem(new_input_line.text()))
-                self.add_expense_goal_list_to_table(self.budget.new_transaction_update_goal_amount(transaction_obj))
+                self.budget.update_transaction(transaction_obj, "amount", float(new_input_line.text()))
+                self.update_under_table_hud()
+                if transaction_obj.expense_goal != "N/A":
+                    goal = self.budget.get_expense_goal(transaction_obj.expense_goal)
+                    self.add_expense_goal_list_to_table(goal)
             elif column == 3:
-                transaction_obj.update_attribute("vendor", new_input_line.text())
-                self.transaction_table.setItem(row, column, QTableWidgetItem(new_input_line.text()))
+                self.budget.update_transaction(transaction_obj, "vendor", new_input_line.text())
             elif column == 4:
-                transaction_obj.update_attribute("category", new_input_line.currentText())
-                self.transaction_table.setItem(row, column, QTableWidgetItem(new_input_line.currentText()))
+                self.budget.update_transaction(transaction_obj, "category", new_input_line.currentText())
             elif column == 5:
-                transaction_obj.update_attribute("note", new_input_line.text())
-                self.transaction_table.setItem(row, column, QTableWidgetItem(new_input_line.text()))
+                self.budget.update_transaction(transaction_obj, "note", new_input_line.text())
             else:
-                # updating the expense goal column, and making sure the goal on the back end is updated correctly.
-                # Checks to see if leaving from N/A (default) to actual goal, from goal to goal, or from goal to N/A
-                # Each one will require different updates to the goal.
+                # updating the expense goal column. update_transaction takes the amount off the original goal and
+                # applies it to the new one, so both goal rows need refreshing
                 original_trans_string = transaction_obj.expense_goal
                 new_trans_string = new_input_line.currentText()
                 if new_trans_string != original_trans_string:
-                    if new_trans_string != "N/A" and original_trans_string == "N/A":
-                        self.budget.delete_transaction(transaction_obj)
-                        transaction_obj.update_attribute("expense_goal", new_input_line.currentText())
-                        self.budget.add_transaction(transaction_obj)
-                        self.transaction_table.setItem(row, column, QTableWidgetItem(new_input_line.currentText()))
-                        self.add_expense_goal_list_to_table(self.budget.get_expense_goal(new_trans_string))
-                    elif new_trans_string != "N/A" and original_trans_string != "N/A":
-                        goal = self.budget.get_expense_goal(transaction_obj.expense_goal)
-                        self.budget.update_transaction_expense_goal_cell(transaction_obj)
-                        self.add_expense_goal_list_to_table(goal)
-                        self.budget.delete_transaction(transaction_obj)
-                        transaction_obj.update_attribute("expense_goal", new_input_line.currentText())
-                        self.budget.add_transaction(transaction_obj)
-                        self.transaction_table.setItem(row, column, QTableWidgetItem(new_input_line.currentText()))
-                        self.add_expense_goal_list_to_table(self.budget.new_transaction_update_goal_amount(transaction_obj))
-                    elif new_trans_string == "N/A":
-                        goal = self.budget.get_expense_goal(transaction_obj.expense_goal)
-                        self.budget.update_transaction_expense_goal_cell(transaction_obj)
-                        self.add_expense_goal_list_to_table(goal)
-                        transaction_obj.update_attribute("expense_goal", new_input_line.currentText())
-                        self.transaction_table.setItem(row, column, QTableWidgetItem(new_input_line.currentText()))
-                        print("N/A")
+                    self.budget.update_transaction(transaction_obj, "expense_goal", new_trans_string)
+                    for goal_name in (original_trans_string, new_trans_string):
+                        if goal_name != "N/A":
+                            self.add_expense_goal_list_to_table(self.budget.get_expense_goal(goal_name))
 
     # calls methods below to verify actual data validation
     #
@@ -951,7 +967,7 @@ class BudgetTrackerApp(QMainWindow):
         save_changes_button = QPushButton("Save")
 
         # get the goal object out of the table. Stored in the first column
-        cell_to_update_obj = self.budget.get_expense_goal(self.expense_goal_table.item(row, 0).text())
+        cell_to_update_obj = self.expense_goal_table.item(row, 0).data(Qt.UserRole)
 
         # Create the layout for the contents of the dialog box
         layout = QVBoxLayout()
@@ -985,48 +1001,28 @@ class BudgetTrackerApp(QMainWindow):
 
         result = update_cell_dialog.exec()
 
-        # edit the correct goal object attribute
+        # edit the correct goal object attribute, then update the goal's row in place
         if result == QDialog.Accepted:
             if column == 0:
-
-                # create new object with previous cells attributes
-                new_obj = Goal()
-                new_obj.init_goal(new_input_line.text(), cell_to_update_obj.get("start_date"),
-                                  cell_to_update_obj.get("end_date"), cell_to_update_obj.get("note"),
-                                  cell_to_update_obj.get("target_amount"), cell_to_update_obj.get("date_spent"),
-                                  cell_to_update_obj.get("category"))
-                new_obj.transactions = cell_to_update_obj.transactions
-
-                # remove the previous object from the table. This will also delete it from the dictionary
-                self.remove_from_table(self.expense_goal_table)
-
-                # add "new" goal to the table
-                self.add_expense_goal_list_to_table(new_obj)
-
-                # add the goal to the dictionary
-                self.budget.add_expense_goal(new_obj)
+                # the goal is renamed in place, keeping its amounts. The budget moves the goal's linked
+                # transactions to the new name, and the transaction table model redraws their rows
+                try:
+                    self.budget.rename_expense_goal(cell_to_update_obj.name, new_input_line.text())
+                except ValueError as error:
+                    QMessageBox.warning(self, "Rename Goal", str(error))
+                    return
             elif column == 1:
-                cell_to_update_obj.update_attribute("category", new_input_line.currentText())
-                self.expense_goal_table.setItem(row, column, QTableWidgetItem(new_input_line.currentText()))
+                self.budget.update_expense_goal(cell_to_update_obj.name, "category", new_input_line.currentText())
             elif column == 2:
-                cell_to_update_obj.update_attribute("start_date", new_input_line.text())
-                self.expense_goal_table.setItem(row, column, QTableWidgetItem(new_input_line.text()))
+                self.budget.update_expense_goal(cell_to_update_obj.name, "start_date", new_input_line.text())
             elif column == 3:
-                cell_to_update_obj.update_attribute("end_date", new_input_line.text())
-                self.expense_goal_table.setItem(row, column, QTableWidgetItem(new_input_line.text()))
+                self.budget.update_expense_goal(cell_to_update_obj.name, "end_date", new_input_line.text())
             elif column == 5:
-                cell_to_update_obj.update_attribute("target_amount", new_input_line.text())
-                self.expense_goal_table.setItem(row, column, QTableWidgetItem(new_input_line.text()))
-                self.expense_goal_table.setItem(row, 6, QTableWidgetItem(str(cell_to_update_obj.get("amount_left"))))
+                # changing the target also changes the remaining balance
+                self.budget.update_expense_goal(cell_to_update_obj.name, "target_amount", new_input_line.text())
             elif column == 7:
-                cell_to_update_obj.update_attribute("note", new_input_line.text())
-                self.expense_goal_table.setItem(row, column, QTableWidgetItem(new_input_line.text()))
-
-        # update the goal Q Combo Box
-        self.expense_goals.clear()
-        self.expense_goals.addItem("N/A")
-        for expense_goal_index, expense_goal_name in enumerate(self.budget.expense_goals):
-            self.expense_goals.addItem(expense_goal_name)
+                self.budget.update_expense_goal(cell_to_update_obj.name, "note", new_input_line.text())
+            self.add_expense_goal_list_to_table(cell_to_update_obj)
 
     # calls methods below to verify actual data validation
     #
@@ -1086,7 +1082,10 @@ class BudgetTrackerApp(QMainWindow):
         if file_path:
             budget_name = os.path.splitext(os.path.basename(file_path))[0]
             budget_name += ".txt"
-            self.budget.save_budget(budget_name)
+            # the budget is locked while the save takes its snapshot, so edits made meanwhile wait for the snapshot
+            # rather than landing half in it. A cancelled save leaves the previous file in place
+            self.run_in_background("Saving budget...", lambda progress: self.budget.save_budget(budget_name,
+                                                                                                progress))
 
     #
     # load budget (Requirement 1.3.7)
@@ -1099,22 +1098,39 @@ class BudgetTrackerApp(QMainWindow):
         """
 
         file_path, _ = QFileDialog.getOpenFileName(self, "Load Budget", "", "Text Files (*.txt)")
-        if file_path:
-            budget_name = os.path.splitext(os.path.basename(file_path))[0]
-            budget_name += ".txt"
-            self.budget.load_budget(budget_name)
+        if not file_path:
+            return
+        budget_name = os.path.splitext(os.path.basename(file_path))[0]
+        budget_name += ".txt"
 
-        # this will load the expense objects first
-        for transaction_object in self.budget.expense_transactions:
-            self.add_transaction_lists_to_table(transaction_object)
+        # the file is read on the worker thread. What was read is added to the budget back on this thread, as the
+        # tables follow the budget's changes
+        self.run_in_background("Loading budget...", lambda progress: self.budget.read_budget_file(budget_name,
+                                                                                                  progress),
+                               self.add_loaded_budget)
 
-        # then the income transactions
-        for transaction_object in self.budget.income_transactions:
-            self.add_transaction_lists_to_table(transaction_object)
+    #
+    # load budget (Requirement 1.3.7)
+    #
+    def add_loaded_budget(self, budget_data: dict[str, list]):
+        """
+        Adds a budget read by the load job to the budget and the tables.
 
-        # finally the goal objects
-        for expense_goal in self.budget.expense_goals.values():
-            self.add_expense_goal_list_to_table(expense_goal)
+        :param budget_data: The categories, goals and transactions read from the save file
+            (see Budget.read_budget_file).
+        :type budget_data: dict[str, list]
+        :return: None
+        """
+        # both tables are repainted once when the load is done. The transaction table model takes the loaded
+        # transactions as one batch (one ranged insert and one sort), then the goal table is filled in one pass
+        self.transaction_table.setUpdatesEnabled(False)
+        try:
+            self.budget.add_budget_data(budget_data)
+        except ValueError as error:
+            QMessageBox.warning(self, "Load Budget", str(error))
+        finally:
+            self.populate_expense_goal_table()
+            self.transaction_table.setUpdatesEnabled(True)
 
         self.update_under_table_hud()
 
@@ -1139,16 +1155,125 @@ class BudgetTrackerApp(QMainWindow):
     #
     def export_budget_dialog(self):
         """
-        Opens a dialog box to export the budget transactions to a specified Excel file.
+        Opens a dialog box to export the budget transactions to a specified Excel, CSV or columnar file.
 
         :return: None
         """
         # file_path, _ = QFileDialog.getOpenFileName(self, "Export Budget", "", "Excel Files (*.xlsx)")
-        file_path, _ = QFileDialog.getSaveFileName(self, "Export Budget", "", "Excel Files (*.xlsx)")
+        file_path, file_filter = QFileDialog.getSaveFileName(self, "Export Budget", "",
+                                                             "Excel Files (*.xlsx);;CSV Files (*.csv);;"
+                                                             "Columnar Files (*.btc)")
         if file_path:
             budget_name = os.path.splitext(os.path.basename(file_path))[0]
-            budget_name += ".xlsx"
-            self.budget.export_transactions(budget_name)
+            if file_filter.startswith("CSV"):
+                budget_name += ".csv"
+                export = self.budget.export_csv
+            elif file_filter.startswith("Columnar"):
+                budget_name += ".btc"
+                export = self.budget.export_columnar
+            else:
+                budget_name += ".xlsx"
+                export = self.budget.export_transactions
+
+            # the export is written to a temporary file next to the target, which replaces the target only once the
+            # export finishes. A cancelled or failed export leaves any existing file untouched
+            temp_fd, temp_name = tempfile.mkstemp(suffix=os.path.splitext(budget_name)[1],
+                                                  dir=os.path.dirname(os.path.abspath(budget_name)))
+            os.close(temp_fd)
+
+            def replace_target(result):
+                try:
+                    os.replace(temp_name, budget_name)
+                except OSError as error:
+                    remove_temp_file()
+                    QMessageBox.warning(self, "Budget Tracker", f"Exporting transactions failed: {error}")
+
+            def remove_temp_file(*args):
+                if os.path.exists(temp_name):
+                    os.remove(temp_name)
+
+            job = self.run_in_background("Exporting transactions...", lambda progress: export(temp_name, progress),
+                                         replace_target)
+            job.signals.cancelled.connect(remove_temp_file)
+            job.signals.failed.connect(remove_temp_file)
+
+    def import_statement_dialog(self):
+        """
+        Opens a dialog box to import transactions from a CSV, OFX or QFX bank statement.
+
+        :return: None
+        """
+        file_path, _ = QFileDialog.getOpenFileName(self, "Import Statement", "",
+                                                   "Bank Statements (*.csv *.ofx *.qfx)")
+        if not file_path:
+            return
+
+        # the transaction table model adds each imported batch as the budget reports it. Batches added before an
+        # error stay in the budget, so they show in the table either way
+        try:
+            # statements often overlap, so rows already in the budget are skipped
+            report = import_statement(self.budget, file_path, dedupe=True)
+        except (OSError, ValueError) as error:
+            report = None
+            QMessageBox.warning(self, "Import Statement", str(error))
+        self.update_under_table_hud()
+        if report is not None:
+            QMessageBox.information(self, "Import Statement", str(report))
+
+    def run_in_background(self, label: str, function, on_finished=None):
+        """
+        Runs a save, load or export on the worker thread, with a progress dialog that can cancel it. Failures are
+        shown in a warning box.
+
+        :param label: The text shown in the progress dialog.
+        :type label: str
+        :param function: The work to run, called on the worker thread with a progress function (see workers.Job).
+        :type function: Callable[[Callable[[int, int], None]], object]
+        :param on_finished: Called on this thread with what function returned, if it finishes.
+        :type on_finished: Callable[[object], None]
+        :return: The job running the work.
+        :rtype: Job
+        """
+        # the dialog only shows up for jobs running longer than half a second. Progress is shown as a percentage,
+        # as byte counts of large files don't fit the dialog's int range
+        progress_dialog = QProgressDialog(label, "Cancel", 0, 100, self)
+        progress_dialog.setWindowTitle("Budget Tracker")
+        progress_dialog.setMinimumDuration(500)
+        progress_dialog.setValue(0)
+
+        job = self.jobs.start(function)
+        progress_dialog.canceled.connect(job.cancel)
+        job.signals.progress.connect(
+            lambda done, total: progress_dialog.setValue(done * 100 // total if total else 0))
+
+        def close_progress_dialog():
+            progress_dialog.reset()
+            progress_dialog.deleteLater()
+
+        def finished(result):
+            close_progress_dialog()
+            if on_finished is not None:
+                on_finished(result)
+
+        def failed(message):
+            close_progress_dialog()
+            QMessageBox.warning(self, "Budget Tracker", f"{label.rstrip('.')} failed: {message}")
+
+        job.signals.finished.connect(finished)
+        job.signals.failed.connect(failed)
+        job.signals.cancelled.connect(close_progress_dialog)
+        return job
+
+    def closeEvent(self, event):
+        """
+        Cancels any save, load or export still running and waits for the worker thread before the window closes.
+
+        :param event: The close event.
+        :return: None
+        """
+        self.jobs.cancel_all()
+        self.jobs.wait()
+        super().closeEvent(event)
 
     '''
     end save, delete and load budget section
@@ -1159,7 +1284,7 @@ class BudgetTrackerApp(QMainWindow):
 
     def validate_date(self, line_edit: QLineEdit):
         """
-        Validates if the input in a QLineEdit represents a date in the format DD/MM/YY.
+        Validates if the input in a QLineEdit represents a real date in the format DD/MM/YY.
 
         :param line_edit: The QLineEdit containing the date text to be validated.
         :type line_edit: QLineEdit
@@ -1170,7 +1295,8 @@ class BudgetTrackerApp(QMainWindow):
 
         date_pattern = re.compile(r'\d{2}\/\d{2}/\d{2}')
 
-        if not re.match(date_pattern, date_text):
+        # the pattern checks the format, parse_date (memoized) rejects dates that don't exist such as 31/02/23
+        if not re.match(date_pattern, date_text) or parse_date(date_text) is None:
             # Show what format it should look like
             QMessageBox.warning(self, "Invalid Date", "Please enter a date in the format DD/MM/YY")
 
@@ -0,0 +1,145 @@
+"""
+Module containing the background jobs the GUI runs off its thread, such as saving, loading and exporting budgets
+"""
+
+
+import threading
+from typing import Callable
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class JobCancelled(Exception):
+    """
+    Raised by a job's progress function once the job has been cancelled, to stop the work at its next progress report
+    """
+
+
+class JobSignals(QObject):
+    """
+    Signals of a Job. They are emitted on the worker thread and delivered on the thread that created the job, so
+    slots connected by the GUI run on the GUI thread
+    """
+    progress = pyqtSignal(int, int)  # (done, total)
+    finished = pyqtSignal(object)  # what the job's function returned
+    failed = pyqtSignal(str)  # message of the exception the job's function raised
+    cancelled = pyqtSignal()
+
+
+class Job(QRunnable):
+    """
+    Function run on a worker thread. The function is called with a progress function taking (done, total), which
+    it calls as it works; the call raises JobCancelled once cancel has been called. Budget.save_budget,
+    Budget.read_budget_file and the Budget exports all take a progress function like this
+    """
+
+    def __init__(self, function: Callable[[Callable[[int, int], None]], object]):
+        """
+        Init
+
+        :param function: work to run, called with the progress function
+        :type function: Callable[[Callable[[int, int], None]], object]
+        """
+        super().__init__()
+        self.setAutoDelete(False)  # the Python object owns the job, Qt must not delete it after run
+        self.function = function
+        self.signals: JobSignals = JobSignals()
+        self.cancel_requested: threading.Event = threading.Event()
+
+    def cancel(self):
+        """
+        Method to ask the job to stop at its next progress report. Safe to call from any thread
+
+        :return: None
+        """
+        self.cancel_requested.set()
+
+    def report(self, done: int, total: int):
+        """
+        Progress function handed to the job's function
+
+        :param done: amount of work done
+        :type done: int
+        :param total: total amount of work
+        :type total: int
+        :return: None
+        """
+        if self.cancel_requested.is_set():
+            raise JobCancelled()
+        self.signals.progress.emit(done, total)
+
+    def run(self):
+        """
+        Method to run the job's function, emitting finished, failed or cancelled when it ends
+
+        :return: None
+        """
+        try:
+            result = self.function(self.report)
+        except JobCancelled:
+            self.signals.cancelled.emit()
+        except Exception as error:
+            self.signals.failed.emit(str(error) or type(error).__name__)
+        else:
+            self.signals.finished.emit(result)
+
+
+class JobRunner(QObject):
+    """
+    Runs jobs on a pool of one worker thread, so jobs run one at a time in the order they were started and a save
+    never overlaps a load of the same file
+    """
+
+    def __init__(self, parent: QObject = None):
+        """
+        Init
+
+        :param parent: parent QObject
+        :type parent: QObject
+        """
+        super().__init__(parent)
+        self.pool: QThreadPool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.jobs: list[Job] = []  # jobs started and not yet ended, kept alive until they end
+
+    @property
+    def busy(self):
+        """
+        True while a job is waiting or running
+        """
+        return bool(self.jobs)
+
+    def start(self, function: Callable[[Callable[[int, int], None]], object]):
+        """
+        Method to run a function on the worker thread
+
+        :param function: work to run, called with a progress function (see Job)
+        :type function: Callable[[Callable[[int, int], None]], object]
+        :return: Job - the job, connect to its signals to hear how it ends
+        :rtype: Job
+        """
+        job = Job(function)
+        for signal in (job.signals.finished, job.signals.failed, job.signals.cancelled):
+            signal.connect(lambda *args, job=job: self.jobs.remove(job))
+        self.jobs.append(job)
+        self.pool.start(job)
+        return job
+
+    def cancel_all(self):
+        """
+        Method to cancel every job started and not yet ended
+
+        :return: None
+        """
+        for job in self.jobs:
+            job.cancel()
+
+    def wait(self, msecs: int = -1):
+        """
+        Method to block until the worker thread is idle
+
+        :param msecs: longest time to wait in milliseconds, -1 for no limit
+        :type msecs: int
+        :return: bool - True if every job ended
+        :rtype: bool
+        """
+        return self.pool.waitForDone(msecs)